@@ -4,7 +4,7 @@ from cyaudit import __main__
 
 
 def main():
-    __main__.main(sys.argv[1:])
+    sys.exit(__main__.main(sys.argv[1:]))
 
 
 def version() -> str:
@@ -5,6 +5,16 @@ from typing import Tuple
 
 import tomllib
 
+from cyaudit import http_cache
+from cyaudit.constants import (
+    DEFAULT_MAX_CLONES,
+    DEFAULT_MAX_GITHUB_CALLS,
+    DEFAULT_MAX_PARALLEL_AUDITS,
+    REPORT_BRANCH_NAME,
+    REPORT_FOLDER,
+)
+from cyaudit.git_tools import CLONE_STRATEGIES
+from cyaudit.github_client import log_client_stats, use_connection_pool
 from cyaudit.logging import logger, set_log_level
 
 CYAUDIT_CLI_VERSION_STRING = "CyAudit CLI v{}"
@@ -35,7 +45,12 @@ def main(argv: list) -> int:
     if args.command:
         command_to_use = args.command.replace("-", "_")
         logger.info(f"Running {command_to_use} command...")
-        import_module(f"cyaudit.commands.{command_to_use}").main(args)
+        use_connection_pool()
+        try:
+            return import_module(f"cyaudit.commands.{command_to_use}").main(args) or 0
+        finally:
+            log_client_stats()
+            http_cache.finish()
     else:
         main_parser.print_help()
     return 0
@@ -129,6 +144,56 @@ def generate_main_parser_and_sub_parsers() -> (
         nargs="+",
         type=str,
     )
+    setup_parser.add_argument(
+        "--single-push",
+        help="Create the audit tag, auditor branches and report branch locally and publish them in one git push.",
+        action="store_true",
+    )
+    setup_parser.add_argument(
+        "--clone-strategy",
+        help="How much of the source repo to clone: every branch, or only the default branch and the audited commit. Defaults to full.",
+        choices=list(CLONE_STRATEGIES),
+        default="full",
+    )
+    setup_parser.add_argument(
+        "--no-mirror-cache",
+        help="Clone the source repo from scratch instead of through the local mirror in ~/.cyaudit/mirrors.",
+        action="store_true",
+    )
+    setup_parser.add_argument(
+        "--branch",
+        help="Branch of the source repo to publish as main. Defaults to the default branch if it contains the commit, then to other branches holding it.",
+        type=str,
+    )
+    setup_parser.add_argument(
+        "--resume",
+        help="Finish a setup that stopped part way, retrying only the steps whose changes are missing on GitHub.",
+        action="store_true",
+    )
+    setup_parser.add_argument(
+        "--batch",
+        help="Set up every audit of a TOML manifest concurrently. Each table takes the fields of the [cyaudit] table of cyaudit.toml.",
+        type=str,
+        metavar="MANIFEST",
+    )
+    setup_parser.add_argument(
+        "--max-parallel-audits",
+        help=f"With --batch, how many audits to set up at once. Defaults to {DEFAULT_MAX_PARALLEL_AUDITS}.",
+        type=int,
+        default=DEFAULT_MAX_PARALLEL_AUDITS,
+    )
+    setup_parser.add_argument(
+        "--max-github-calls",
+        help=f"With --batch, how many GitHub API calls may be in flight across all audits. Defaults to {DEFAULT_MAX_GITHUB_CALLS}.",
+        type=int,
+        default=DEFAULT_MAX_GITHUB_CALLS,
+    )
+    setup_parser.add_argument(
+        "--max-clones",
+        help=f"With --batch, how many git clones and fetches may run at once. Defaults to {DEFAULT_MAX_CLONES}.",
+        type=int,
+        default=DEFAULT_MAX_CLONES,
+    )
 
     # ------------------------------------------------------------------
     #                              SOURCE
@@ -140,7 +205,17 @@ def generate_main_parser_and_sub_parsers() -> (
     # ------------------------------------------------------------------
     #                              REPORT
     # ------------------------------------------------------------------
-    sub_parsers.add_parser("report", help="Generate the report.")
+    report_parser = sub_parsers.add_parser("report", help="Generate the report.")
+    report_parser.add_argument(
+        "--no-cache",
+        help="Don't read or write the shared artifact cache.",
+        action="store_true",
+    )
+    report_parser.add_argument(
+        "--deterministic",
+        help="Produce a byte-identical PDF for identical sources (pins SOURCE_DATE_EPOCH).",
+        action="store_true",
+    )
 
     # ------------------------------------------------------------------
     #                              REPORT
@@ -150,6 +225,32 @@ def generate_main_parser_and_sub_parsers() -> (
         "team_name", help="The name of the team to add.", type=str
     )
 
+    # ------------------------------------------------------------------
+    #                              ACCESS
+    # ------------------------------------------------------------------
+    access_parser = sub_parsers.add_parser(
+        "access", help="Give teams and users access to audit repos."
+    )
+    access_parser.add_argument(
+        "action", help="What to do with the access.", choices=["grant"]
+    )
+    access_parser.add_argument(
+        "--repos",
+        help="Repos to give access to, as names in --org or full names.",
+        nargs="+",
+        required=True,
+    )
+    access_parser.add_argument(
+        "--teams", help="Names or slugs of the teams.", nargs="+", default=[]
+    )
+    access_parser.add_argument(
+        "--users", help="GitHub usernames of the users.", nargs="+", default=[]
+    )
+    access_parser.add_argument(
+        "--org",
+        help="Organization of the repos, defaults to the target organization of cyaudit.toml.",
+    )
+
     # ------------------------------------------------------------------
     #                              CLONE
     # ------------------------------------------------------------------
@@ -162,6 +263,99 @@ def generate_main_parser_and_sub_parsers() -> (
         type=str,
         nargs="?",
     )
+    clone_parser.add_argument(
+        "--report-only",
+        help=f"Only clone the latest commit of the {REPORT_BRANCH_NAME} branch, with just {REPORT_FOLDER}/ checked out.",
+        action="store_true",
+    )
+    clone_parser.add_argument(
+        "--auditor-branches",
+        help="In a clone made with --report-only, fetch the auditor branches too.",
+        action="store_true",
+    )
+    clone_parser.add_argument(
+        "--all",
+        help="Clone every audit repo of --org into --dest, or fetch those already cloned.",
+        action="store_true",
+    )
+    clone_parser.add_argument(
+        "--org", help="With --all, the organization of the audit repos."
+    )
+    clone_parser.add_argument(
+        "--filter",
+        help="With --all, required: only the repos with a topic (topic:<topic>) or name prefix (prefix:<prefix>).",
+    )
+    clone_parser.add_argument(
+        "--dest",
+        help="With --all, the folder to clone the repos into. Defaults to the current folder.",
+        default=".",
+    )
+    clone_parser.add_argument(
+        "--max-clones",
+        help=f"With --all, how many clones and fetches may run at once. Defaults to {DEFAULT_MAX_CLONES}.",
+        type=int,
+        default=DEFAULT_MAX_CLONES,
+    )
+
+    # ------------------------------------------------------------------
+    #                              LABELS
+    # ------------------------------------------------------------------
+    labels_parser = sub_parsers.add_parser(
+        "labels", help="Manage the labels of the audit repo."
+    )
+    labels_parser.add_argument(
+        "action", help="What to do with the labels.", choices=["sync"]
+    )
+    labels_parser.add_argument(
+        "--dry-run",
+        help="Only print the changes that would be made.",
+        action="store_true",
+    )
+
+    # ------------------------------------------------------------------
+    #                              BOARD
+    # ------------------------------------------------------------------
+    board_parser = sub_parsers.add_parser(
+        "board", help="Manage the project board of the audit repo."
+    )
+    board_parser.add_argument(
+        "action", help="What to do with the board.", choices=["sync"]
+    )
+    board_parser.add_argument(
+        "--dry-run",
+        help="Only print the changes that would be made.",
+        action="store_true",
+    )
+    board_parser.add_argument(
+        "--severity-field",
+        help="Single select field of the board set from the severity labels. Defaults to Severity.",
+        default="Severity",
+    )
+    board_parser.add_argument(
+        "--status-field",
+        help="Single select field of the board set from the report status labels. Defaults to Status.",
+        default="Status",
+    )
+
+    # ------------------------------------------------------------------
+    #                              CACHE
+    # ------------------------------------------------------------------
+    cache_parser = sub_parsers.add_parser(
+        "cache", help="Inspect or prune the shared artifact cache and repo mirrors."
+    )
+    cache_parser.add_argument(
+        "action", help="What to do with the cache.", choices=["stats", "prune"]
+    )
+    cache_parser.add_argument(
+        "--max-size",
+        help="Prune the artifact cache down to this many megabytes (defaults to the configured cap).",
+        type=float,
+    )
+    cache_parser.add_argument(
+        "--max-age",
+        help="Also remove repo mirrors unused for this many days (defaults to 90).",
+        type=float,
+    )
 
     # ------------------------------------------------------------------
     #                               INIT
@@ -0,0 +1,395 @@
+from dataclasses import dataclass, field
+
+from gql import Client, gql
+from gql.transport.exceptions import TransportQueryError
+
+from cyaudit.logging import logger
+from cyaudit.state import AuditState
+from cyaudit.utils.create_report import SEVERITY_LABELS, STATUS_LABELS
+
+# Mutations sent per GraphQL request, each under its own alias
+BOARD_BATCH_SIZE = 50
+
+PROJECTS_QUERY = """
+    query GetProjects($owner: String!, $name: String!) {
+        repository(owner: $owner, name: $name) {
+            projectsV2(first: 20) {
+                nodes {
+                    id
+                    title
+                    closed
+                }
+            }
+        }
+    }
+"""
+
+ITEMS_QUERY = """
+    query GetBoard($project: ID!, $after: String) {
+        node(id: $project) {
+            ... on ProjectV2 {
+                fields(first: 50) {
+                    nodes {
+                        ... on ProjectV2SingleSelectField {
+                            id
+                            name
+                            options {
+                                id
+                                name
+                            }
+                        }
+                    }
+                }
+                items(first: 100, after: $after) {
+                    pageInfo {
+                        hasNextPage
+                        endCursor
+                    }
+                    nodes {
+                        id
+                        content {
+                            ... on Issue {
+                                id
+                            }
+                        }
+                        fieldValues(first: 20) {
+                            nodes {
+                                ... on ProjectV2ItemFieldSingleSelectValue {
+                                    optionId
+                                    field {
+                                        ... on ProjectV2SingleSelectField {
+                                            id
+                                        }
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+"""
+
+ISSUES_QUERY = """
+    query GetOpenIssues($owner: String!, $name: String!, $after: String) {
+        repository(owner: $owner, name: $name) {
+            issues(states: OPEN, first: 100, after: $after) {
+                pageInfo {
+                    hasNextPage
+                    endCursor
+                }
+                nodes {
+                    id
+                    number
+                    labels(first: 20) {
+                        nodes {
+                            name
+                        }
+                    }
+                }
+            }
+        }
+    }
+"""
+
+
+class ProjectNotFoundError(RuntimeError):
+    """The project board id doesn't resolve, e.g. the board was deleted."""
+
+
+@dataclass
+class SelectField:
+    id: str
+    # Option ids by lower-cased option name
+    options: dict[str, str]
+
+
+@dataclass
+class FieldUpdate:
+    issue_id: str
+    field_id: str
+    option_id: str
+
+
+@dataclass
+class BoardPlan:
+    add: list[str] = field(default_factory=list)
+    update: list[FieldUpdate] = field(default_factory=list)
+    problems: list[str] = field(default_factory=list)
+    # Mutations that failed when the plan was applied
+    errors: list[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.add or self.update)
+
+
+def option_for(labels: list[str], choices: list[str], select: SelectField) -> str:
+    """
+    Id of the option of `select` matching the one label of `labels` that is in
+    `choices`. "Severity: High Risk" matches an option named "Severity: High
+    Risk" or "High Risk".
+
+    Raises:
+        ValueError: If there isn't exactly one such label, or no such option.
+    """
+    matches = [label for label in labels if label in choices]
+    if len(matches) != 1:
+        raise ValueError(f"has {len(matches)} of the labels {', '.join(choices)}")
+    label = matches[0]
+    for name in (label, label.split(": ", 1)[-1]):
+        if name.lower() in select.options:
+            return select.options[name.lower()]
+    raise ValueError(f"is labelled {label!r}, which is no option of the board")
+
+
+def plan_board_sync(
+    issues: dict[str, tuple[int, list[str]]],
+    items: dict[str, tuple[str, dict[str, str]]],
+    fields: dict[str, SelectField | None],
+) -> BoardPlan:
+    """
+    Compute the changes that bring the board in line with the open issues.
+
+    Args:
+        issues: Number and label names of every open issue, by node id.
+        items: Item id and option id of every single select field of the
+            board's issues, by issue node id.
+        fields: The board's Severity and Status fields, or None for those it
+            lacks.
+    """
+    plan = BoardPlan()
+    choices = {"severity": SEVERITY_LABELS, "status": STATUS_LABELS}
+    for issue_id, (number, labels) in issues.items():
+        values = items[issue_id][1] if issue_id in items else {}
+        if issue_id not in items:
+            plan.add.append(issue_id)
+        for kind, select in fields.items():
+            if select is None:
+                continue
+            try:
+                option_id = option_for(labels, choices[kind], select)
+            except ValueError as e:
+                plan.problems.append(f"Issue #{number} {e}")
+                continue
+            if values.get(select.id) != option_id:
+                plan.update.append(FieldUpdate(issue_id, select.id, option_id))
+    return plan
+
+
+def paginate(client: Client, query: str, variables: dict, connection) -> list[dict]:
+    """Every node of the connection returned by `connection(response)`."""
+    document = gql(query)
+    nodes, after = [], None
+    while True:
+        page = connection(
+            client.execute(document, variable_values={**variables, "after": after})
+        )
+        nodes.extend(page["nodes"])
+        if not page["pageInfo"]["hasNextPage"]:
+            return nodes
+        after = page["pageInfo"]["endCursor"]
+
+
+def find_project_id(client: Client, full_name: str, title: str | None = None) -> str:
+    """
+    Node id of the audit repo's project board, from the state file or else the
+    open project linked to the repo, preferring the one named `title`.
+    """
+    project_id = AuditState().get(full_name).get("project_id")
+    if project_id:
+        return project_id
+    owner, name = full_name.split("/")
+    response = client.execute(
+        gql(PROJECTS_QUERY), variable_values={"owner": owner, "name": name}
+    )
+    projects = [
+        project
+        for project in response["repository"]["projectsV2"]["nodes"]
+        if not project["closed"]
+    ]
+    if not projects:
+        raise RuntimeError(f"No open project board is linked to {full_name}")
+    project = next((p for p in projects if p["title"] == title), projects[0])
+    AuditState().update(full_name, project_id=project["id"])
+    return project["id"]
+
+
+def fetch_board(
+    client: Client, project_id: str
+) -> tuple[dict[str, SelectField], dict[str, tuple[str, dict[str, str]]]]:
+    """
+    The board's single select fields by name, and its issue items.
+
+    Raises:
+        ProjectNotFoundError: If `project_id` doesn't resolve to a node.
+    """
+    fields: dict[str, SelectField] = {}
+
+    def connection(response: dict) -> dict:
+        if response["node"] is None:
+            raise ProjectNotFoundError(f"Project board {project_id} not found")
+        for node in response["node"]["fields"]["nodes"]:
+            if "options" in node:
+                options = {
+                    option["name"].lower(): option["id"] for option in node["options"]
+                }
+                fields[node["name"]] = SelectField(node["id"], options)
+        return response["node"]["items"]
+
+    try:
+        nodes = paginate(client, ITEMS_QUERY, {"project": project_id}, connection)
+    except TransportQueryError as e:
+        # GitHub answers unknown ids with an error and a null node
+        if e.data and "node" in e.data and e.data["node"] is None:
+            raise ProjectNotFoundError(f"Project board {project_id} not found") from e
+        raise
+    items = {}
+    for node in nodes:
+        if not (node["content"] or {}).get("id"):
+            continue
+        values = {
+            value["field"]["id"]: value["optionId"]
+            for value in node["fieldValues"]["nodes"]
+            if value.get("optionId")
+        }
+        items[node["content"]["id"]] = (node["id"], values)
+    return fields, items
+
+
+def fetch_open_issues(
+    client: Client, full_name: str
+) -> dict[str, tuple[int, list[str]]]:
+    owner, name = full_name.split("/")
+    nodes = paginate(
+        client,
+        ISSUES_QUERY,
+        {"owner": owner, "name": name},
+        lambda response: response["repository"]["issues"],
+    )
+    return {
+        node["id"]: (
+            node["number"],
+            [label["name"] for label in node["labels"]["nodes"]],
+        )
+        for node in nodes
+    }
+
+
+def run_batched(
+    client: Client, mutation: str, input_type: str, selection: str, inputs: list[dict]
+) -> tuple[list[dict | None], list[str]]:
+    """
+    Run `mutation` once per input, BOARD_BATCH_SIZE at a time, as aliased
+    fields of a single GraphQL request.
+
+    Returns:
+        The result of every mutation, None for those that failed, and a
+        message for every failure.
+    """
+    results: list[dict | None] = []
+    errors = []
+    for start in range(0, len(inputs), BOARD_BATCH_SIZE):
+        batch = inputs[start : start + BOARD_BATCH_SIZE]
+        aliases = [f"m{i}" for i in range(len(batch))]
+        document = "mutation Batch({}) {{\n{}\n}}".format(
+            ", ".join(f"${alias}: {input_type}!" for alias in aliases),
+            "\n".join(
+                f"{alias}: {mutation}(input: ${alias}) {{ {selection} }}"
+                for alias in aliases
+            ),
+        )
+        variables = dict(zip(aliases, batch))
+        try:
+            data = client.execute(gql(document), variable_values=variables)
+        except TransportQueryError as e:
+            data = e.data or {}
+            for error in e.errors or [{"message": str(e)}]:
+                path = error.get("path") or []
+                where = f" ({path[0]})" if path else ""
+                errors.append(f"{mutation}{where} failed: {error.get('message')}")
+        except Exception as e:
+            data = {}
+            errors.append(f"{mutation} failed for {len(batch)} items: {e}")
+        results.extend(data.get(alias) for alias in aliases)
+    return results, errors
+
+
+def apply_board_plan(
+    client: Client,
+    project_id: str,
+    plan: BoardPlan,
+    items: dict[str, tuple[str, dict[str, str]]],
+) -> list[str]:
+    """
+    Add the missing issues to the board, then set the field values that
+    changed, many mutations per request.
+
+    Returns:
+        A message for every mutation that failed.
+    """
+    added, errors = run_batched(
+        client,
+        "addProjectV2ItemById",
+        "AddProjectV2ItemByIdInput",
+        "item { id }",
+        [{"projectId": project_id, "contentId": issue_id} for issue_id in plan.add],
+    )
+    item_ids = {issue_id: item_id for issue_id, (item_id, _) in items.items()}
+    for issue_id, result in zip(plan.add, added):
+        if result is not None:
+            item_ids[issue_id] = result["item"]["id"]
+
+    updates = [update for update in plan.update if update.issue_id in item_ids]
+    _, update_errors = run_batched(
+        client,
+        "updateProjectV2ItemFieldValue",
+        "UpdateProjectV2ItemFieldValueInput",
+        "projectV2Item { id }",
+        [
+            {
+                "projectId": project_id,
+                "itemId": item_ids[update.issue_id],
+                "fieldId": update.field_id,
+                "value": {"singleSelectOptionId": update.option_id},
+            }
+            for update in updates
+        ],
+    )
+    return errors + update_errors
+
+
+def sync_board(
+    client: Client,
+    full_name: str,
+    project_title: str | None = None,
+    severity_field: str = "Severity",
+    status_field: str = "Status",
+    dry_run: bool = False,
+) -> BoardPlan:
+    """Read the board and the open issues once and apply the minimal changes."""
+    project_id = find_project_id(client, full_name, project_title)
+    try:
+        fields, items = fetch_board(client, project_id)
+    except ProjectNotFoundError:
+        # The recorded board may have been deleted, look for the repo's boards
+        logger.info(f"Project board {project_id} is gone, looking it up again")
+        AuditState().forget(full_name, "project_id")
+        project_id = find_project_id(client, full_name, project_title)
+        fields, items = fetch_board(client, project_id)
+    issues = fetch_open_issues(client, full_name)
+    wanted = {"severity": severity_field, "status": status_field}
+    for kind, name in wanted.items():
+        if name not in fields:
+            logger.warning(f"The board has no single select field {name!r}")
+    plan = plan_board_sync(
+        issues, items, {kind: fields.get(name) for kind, name in wanted.items()}
+    )
+    if plan.is_empty():
+        logger.info("The board is already in sync")
+    if dry_run:
+        return plan
+    plan.errors = apply_board_plan(client, project_id, plan, items)
+    for error in plan.errors:
+        logger.warning(error)
+    return plan
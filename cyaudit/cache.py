@@ -0,0 +1,187 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from cyaudit.constants import (
+    CACHE_DIR_ENV_VAR,
+    CACHE_LOCATION,
+    CACHE_MAX_SIZE_ENV_VAR,
+    DEFAULT_CACHE_MAX_SIZE_MB,
+)
+from cyaudit.logging import logger
+
+LOCK_FILE_NAME = ".lock"
+
+
+@dataclass
+class CacheStats:
+    entries: int = 0
+    size: int = 0
+    namespaces: dict[str, tuple[int, int]] = field(default_factory=dict)
+
+
+@contextmanager
+def file_lock(
+    lock_path: Path, shared: bool = False, blocking: bool = True
+) -> Iterator[None]:
+    """Hold an advisory ``flock`` on ``lock_path`` for the duration of the block.
+
+    Args:
+        lock_path (Path): File used as the lock, created if missing.
+        shared (bool): Take a shared lock instead of an exclusive one.
+        blocking (bool): Wait for the lock. Otherwise raise BlockingIOError
+            if another process holds it.
+    """
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as lock_file:
+        operation = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        if not blocking:
+            operation |= fcntl.LOCK_NB
+        fcntl.flock(lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def make_key(*parts: str | bytes) -> str:
+    """Build a content address from the given parts."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def get_max_size() -> int:
+    """Size cap of the cache in bytes, from $CYAUDIT_CACHE_MAX_SIZE_MB if set."""
+    max_size_mb = os.getenv(CACHE_MAX_SIZE_ENV_VAR)
+    if not max_size_mb:
+        return DEFAULT_CACHE_MAX_SIZE_MB * 1024 * 1024
+    try:
+        return int(float(max_size_mb) * 1024 * 1024)
+    except ValueError:
+        raise ValueError(
+            f"${CACHE_MAX_SIZE_ENV_VAR} must be a number of megabytes, got {max_size_mb}"
+        )
+
+
+class ArtifactCache:
+    """Content-addressed artifact store shared by every audit on this machine.
+
+    Entries live at ``<root>/<namespace>/<key[:2]>/<key>``. Writes go through a
+    temporary file and an atomic rename, so concurrent cyaudit processes never
+    see a partial entry. Reads refresh the entry's mtime, which eviction uses
+    as the last-access time.
+    """
+
+    def __init__(self, root: Path | str | None = None, max_size: int | None = None):
+        if root is None:
+            root = os.getenv(CACHE_DIR_ENV_VAR) or CACHE_LOCATION
+        self.root = Path(root).expanduser()
+        self.max_size = max_size if max_size is not None else get_max_size()
+
+    def _path(self, namespace: str, key: str) -> Path:
+        return self.root / namespace / key[:2] / key
+
+    def get(self, namespace: str, key: str) -> bytes | None:
+        path = self._path(namespace, key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except FileNotFoundError:
+            logger.debug(f"Cache miss: {namespace}/{key[:12]}")
+            return None
+        logger.debug(f"Cache hit: {namespace}/{key[:12]}")
+        return data
+
+    def put(self, namespace: str, key: str, data: bytes) -> None:
+        path = self._path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_name, path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+    def get_text(self, namespace: str, key: str) -> str | None:
+        data = self.get(namespace, key)
+        return data.decode() if data is not None else None
+
+    def put_text(self, namespace: str, key: str, text: str) -> None:
+        self.put(namespace, key, text.encode())
+
+    def _entries(self) -> list[tuple[Path, os.stat_result]]:
+        entries = []
+        if not self.root.exists():
+            return entries
+        for path in self.root.glob("*/*/*"):
+            if path.name.startswith(".tmp-"):
+                continue
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def stats(self) -> CacheStats:
+        stats = CacheStats()
+        for path, stat in self._entries():
+            namespace = path.relative_to(self.root).parts[0]
+            count, size = stats.namespaces.get(namespace, (0, 0))
+            stats.namespaces[namespace] = (count + 1, size + stat.st_size)
+            stats.entries += 1
+            stats.size += stat.st_size
+        return stats
+
+    def prune(self, max_size: int | None = None) -> tuple[int, int]:
+        """Evict least recently used entries until the cache fits ``max_size``.
+
+        Returns:
+            Tuple of the number of entries removed and the bytes freed.
+        """
+        if max_size is None:
+            max_size = self.max_size
+        removed, freed = 0, 0
+        with file_lock(self.root / LOCK_FILE_NAME):
+            entries = self._entries()
+            total = sum(stat.st_size for _, stat in entries)
+            for path, stat in sorted(entries, key=lambda e: e[1].st_mtime):
+                if total <= max_size:
+                    break
+                path.unlink(missing_ok=True)
+                total -= stat.st_size
+                removed += 1
+                freed += stat.st_size
+        if removed:
+            logger.debug(f"Evicted {removed} cache entries ({freed} bytes)")
+        return removed, freed
+
+
+_cache: ArtifactCache | None = None
+_cache_enabled = True
+
+
+def get_cache() -> ArtifactCache | None:
+    """The process-wide artifact cache, or None if caching was disabled."""
+    global _cache
+    if not _cache_enabled:
+        return None
+    if _cache is None:
+        _cache = ArtifactCache()
+    return _cache
+
+
+def set_cache_enabled(enabled: bool) -> None:
+    global _cache_enabled
+    _cache_enabled = enabled
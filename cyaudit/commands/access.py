@@ -0,0 +1,69 @@
+from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from cyaudit.config import env_github_token, give_access_to_users_and_teams, load_config
+from cyaudit.constants import DEFAULT_MAX_PARALLEL_AUDITS
+from cyaudit.github_client import get_audit_repo, get_github, get_teams
+from cyaudit.logging import logger
+
+
+def main(args: Namespace) -> int:
+    if args.action == "grant":
+        return grant(args)
+    return 0
+
+
+def grant(args: Namespace) -> int:
+    """Give the teams and users access to every repo, several repos at a time."""
+    token = env_github_token()
+    if token is None:
+        logger.error(
+            "Set CYAUDIT_ORG_GITHUB_TOKEN or CYAUDIT_PERSONAL_GITHUB_TOKEN "
+            "to grant access"
+        )
+        return 1
+    organization = args.org
+    if organization is None and Path("cyaudit.toml").exists():
+        organization = load_config()[2]
+
+    full_names = []
+    for repo_name in args.repos:
+        if "/" not in repo_name and organization is None:
+            logger.error(f"Pass --org or the full name of {repo_name}")
+            return 1
+        if "/" not in repo_name:
+            repo_name = f"{organization}/{repo_name}"
+        full_names.append(repo_name)
+
+    orgs = {
+        owner.lower(): get_github(token, lazy=True).get_organization(owner)
+        for owner in (full_name.split("/")[0] for full_name in full_names)
+    }
+    # Resolve the teams once per organization, before the repos need them
+    if args.teams:
+        for org in orgs.values():
+            try:
+                get_teams(org, args.teams)
+            except Exception:
+                # Reported for every repo of the organization
+                pass
+
+    def run(full_name: str) -> list[str]:
+        try:
+            repo = get_audit_repo(token, full_name)
+        except Exception as e:
+            return [f"❌ Could not find {full_name}: {e}"]
+        return give_access_to_users_and_teams(
+            repo, orgs[full_name.split("/")[0].lower()], args.users, args.teams
+        )
+
+    with ThreadPoolExecutor(max_workers=DEFAULT_MAX_PARALLEL_AUDITS) as executor:
+        results = dict(zip(full_names, executor.map(run, full_names)))
+    failed = [full_name for full_name, errors in results.items() if errors]
+    logger.info(
+        f"Granted access to {len(full_names) - len(failed)} of {len(full_names)} repos"
+    )
+    for full_name in failed:
+        logger.error(f"{full_name}: {len(results[full_name])} grants failed")
+    return 1 if failed else 0
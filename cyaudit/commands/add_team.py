@@ -1,8 +1,7 @@
 from argparse import Namespace
 
-from github import Github
-
 from cyaudit.config import give_access_to_users_and_teams, load_config
+from cyaudit.github_client import get_audit_repo, get_github
 
 
 def main(args: Namespace) -> None:
@@ -20,9 +19,10 @@ def main(args: Namespace) -> None:
         give_teams_access,
     ) = load_config()
 
-    g = Github(org_github_token)
-    org = g.get_organization(target_organization)
-    repo = g.get_repo(target_organization + "/" + target_repo_name)
+    org = get_github(org_github_token, lazy=True).get_organization(target_organization)
+    repo = get_audit_repo(
+        org_github_token, target_organization + "/" + target_repo_name
+    )
     users = []
     team_names = [args.team_name]
     give_access_to_users_and_teams(repo, org, users, team_names)
@@ -0,0 +1,44 @@
+from argparse import Namespace
+
+from cyaudit.board import sync_board
+from cyaudit.config import load_config
+from cyaudit.github_client import get_graphql_client
+from cyaudit.logging import logger
+
+
+def main(args: Namespace) -> int:
+    (
+        _,
+        target_repo_name,
+        target_organization,
+        _,
+        _,
+        personal_github_token,
+        org_github_token,
+        project_title,
+        _,
+        _,
+        _,
+    ) = load_config()
+    if org_github_token is None:
+        org_github_token = personal_github_token
+
+    if args.action == "sync":
+        plan = sync_board(
+            get_graphql_client(org_github_token),
+            target_organization + "/" + target_repo_name,
+            project_title,
+            severity_field=args.severity_field,
+            status_field=args.status_field,
+            dry_run=args.dry_run,
+        )
+        prefix = "Would " if args.dry_run else ""
+        logger.info(
+            f"{prefix}add {len(plan.add)} issues and set {len(plan.update)} fields"
+        )
+        for problem in plan.problems:
+            logger.warning(problem)
+        if plan.errors:
+            logger.error(f"{len(plan.errors)} changes to the board failed")
+            return 1
+    return 0
@@ -0,0 +1,50 @@
+from argparse import Namespace
+
+from cyaudit.cache import ArtifactCache
+from cyaudit.logging import logger
+from cyaudit.mirrors import MirrorCache
+
+
+def main(args: Namespace) -> int:
+    cache = ArtifactCache()
+    mirrors = MirrorCache()
+    if args.action == "stats":
+        print_stats(cache)
+        print_mirrors(mirrors)
+    elif args.action == "prune":
+        max_size = None
+        if args.max_size is not None:
+            max_size = int(args.max_size * 1024 * 1024)
+        removed, freed = cache.prune(max_size)
+        logger.info(f"Removed {removed} entries, freed {format_size(freed)}")
+        removed, freed = mirrors.prune(max_age_days=args.max_age)
+        logger.info(f"Removed {removed} repo mirrors, freed {format_size(freed)}")
+    return 0
+
+
+def print_stats(cache: ArtifactCache) -> None:
+    stats = cache.stats()
+    print(f"Location: {cache.root}")
+    print(
+        f"Size: {format_size(stats.size)} of {format_size(cache.max_size)} ({stats.entries} entries)"
+    )
+    for namespace, (count, size) in sorted(stats.namespaces.items()):
+        print(f"  {namespace}: {count} entries, {format_size(size)}")
+
+
+def print_mirrors(mirrors: MirrorCache) -> None:
+    repos = mirrors.list()
+    print(f"Mirrors: {mirrors.root}")
+    print(
+        f"Size: {format_size(sum(m.size for m in repos))} of {format_size(mirrors.max_size)} ({len(repos)} repos)"
+    )
+    for mirror in sorted(repos, key=lambda m: m.name):
+        print(f"  {mirror.name}: {format_size(mirror.size)}")
+
+
+def format_size(size: float) -> str:
+    for unit in ["B", "KB", "MB"]:
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
@@ -0,0 +1,38 @@
+from argparse import Namespace
+
+from cyaudit.config import load_config
+from cyaudit.github_client import get_audit_repo
+from cyaudit.labels import sync_labels
+from cyaudit.logging import logger
+
+
+def main(args: Namespace) -> int:
+    (
+        _,
+        target_repo_name,
+        target_organization,
+        _,
+        _,
+        personal_github_token,
+        org_github_token,
+        _,
+        _,
+        _,
+        _,
+    ) = load_config()
+    if org_github_token is None:
+        org_github_token = personal_github_token
+
+    repo = get_audit_repo(
+        org_github_token, target_organization + "/" + target_repo_name
+    )
+    if args.action == "sync":
+        plan = sync_labels(repo, dry_run=args.dry_run)
+        prefix = "Would " if args.dry_run else ""
+        for data in plan.create:
+            logger.info(f"{prefix}create: {data['name']} ({data['color']})")
+        for data in plan.update:
+            logger.info(f"{prefix}update: {data['name']} ({data['color']})")
+        for name in plan.delete:
+            logger.info(f"{prefix}delete: {name}")
+    return 0
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import re
 import shutil
@@ -6,12 +7,15 @@ from argparse import Namespace
 from importlib.resources import files
 from pathlib import Path
 
+from cyaudit.cache import get_cache, make_key, set_cache_enabled
 from cyaudit.logging import logger
 from cyaudit.utils.create_report import (
     OUTPUT_PATH,
+    SOURCE_MAP,
     SOURCE_PATH,
     SOURCE_REPORT,
     TEMPLATE_PATH,
+    WORKING_MAP,
     WORKING_PATH,
     calculate_period,
     edit_report_md,
@@ -19,9 +23,18 @@ from cyaudit.utils.create_report import (
     get_severity_counts,
     get_summary_information,
     lint,
+    pandoc_version,
     replace_in_file_content,
     save_file_contents,
 )
+from cyaudit.utils.latex_log import LatexError, LatexLogParser
+from cyaudit.utils.source_map import SourceMap
+from cyaudit.utils.validate_report import (
+    Problem,
+    validate_markdown,
+    validate_summary_table,
+    validate_tex,
+)
 
 # TODO
 # Tackle https://github.com/Cyfrin/report-generator-template/blob/63946de5f48dbed602bb054876f7384da917a421/scripts/convert.sh
@@ -30,7 +43,12 @@ from cyaudit.utils.create_report import (
 
 
 def main(args: Namespace) -> int:
-    generate_report()
+    if args.no_cache:
+        set_cache_enabled(False)
+    generate_report(deterministic=args.deterministic)
+    cache = get_cache()
+    if cache is not None:
+        cache.prune()
     return 0
 
 
@@ -51,12 +69,22 @@ def run_pandoc_conversion(source_dir: Path, working_dir: Path):
 
     minted_script = files("cyaudit") / "utils" / "pandoc-minted.py"
     image_script = files("cyaudit") / "utils" / "pandoc-image.py"
+    cache = get_cache()
+    filters_key = make_key(
+        pandoc_version(), minted_script.read_bytes(), image_script.read_bytes()
+    )
 
     for md_file in files_to_convert:
         logger.info(f"Converting {md_file} to LaTeX")
         input_path = source_dir / md_file
         output_path = working_dir / md_file.replace(".md", ".tex")
         if input_path.exists():
+            if cache is not None:
+                key = make_key(filters_key, input_path.read_bytes())
+                cached = cache.get("pandoc", key)
+                if cached is not None:
+                    output_path.write_bytes(cached)
+                    continue
             subprocess.run(
                 [
                     "pandoc",
@@ -72,9 +100,11 @@ def run_pandoc_conversion(source_dir: Path, working_dir: Path):
                 ],
                 check=True,
             )
+            if cache is not None:
+                cache.put("pandoc", key, output_path.read_bytes())
 
 
-def generate_report():
+def generate_report(deterministic: bool = False):
     # Get static info from conf files
     summary_data = get_summary_information()
     severity_count_data = get_severity_counts()
@@ -194,6 +224,9 @@ def generate_report():
     # Lint the report.md
     print("Linting the report.md file ...")
     report = get_file_contents(SOURCE_REPORT)
+    source_map = SourceMap.load(SOURCE_MAP)
+    if source_map is not None:
+        source_map.anchor_markdown(report)
     report = lint(
         report,
         summary_data["team_name"],
@@ -201,8 +234,24 @@ def generate_report():
         source_repo_name,
         internal_org,
         internal_repo_name,
+        source_map=source_map,
     )
     save_file_contents(SOURCE_REPORT, report)
+    if source_map is not None:
+        source_map.anchor_markdown(report)
+    print("Done.\n")
+
+    # Images are resolved from the working dir, so they must be there first
+    src_dir = Path.cwd() / TEMPLATE_PATH / "img"
+    dst_dir = Path.cwd() / WORKING_PATH / "img"
+    if src_dir.exists():
+        shutil.copytree(src_dir, dst_dir, dirs_exist_ok=True)
+
+    # Catch build breakers before spending time on pandoc and pdflatex
+    print("Validating the report.md file ...")
+    stop_on_problems(
+        validate_markdown(report, Path.cwd() / WORKING_PATH, source_map=source_map)
+    )
     print("Done.\n")
 
     # Convert all .md to .tex and save to working dir
@@ -212,6 +261,10 @@ def generate_report():
     )
     process_tex_file(WORKING_PATH + "/report.tex")
     code_listings()
+    report_tex = get_file_contents(WORKING_PATH + "/report.tex")
+    if source_map is not None:
+        source_map.anchor_tex(report, report_tex)
+        source_map.save(WORKING_MAP)
     print("Done.\n")
 
     # Process for title.tex: Get the file and replace placeholders.
@@ -229,6 +282,13 @@ def generate_report():
     save_file_contents(Path.cwd() / WORKING_PATH / "summary.tex", summary)
     print("Done.\n")
 
+    print("Validating the generated LaTeX files ...")
+    stop_on_problems(
+        validate_tex(report_tex, "report.tex", source_map=source_map)
+        + validate_summary_table(summary)
+    )
+    print("Done.\n")
+
     print("Copying over other files...")
     files_to_copy = [
         "main.tex",
@@ -245,22 +305,27 @@ def generate_report():
         else:
             print(f"Warning: Source file {src} not found")
 
-    src_dir = Path.cwd() / TEMPLATE_PATH / "img"
-    dst_dir = Path.cwd() / WORKING_PATH / "img"
-    if src_dir.exists():
-        shutil.copytree(src_dir, dst_dir, dirs_exist_ok=True)
-
     print("Done.\n")
 
     # Generate PDF in output folder
     print("Generating report PDF file ...")
-    compile_latex_report()
+    compile_latex_report(deterministic=deterministic, source_map=source_map)
     # Edit the report markdown for Solodit, after everything else is complete
     edit_report_md()
     print("\nAll tasks completed. Report should be in the 'output' folder.")
     print("\nIf not, please check texput.log for errors.")
 
 
+def stop_on_problems(problems: list[Problem]) -> None:
+    """Print every problem found by validation and stop the build if there are any."""
+    if not problems:
+        return
+    logger.error(f"Found {len(problems)} problem(s) that would break the build:")
+    for problem in problems:
+        print(f"\t{problem}")
+    exit(1)
+
+
 def process_tex_file(filepath: str = "./working/report.tex") -> None:
     """
     Process a TEX file to perform various text replacements.
@@ -326,33 +391,124 @@ def code_listings():
     save_file_contents(WORKING_PATH + "/report.tex", report)
 
 
-def compile_latex_report():
+def get_source_date_epoch() -> str:
+    """
+    Timestamp used for reproducible builds: $SOURCE_DATE_EPOCH if set, otherwise
+    the time of the last commit touching the source folder.
+    """
+    if os.getenv("SOURCE_DATE_EPOCH"):
+        return os.environ["SOURCE_DATE_EPOCH"]
+    result = subprocess.run(
+        ["git", "log", "-1", "--format=%ct", "--", SOURCE_PATH],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode == 0 and result.stdout.strip():
+        return result.stdout.strip()
+    return "0"
+
+
+def run_pdflatex(command: list[str], env: dict[str, str]) -> LatexError | None:
+    """
+    Run pdflatex, streaming its output through a LatexLogParser.
+
+    The process is killed as soon as the parser sees an error, instead of
+    letting nonstopmode carry on through the rest of the document.
+
+    Returns:
+        The first error found, or None if the run succeeded.
+    """
+    parser = LatexLogParser()
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        stdin=subprocess.DEVNULL,
+        text=True,
+        errors="replace",
+        env=env,
+    )
+    assert process.stdout is not None
+    error = None
+    with process:
+        for line in process.stdout:
+            logger.debug(line.rstrip("\n"))
+            error = parser.feed(line)
+            if error is not None:
+                process.kill()
+                break
+        else:
+            error = parser.close()
+    if error is None and process.returncode != 0:
+        error = LatexError(
+            message=f"pdflatex exited with code {process.returncode}",
+            context=list(parser.recent),
+        )
+    return error
+
+
+def compile_latex_report(
+    deterministic: bool = False, source_map: SourceMap | None = None
+):
     """
     Compiles LaTeX report and copies the output to the correct location.
     Equivalent to the bash script that runs pdflatex twice and copies the output.
+
+    With `deterministic`, dates are pinned to SOURCE_DATE_EPOCH and the PDF
+    creation dates and trailer ID are left out, so identical sources produce a
+    byte-identical PDF.
     """
     cwd = Path.cwd()
+    env = os.environ.copy()
+    # Keep TeX from wrapping its output at 79 columns, so each message is one line
+    env["max_print_line"] = "10000"
+    command = [
+        "pdflatex",
+        "-shell-escape",
+        "-interaction=nonstopmode",
+        "-file-line-error",
+        "main.tex",
+    ]
+    if deterministic:
+        env["SOURCE_DATE_EPOCH"] = get_source_date_epoch()
+        env["FORCE_SOURCE_DATE"] = "1"
+        command[-1:] = [
+            "-jobname=main",
+            r"\pdfinfoomitdate=1\pdftrailerid{}\pdfsuppressptexinfo=-1\input{main.tex}",
+        ]
 
     # Change to working directory
     os.chdir(cwd / WORKING_PATH)
     try:
         # Run pdflatex twice
         for _ in range(2):
-            result = subprocess.run(
-                ["pdflatex", "-shell-escape", "-interaction=nonstopmode", "main.tex"],
-                capture_output=True,
-                text=True,
-            )
+            error = run_pdflatex(command, env)
 
             # Check if the compilation was successful
-            if result.returncode != 0:
+            if error is not None:
                 print("LaTeX compilation failed:")
-                print(result.stderr)
+                print(error)
+                if (
+                    source_map is not None
+                    and error.file is not None
+                    and Path(error.file).name == "report.tex"
+                    and error.line is not None
+                ):
+                    location = source_map.locate_tex(error.line)
+                    if location is not None:
+                        print(f"The error is in {location}")
                 return False
 
         # Copy the output file
-        shutil.copy("main.pdf", Path.cwd() / OUTPUT_PATH / "report.pdf")
+        output_file = cwd / OUTPUT_PATH / "report.pdf"
+        shutil.copy("main.pdf", output_file)
         print("Successfully compiled and copied report")
+        if deterministic:
+            digest = hashlib.sha256(output_file.read_bytes()).hexdigest()
+            output_file.with_name("report.pdf.sha256").write_text(
+                f"{digest}  report.pdf\n"
+            )
+            print(f"Report SHA-256: {digest}")
     finally:
         os.chdir(cwd)
     return True
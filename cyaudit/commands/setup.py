@@ -1,36 +1,77 @@
 import os
-import shutil
 import subprocess
 import tempfile
+import threading
+import time
 from argparse import Namespace
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
 from datetime import date
 from getpass import getpass
-from importlib import resources
 from pathlib import Path
 from typing import List, Tuple
 from urllib.parse import urlparse
 
 import tomli_w
 import tomllib
-from github import Github, GithubException, Organization, Repository
-
-from cyaudit.config import give_access_to_users_and_teams, load_config
+from github import Github, GithubException, Repository
+from github.GithubObject import NotSet
+
+from cyaudit import limits
+from cyaudit.config import (
+    give_access_to_users_and_teams,
+    load_batch_config,
+    load_config,
+)
 from cyaudit.constants import (
-    DEFAULT_LABELS,
+    AUDIT_TAG_NAME,
     GITHUB_WORKFLOW_ACTION_NAME,
     ISSUE_TEMPLATE,
+    ISSUE_TEMPLATE_PATH,
     MAIN_BRANCH_NAME,
     REPORT_BRANCH_NAME,
     REPORT_FOLDER,
-    SEVERITY_DATA,
+    SUMMARY_TOML_PATH,
     TEMPLATE_PROJECT_ID,
 )
-from cyaudit.create_action import create_action
-from cyaudit.github_project_utils import clone_project
+from cyaudit.create_action import workflow_contents, workflow_path
+from cyaudit.git_data import TreeFile, commit_files, template_files
+from cyaudit.git_tools import (
+    SOURCE_REMOTE,
+    clone_source,
+    credentials_for,
+    ensure_commit,
+    fetch_branch,
+    find_branch_containing,
+    github_url,
+    is_ancestor,
+    push_refs,
+    run_git,
+)
+from cyaudit.github_client import (
+    get_github,
+    get_graphql_client,
+    get_organization,
+    get_repo,
+    own_connection,
+    remember_repo,
+    use_connection_pool,
+)
+from cyaudit.github_project_utils import clone_project, finish_project, project_exists
+from cyaudit.journal import Journal
+from cyaudit.labels import sync_labels
 from cyaudit.logging import logger
+from cyaudit.mirrors import MirrorCache
+from cyaudit.preflight import run_checks, setup_checks
+from cyaudit.state import AuditState, repo_fields
+from cyaudit.steps import Step, log_summary, run_steps
 
 
 def main(args: Namespace) -> int:
+    if args.batch:
+        return run_batch(args)
+
     (
         source_url,
         target_repo_name,
@@ -101,10 +142,120 @@ def main(args: Namespace) -> int:
         template_project_id,
         give_users_access,
         give_teams_access,
+        single_push=args.single_push,
+        clone_strategy=args.clone_strategy,
+        use_mirror_cache=not args.no_mirror_cache,
+        branch=args.branch,
+        resume=args.resume,
     )
     return 0
 
 
+@dataclass
+class AuditResult:
+    name: str
+    full_name: str
+    duration: float
+    error: BaseException | None = None
+
+
+def run_batch(args: Namespace) -> int:
+    """
+    Set up every audit of the batch manifest at `args.batch` concurrently.
+
+    Tokens given on the command line apply to every audit, like the other
+    setup flags. Missing fields fail that audit instead of prompting.
+
+    Returns:
+        0 if every audit was set up, 1 otherwise.
+    """
+    audits = load_batch_config(args.batch)
+    full_names: dict[str, str] = {}
+    for name, (source_url, target_repo_name, target_organization, *_) in audits.items():
+        if not target_repo_name and source_url:
+            target_repo_name = source_url.replace(".git", "").rstrip("/").split("/")[-1]
+        full_name = f"{target_organization}/{target_repo_name}"
+        if full_name.lower() in (other.lower() for other in full_names.values()):
+            raise ValueError(f"More than one audit in {args.batch} sets up {full_name}")
+        full_names[name] = full_name
+
+    limits.set_limits(github_calls=args.max_github_calls, git_clones=args.max_clones)
+    use_connection_pool()
+
+    def run(name: str) -> AuditResult:
+        (
+            source_url,
+            target_repo_name,
+            target_organization,
+            auditors,
+            commit_hash,
+            personal_github_token,
+            org_github_token,
+            project_title,
+            template_project_id,
+            give_users_access,
+            give_teams_access,
+        ) = audits[name]
+        if args.github_token is not None:
+            personal_github_token = args.github_token
+        if args.organization_github_token is not None:
+            org_github_token = args.organization_github_token
+
+        start = time.monotonic()
+        try:
+            setup_repo(
+                source_url,
+                target_repo_name,
+                target_organization,
+                auditors,
+                commit_hash,
+                personal_github_token,
+                org_github_token,
+                project_title,
+                template_project_id or TEMPLATE_PROJECT_ID,
+                give_users_access,
+                give_teams_access,
+                single_push=args.single_push,
+                clone_strategy=args.clone_strategy,
+                use_mirror_cache=not args.no_mirror_cache,
+                resume=args.resume,
+            )
+        except Exception as e:
+            logger.error(f"Setup of {full_names[name]} ({name}) failed: {e}")
+            return AuditResult(name, full_names[name], time.monotonic() - start, e)
+        return AuditResult(name, full_names[name], time.monotonic() - start)
+
+    logger.info(
+        f"Setting up {len(audits)} audits, {args.max_parallel_audits} at a time..."
+    )
+    with ThreadPoolExecutor(max_workers=args.max_parallel_audits) as executor:
+        results = list(executor.map(run, audits))
+
+    log_batch_summary(results)
+    return 0 if all(result.error is None for result in results) else 1
+
+
+def log_batch_summary(results: List[AuditResult]) -> None:
+    failed = [result for result in results if result.error is not None]
+    logger.info(
+        f"Batch summary: {len(results) - len(failed)} set up, {len(failed)} failed"
+    )
+    for result in results:
+        if result.error is None:
+            logger.info(
+                f"  ✅ {result.name}: {result.full_name} ({result.duration:.1f}s)"
+            )
+        else:
+            logger.info(
+                f"  ❌ {result.name}: {result.full_name} ({result.duration:.1f}s): {result.error!r}"
+            )
+    if failed:
+        logger.info(
+            "Run the same batch with --resume to finish the failed audits; "
+            "finished steps are not repeated."
+        )
+
+
 def setup_repo(
     source_url: str,
     target_repo_name: str,
@@ -117,6 +268,11 @@ def setup_repo(
     template_project_id: str = TEMPLATE_PROJECT_ID,
     give_users_access: List[str] | None = None,
     give_teams_access: List[str] | None = None,
+    single_push: bool = False,
+    clone_strategy: str = "full",
+    use_mirror_cache: bool = True,
+    branch: str | None = None,
+    resume: bool = False,
 ) -> None:
     missing_params = []
 
@@ -126,6 +282,8 @@ def setup_repo(
         missing_params.append("auditors")
     if not target_organization:
         missing_params.append("target_organization")
+    if not commit_hash:
+        missing_params.append("commit_hash")
 
     if missing_params:
         raise ValueError(f"Missing required parameters: {', '.join(missing_params)}")
@@ -143,59 +301,243 @@ def setup_repo(
     source_username = path_parts[-2]
     source_repo_name = path_parts[-1]
 
-    repo = None
-
-    with tempfile.TemporaryDirectory() as temp_dir:
-        repo = try_clone_repo(
+    if not target_repo_name:
+        target_repo_name = source_repo_name
+    if not org_github_token:
+        org_github_token = personal_github_token
+    full_name = f"{target_organization}/{target_repo_name}"
+    # Pushes get both tokens, each only sent to its own repo
+    push_credentials = {
+        **credentials_for(
+            github_url(f"{source_username}/{source_repo_name}"), personal_github_token
+        ),
+        **credentials_for(github_url(full_name), org_github_token),
+    }
+
+    problems = run_checks(
+        setup_checks(
+            f"{source_username}/{source_repo_name}",
             target_organization,
             target_repo_name,
-            source_repo_name,
-            source_username,
-            temp_dir,
             commit_hash,
             personal_github_token,
             org_github_token,
-        )
-        repo = create_audit_tag(repo, temp_dir, commit_hash)
-        repo = add_issue_template_to_repo(repo)
-        repo = replace_labels_in_repo(repo)
-        repo = create_branches_for_auditors(repo, auditors, commit_hash)
-        repo = create_report_branch(repo, commit_hash)
-        repo = add_report_branch_data(
-            repo,
-            source_repo_name,
-            target_repo_name,
-            source_username,
-            target_organization,
-            temp_dir,
-            commit_hash,
-        )
-
-        org_repo = get_org_repo(repo, org_github_token)
-
-        repo = set_up_ci(org_repo, temp_dir)
-        set_up_project_board(
-            org_repo,
-            org_github_token,
-            target_organization,
-            target_repo_name,
             template_project_id,
-            project_title,
+            give_users_access,
+            give_teams_access,
+            branch,
+            resume,
+        )
+    )
+    if problems:
+        for problem in problems:
+            logger.error(f"❌ {problem}")
+        raise ValueError(
+            f"Found {len(problems)} problems before setting up {full_name}, nothing was changed"
         )
 
-        org_github_object = Github(org_github_token)
-        g_org = org_github_object.get_organization(target_organization)
+    journal = Journal.open(target_organization, target_repo_name)
+    details = {"source_url": source_url, "commit_hash": commit_hash}
+    if resume:
+        journal.check_matches(**details)
+        logger.info(f"Resuming the setup of {full_name} from {journal.path}")
+    else:
+        journal.start(**details)
+
+    mirrors = MirrorCache() if use_mirror_cache else None
+    with tempfile.TemporaryDirectory() as temp_dir, ExitStack() as stack:
+        reference = None
+        if mirrors is not None:
+            # The clone keeps borrowing the mirror's objects until temp_dir is gone
+            reference = stack.enter_context(
+                mirrors.borrow(
+                    github_url(f"{source_username}/{source_repo_name}"),
+                    source_username,
+                    source_repo_name,
+                    personal_github_token,
+                )
+            )
 
-        give_access_to_users_and_teams(
-            org_repo, g_org, give_users_access, give_teams_access
+        workdir_lock = threading.Lock()
+
+        def workdir() -> str:
+            # A resumed setup may skip the clone, but later steps still need one
+            with workdir_lock:
+                if not (Path(temp_dir) / ".git").exists():
+                    clone_audit_repo(
+                        target_organization,
+                        target_repo_name,
+                        temp_dir,
+                        org_github_token,
+                        reference,
+                    )
+            return temp_dir
+
+        tag_ref = f"refs/tags/{AUDIT_TAG_NAME}"
+        auditor_refs = [f"refs/heads/audit/{auditor}" for auditor in auditors]
+        report_ref = f"refs/heads/{REPORT_BRANCH_NAME}"
+        if single_push:
+            ref_steps = [
+                Step(
+                    "audit-refs",
+                    lambda done: push_audit_refs(
+                        done["repo"], workdir(), auditors, commit_hash, push_credentials
+                    ),
+                    depends_on=["clone"],
+                    verify=lambda done: verify_refs(
+                        done["repo"], [tag_ref, *auditor_refs, report_ref]
+                    ),
+                )
+            ]
+        else:
+            ref_steps = [
+                Step(
+                    "audit-tag",
+                    lambda done: create_audit_tag(
+                        own_connection(done["repo"]),
+                        workdir(),
+                        commit_hash,
+                        push_credentials,
+                    ),
+                    depends_on=["clone"],
+                    verify=lambda done: verify_refs(done["repo"], [tag_ref]),
+                ),
+                Step(
+                    "auditor-branches",
+                    lambda done: create_branches_for_auditors(
+                        own_connection(done["repo"]), auditors, commit_hash
+                    ),
+                    depends_on=["clone"],
+                    verify=lambda done: verify_refs(done["repo"], auditor_refs),
+                ),
+                Step(
+                    "report-branch",
+                    lambda done: create_report_branch(
+                        own_connection(done["repo"]), commit_hash
+                    ),
+                    depends_on=["clone"],
+                    verify=lambda done: verify_refs(done["repo"], [report_ref]),
+                ),
+            ]
+        steps = [
+            Step(
+                "repo",
+                lambda done: create_audit_repo(
+                    target_organization, target_repo_name, org_github_token
+                ),
+                verify=lambda done: find_repo(org_github_token, full_name),
+            ),
+            Step(
+                "clone",
+                lambda done: clone_and_push_source(
+                    done["repo"],
+                    target_organization,
+                    target_repo_name,
+                    source_repo_name,
+                    source_username,
+                    temp_dir,
+                    commit_hash,
+                    personal_github_token,
+                    org_github_token,
+                    clone_strategy,
+                    reference,
+                    branch,
+                ),
+                depends_on=["repo"],
+                verify=lambda done: verify_refs(
+                    done["repo"], [f"refs/heads/{MAIN_BRANCH_NAME}"]
+                ),
+            ),
+            *ref_steps,
+            # Commits to main, so it must wait for the clone to push it
+            Step(
+                "issue-template",
+                lambda done: add_issue_template_to_repo(own_connection(done["repo"])),
+                depends_on=["clone"],
+                verify=lambda done: verify_file(done["repo"], ISSUE_TEMPLATE_PATH),
+            ),
+            Step(
+                "labels",
+                lambda done: replace_labels_in_repo(own_connection(done["repo"])),
+                depends_on=["repo"],
+            ),
+            Step(
+                "report-data",
+                lambda done: add_report_branch_data(
+                    own_connection(done["repo"]),
+                    source_repo_name,
+                    target_repo_name,
+                    source_username,
+                    target_organization,
+                    commit_hash,
+                ),
+                depends_on=["audit-refs" if single_push else "report-branch"],
+                verify=lambda done: verify_file(
+                    done["repo"], SUMMARY_TOML_PATH, REPORT_BRANCH_NAME
+                ),
+            ),
+            Step(
+                "org-repo",
+                lambda done: get_org_repo(done["repo"], org_github_token),
+                depends_on=["repo"],
+            ),
+            Step(
+                "project-board",
+                lambda done: set_up_project_board(
+                    own_connection(done["org-repo"]),
+                    org_github_token,
+                    target_organization,
+                    target_repo_name,
+                    template_project_id,
+                    project_title,
+                ),
+                depends_on=["org-repo"],
+                verify=lambda done: (
+                    journal.value("project-board")
+                    if project_exists(org_github_token, journal.value("project-board"))
+                    else None
+                ),
+            ),
+            Step(
+                "project-finish",
+                lambda done: finish_project_board(
+                    done["org-repo"],
+                    org_github_token,
+                    target_repo_name,
+                    done["project-board"],
+                ),
+                depends_on=["org-repo", "project-board"],
+            ),
+            Step(
+                "access",
+                lambda done: give_access_to_users_and_teams(
+                    own_connection(done["org-repo"]),
+                    get_github(org_github_token, lazy=True).get_organization(
+                        target_organization
+                    ),
+                    give_users_access,
+                    give_teams_access,
+                ),
+                depends_on=["org-repo"],
+            ),
+        ]
+        results = run_steps(steps, journal=journal)
+
+    if mirrors is not None:
+        mirrors.prune()
+    log_summary(results)
+    errors = [result.error for result in results.values() if result.error is not None]
+    if errors:
+        logger.error(
+            f"Setup of {full_name} did not finish. Fix the problem and run "
+            "`cyaudit setup --resume` to retry only the steps that are missing."
         )
-
-    return repo
+        raise errors[0]
+    return results["repo"].value
 
 
 def get_org_repo(repo: Repository, org_token: str):
-    g = Github(org_token)
-    return g.get_repo(repo.full_name)
+    return get_repo(org_token, repo.full_name)
 
 
 # IMPORTANT: project creation via REST API is not supported anymore
@@ -208,12 +550,12 @@ def set_up_project_board(
     target_repo_name: str,
     template_project_id: str,
     project_title: str = "DEFAULT PROJECT",
-):
+) -> str:
     logger.info("Setting up project board...")
     if not project_title:
         project_title = "DEFAULT PROJECT"
     try:
-        clone_project(
+        project_id = clone_project(
             repo,
             org_github_token,
             organization,
@@ -221,29 +563,31 @@ def set_up_project_board(
             template_project_id,
             project_title,
         )
-        print("Project board has been set up successfully!")
+        logger.info("Project board has been set up successfully!")
+        AuditState().update(repo.full_name, project_id=project_id)
     except Exception as e:
-        print(f"Error occurred while setting up project board: {str(e)}")
-        print("Please set up project board manually.")
-    return
+        logger.error(f"Error occurred while setting up project board: {str(e)}")
+        raise
+    return project_id
 
 
-def set_up_ci(repo: Repository, dir: str) -> Repository:
-    logger.info("Setting up CI...")
-    try:
-        create_action(
-            repo,
-            GITHUB_WORKFLOW_ACTION_NAME,
-            dir,
-            REPORT_BRANCH_NAME,
-            str(date.today()),
-        )
-    except Exception as e:
-        logger.warning(f"Error occurred while setting up CI: {str(e)}")
-        logger.warning(
-            "Please set up CI manually using the report-generation.yml file."
-        )
-    return repo
+def finish_project_board(
+    repo: Repository, org_github_token: str, target_repo_name: str, project_id: str
+) -> str:
+    """
+    Make the copied project board private, describe it and link it to the
+    audit repo. Both changes are safe to repeat, so `--resume` just runs
+    them again.
+
+    Raises:
+        RuntimeError: If either change failed.
+    """
+    errors = finish_project(
+        get_graphql_client(org_github_token), target_repo_name, project_id, repo.node_id
+    )
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    return project_id
 
 
 def add_report_branch_data(
@@ -252,82 +596,52 @@ def add_report_branch_data(
     target_repo_name: str,
     source_username: str,
     organization: str,
-    repo_path: str,
     commit_hash: str,
-):
-    try:
-        # Create the branch
-        subprocess.run(
-            f"git -C {repo_path} pull origin {REPORT_BRANCH_NAME} --rebase",
-            shell=True,
-            check=False,
-        )
-        subprocess.run(
-            f"git -C {repo_path} checkout {REPORT_BRANCH_NAME}", shell=True, check=False
-        )
-
-        copy_template_folder_to(repo_path + "/" + REPORT_FOLDER)
-
-        # I don't think we need this?
-        # # Move workflow file to the correct location
-        # os.makedirs(f"{repo_path}/.github/workflows", exist_ok=True)
-        # try:
-        #     source = os.path.join(
-        #         repo_path, REPORT_FOLDER, ".github", "workflows", "main.yml"
-        #     )
-        #     destination = os.path.join(repo_path, ".github", "workflows", "main.yml")
-        #     shutil.move(source, destination)
-        # except Exception as e:
-        #     print(f"Error moving file: {e}")
-
-        update_summary_toml(
-            repo_path,
-            source_username,
-            source_repo_name,
-            organization,
-            target_repo_name,
-            commit_hash,
-        )
-
-        subprocess.run(f"git -C {repo_path} add .", shell=True)
-        subprocess.run(
-            f"git -C {repo_path}  commit -m 'install: {REPORT_FOLDER}'",
-            shell=True,
-            check=False,
-        )
-
-        # Push the changes back to the origin
-        subprocess.run(
-            f"git -C {repo_path} push origin {REPORT_BRANCH_NAME}",
-            shell=True,
-            check=False,
-        )
-
-        print(
-            f"The {REPORT_FOLDER} has been added to {repo.name} on branch {REPORT_BRANCH_NAME}"
+) -> Repository:
+    """
+    Add the report template, its summary information and the report workflow
+    to the report branch, in a single commit made through the API.
+    """
+    logger.info(f"Adding {REPORT_FOLDER} to branch {REPORT_BRANCH_NAME}...")
+    files = []
+    for file in template_files(REPORT_FOLDER):
+        if file.path == SUMMARY_TOML_PATH:
+            file.content = patch_summary_toml(
+                file.content,
+                source_username,
+                source_repo_name,
+                organization,
+                target_repo_name,
+                commit_hash,
+            )
+        files.append(file)
+    files.append(
+        TreeFile(
+            workflow_path(GITHUB_WORKFLOW_ACTION_NAME),
+            workflow_contents(
+                GITHUB_WORKFLOW_ACTION_NAME,
+                REPORT_FOLDER,
+                REPORT_BRANCH_NAME,
+                str(date.today()),
+            ).encode(),
         )
-
-    except GithubException as e:
-        logger.error(f"Error adding subtree: {e}")
-        repo.delete()
-        exit()
-
+    )
+    commit_files(repo, REPORT_BRANCH_NAME, files, f"install: {REPORT_FOLDER}")
+    print(
+        f"The {REPORT_FOLDER} has been added to {repo.name} on branch {REPORT_BRANCH_NAME}"
+    )
     return repo
 
 
-def update_summary_toml(
-    repo_path: str,
+def patch_summary_toml(
+    content: bytes,
     source_username: str,
     source_repo_name: str,
     organization: str,
     target_repo_name: str,
     commit_hash: str,
-) -> None:
-    toml_path = f"{repo_path}/{REPORT_FOLDER}/source/summary_information.toml"
-
-    # Read the TOML file
-    with open(toml_path, "rb") as f:  # Note: tomllib requires binary mode
-        summary_data = tomllib.load(f)
+) -> bytes:
+    summary_data = tomllib.loads(content.decode())
 
     # Update the required fields
     summary_data["summary"]["project_github"] = (
@@ -338,21 +652,7 @@ def update_summary_toml(
     )
     summary_data["summary"]["commit_hash"] = commit_hash
 
-    # Write back to the file
-    with open(toml_path, "wb") as f:  # Note: tomli_w requires binary mode
-        tomli_w.dump(summary_data, f)
-
-
-def copy_template_folder_to(destination_folder: str):
-    try:
-        pkg_path = resources.files("cyaudit")
-        template_path = pkg_path / "report_template"
-        dest = Path(destination_folder)
-        dest.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copytree(template_path, dest, dirs_exist_ok=True)
-
-    except Exception as e:
-        print(f"Error copying template folder: {e}")
+    return tomli_w.dumps(summary_data).encode()
 
 
 def create_report_branch(repo, commit_hash) -> Repository:
@@ -364,8 +664,7 @@ def create_report_branch(repo, commit_hash) -> Repository:
             logger.warning(f"Branch {REPORT_BRANCH_NAME} already exists. Skipping...")
         else:
             logger.error(f"Error creating branch: {e}")
-            repo.delete()
-            exit()
+            raise
     return repo
 
 
@@ -381,48 +680,48 @@ def create_branches_for_auditors(repo, auditors_list, commit_hash) -> Repository
                 continue
             else:
                 logger.error(f"Error creating branch: {e}")
-                repo.delete()
-                exit()
+                raise
     return repo
 
 
 def replace_labels_in_repo(repo) -> Repository:
     logger.info("Replacing labels...")
-    repo = delete_default_labels(repo)
-    repo = create_new_labels(repo)
+    sync_labels(repo)
+    logger.info("Finished replacing labels")
     return repo
 
 
-def create_new_labels(repo) -> Repository:
-    logger.info("Creating new labels...")
-    for data in SEVERITY_DATA:
-        try:
-            repo.create_label(**data)
-        except Exception:
-            logger.warning(f"Issue creating label with data: {data}. Skipping...")
-    print("Finished creating new labels")
-    return repo
-
-
-def delete_default_labels(repo) -> Repository:
-    logger.info("Deleting default labels...")
-    for label_name in DEFAULT_LABELS:
-        try:
-            label = repo.get_label(label_name)
-            logger.info(f"Deleting {label}...")
-            label.delete()
-        except Exception:
-            logger.warn(f"Label {label} does not exist. Skipping...")
-    logger.info("Finished deleting default labels")
+def push_audit_refs(
+    repo, repo_path, auditors_list, commit_hash, credentials=None
+) -> Repository:
+    """
+    Publish the audit tag, auditor branches and report branch from the local
+    clone with a single `git push`, instead of one API call per ref.
+    """
+    logger.info("Pushing audit tag, auditor branches and report branch...")
+    # Like the manual fallback of create_audit_tag, the tag is a lightweight one
+    refspecs = [f"{commit_hash}:refs/tags/{AUDIT_TAG_NAME}"]
+    refspecs += [f"{commit_hash}:refs/heads/audit/{a}" for a in auditors_list]
+    refspecs.append(f"{commit_hash}:refs/heads/{REPORT_BRANCH_NAME}")
+
+    failed = []
+    for result in push_refs(repo_path, refspecs, credentials=credentials):
+        if result.ok:
+            logger.info(f"✅ {result}")
+        else:
+            logger.error(f"❌ {result}")
+            failed.append(result.ref)
+    if failed:
+        raise RuntimeError(f"Failed to push refs: {', '.join(failed)}")
     return repo
 
 
-def create_audit_tag(repo, repo_path, commit_hash) -> Repository:
+def create_audit_tag(repo, repo_path, commit_hash, credentials=None) -> Repository:
     logger.info("Creating audit tag...")
 
     try:
         tag = repo.create_git_tag(
-            tag="cyfrin-audit",
+            tag=AUDIT_TAG_NAME,
             message="Cyfrin audit tag",
             object=commit_hash,
             type="commit",
@@ -436,214 +735,183 @@ def create_audit_tag(repo, repo_path, commit_hash) -> Repository:
 
         try:
             # Create the tag at the specific commit hash
-            subprocess.run(["git", "-C", repo_path, "tag", "cyfrin-audit", commit_hash])
+            run_git(["tag", AUDIT_TAG_NAME, commit_hash], repo_path, check=True)
 
             # Push the tag to the remote repository
-            subprocess.run(["git", "-C", repo_path, "push", "origin", "cyfrin-audit"])
-        except GithubException as e:
-            logger.error(f"Error creating audit tag manually: {e}")
-            repo.delete()
-            exit()
+            run_git(
+                ["push", "origin", AUDIT_TAG_NAME], repo_path, credentials, check=True
+            )
+        except subprocess.CalledProcessError as e:
+            raise RuntimeError(f"Error creating audit tag manually: {e}") from e
     return repo
 
 
-def try_clone_repo(
-    target_organization: str,
+def create_audit_repo(
+    target_organization: str, target_repo_name: str, org_github_token: str
+) -> Repository:
+    github_org = get_organization(org_github_token, target_organization)
+    try:
+        repo = github_org.create_repo(target_repo_name, private=True)
+    except GithubException as e:
+        if e.status == 422:
+            raise RuntimeError(
+                f"{target_organization}/{target_repo_name} already exists. "
+                "Run `cyaudit setup --resume` to finish a setup that stopped part way."
+            ) from e
+        raise
+    AuditState().update(repo.full_name, **repo_fields(repo))
+    return remember_repo(org_github_token, repo)
+
+
+def clone_and_push_source(
+    repo: Repository,
+    organization: str,
     target_repo_name: str,
     source_repo_name: str,
     source_username: str,
     repo_path: str,
     commit_hash: str,
     personal_github_token: str,
-    org_github_token: str | None = None,
+    org_github_token: str,
+    clone_strategy: str = "full",
+    reference: Path | None = None,
+    branch: str | None = None,
 ) -> Repository:
-    if org_github_token is None:
-        org_github_token = personal_github_token
-    org_github_object = Github(org_github_token)
-    github_org = org_github_object.get_organization(target_organization)
-    repo = None
-    try:
-        print(f"Checking whether {target_repo_name} already exists...")
-        git_command = [
-            "git",
-            "ls-remote",
-            "-h",
-            f"https://{org_github_token}@github.com/{target_organization}/{target_repo_name}",
-        ]
+    """Clone the client's repo and publish the branch holding the commit as main."""
+    source_url = github_url(f"{source_username}/{source_repo_name}")
+    audit_url = github_url(f"{organization}/{target_repo_name}")
+    # Each token is only sent to its own repo
+    source = credentials_for(source_url, personal_github_token)
+    both = {**source, **credentials_for(audit_url, org_github_token)}
+
+    print(f"Cloning {source_repo_name} ({clone_strategy} clone)...")
+    clone_source(
+        source_url, repo_path, clone_strategy, reference, personal_github_token
+    )
+    ensure_commit(repo_path, commit_hash, credentials=source)
+
+    branch = resolve_commit_branch(
+        repo_path,
+        commit_hash,
+        get_github(personal_github_token),
+        f"{source_username}/{source_repo_name}",
+        branch,
+    )
 
-        result = subprocess.run(
-            git_command,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+    if branch is None:
+        # The commit may not be on any branch at all, or only on branches
+        # too old to be checked: publish the commit itself as main
+        logger.warning(
+            f"Commit {commit_hash} is not on a known branch, pushing it as {MAIN_BRANCH_NAME}. "
+            "Pass --branch to publish the branch holding it instead"
+        )
+        branch = MAIN_BRANCH_NAME
+        run_git(["checkout", "-B", branch, commit_hash], repo_path, source, check=True)
+    else:
+        fetch_branch(repo_path, branch, credentials=source)
+        if not is_ancestor(repo_path, commit_hash, f"{SOURCE_REMOTE}/{branch}"):
+            raise RuntimeError(f"Commit {commit_hash} is not on branch {branch}")
+        logger.info(f"Publishing branch {branch} as {MAIN_BRANCH_NAME}")
+        # Checkout the branch containing the commit hash
+        run_git(
+            ["checkout", "-B", branch, f"{SOURCE_REMOTE}/{branch}"],
+            repo_path,
+            source,
             check=True,
         )
-        if result.returncode == 0:
-            logger.error(f"{target_organization}/{target_repo_name} already exists.")
-            exit()
-        elif result.returncode == 128:
-            repo = create_and_clone_repo(
-                github_org,
-                target_organization,
-                target_repo_name,
-                source_repo_name,
-                source_username,
-                repo_path,
-                commit_hash,
-                personal_github_token,
-                org_github_token=org_github_token,
-            )
-    except subprocess.CalledProcessError as e:
-        if e.returncode == 128:
-            repo = create_and_clone_repo(
-                github_org,
-                target_organization,
-                target_repo_name,
-                source_repo_name,
-                source_username,
-                repo_path,
-                commit_hash,
-                personal_github_token,
-                org_github_token=org_github_token,
-            )
-        else:
-            # Handle other errors or exceptions as needed
-            logger.error(f"Error checking if repository exists: {e}")
-            exit()
 
-    if repo is None:
-        logger.error("Error creating repo.")
-        exit()
+    # The audit repo becomes origin, the client's repo stays available as source
+    run_git(["remote", "add", "origin", audit_url], repo_path, check=True)
+
+    # Push the branch to the remote audit repository as 'main'
+    run_git(
+        ["push", "-u", "origin", f"{branch}:{MAIN_BRANCH_NAME}"],
+        repo_path,
+        both,
+        check=True,
+    )
     return repo
 
 
-def create_and_clone_repo(
-    github_org: Organization,
+def clone_audit_repo(
     organization: str,
     target_repo_name: str,
-    source_repo_name: str,
-    source_username: str,
     repo_path: str,
-    commit_hash: str,
-    personal_github_token: str,
-    org_github_token: str | None = None,
-) -> Repository:
-    if org_github_token is None:
-        org_github_token = personal_github_token
-    try:
-        repo = github_org.create_repo(target_repo_name, private=True)
-    except GithubException as e:
-        logger.error(f"Error creating remote repository: {e}")
-        exit()
-
-    try:
-        print(f"Cloning {source_repo_name}...")
-        subprocess.run(
-            [
-                "git",
-                "clone",
-                f"https://{personal_github_token}@github.com/{source_username}/{source_repo_name}.git",
-                repo_path,
-            ],
-            check=False,
+    org_github_token: str,
+    reference: Path | None = None,
+) -> None:
+    """Clone the audit repo itself, for resumed setups whose clone of the source is gone."""
+    logger.info(f"Cloning {organization}/{target_repo_name}...")
+    url = github_url(f"{organization}/{target_repo_name}")
+    reference_args = ["--reference", str(reference)] if reference else []
+    with limits.git_clone():
+        run_git(
+            ["clone", *reference_args, url, repo_path],
+            credentials=credentials_for(url, org_github_token),
+            check=True,
         )
 
-    except GithubException as e:
-        logger.error(f"Error cloning repository: {e}")
-        repo.delete()
-        exit()
 
+def verify_refs(repo: Repository, refs: List[str]) -> Repository.Repository | None:
+    """The repo if all `refs` exist in it, else None."""
     try:
-        subprocess.run(["git", "-C", repo_path, "fetch", "origin"], check=False)
+        existing = {ref.ref for ref in own_connection(repo).get_git_refs()}
+    except GithubException:
+        return None
+    return repo if all(ref in existing for ref in refs) else None
 
-        # Identify the branch containing the commit using `git branch --contains`
-        completed_process = subprocess.run(
-            ["git", "-C", repo_path, "branch", "-r", "--contains", commit_hash],
-            text=True,
-            capture_output=True,
-            check=True,
-        )
 
-        filtered_branches = [
-            b
-            for b in completed_process.stdout.strip().split("\n")
-            if "origin/HEAD ->" not in b
-        ]
-        branches = [b.split("/", 1)[1] for b in filtered_branches]
+def verify_file(
+    repo: Repository, path: str, ref: str | None = None
+) -> Repository.Repository | None:
+    """The repo if `path` exists in it, on branch `ref` if given, else None."""
+    try:
+        own_connection(repo).get_contents(path, ref=ref or NotSet)
+    except GithubException:
+        return None
+    return repo
 
-        if not branches:
-            raise Exception(f"Commit {commit_hash} not found in any branch")
 
-        if len(branches) > 1:
-            # Prompt the user to choose the branch
-            print("The commit is found on multiple branches:")
-            for i, branch in enumerate(branches):
-                print(f"{i+1}. {branch}")
+def find_repo(github_token: str, full_name: str) -> Repository.Repository | None:
+    try:
+        return get_repo(github_token, full_name)
+    except GithubException:
+        return None
 
-            while True:
-                try:
-                    branch_index = int(
-                        input("Enter the number of the branch to create the tag: ")
-                    )
-                    if branch_index < 1 or branch_index > len(branches):
-                        raise ValueError("Invalid branch index")
-                    branch = branches[branch_index - 1]
-                    break
-                except ValueError:
-                    print("Invalid branch index. Please enter a valid index.")
-        else:
-            branch = branches[0]
-
-        # Fetch the branch containing the commit hash
-        subprocess.run(
-            [
-                "git",
-                "-C",
-                repo_path,
-                "fetch",
-                "origin",
-                branch + ":refs/remotes/origin/" + branch,
-            ],
-            check=False,
-        )
 
-        # Checkout the branch containing the commit hash
-        subprocess.run(["git", "-C", repo_path, "checkout", branch], check=False)
-
-        # Update the origin remote
-        subprocess.run(
-            [
-                "git",
-                "-C",
-                repo_path,
-                "remote",
-                "set-url",
-                "origin",
-                f"https://{org_github_token}@github.com/{organization}/{target_repo_name}.git",
-            ],
-            check=False,
-        )
+def resolve_commit_branch(
+    repo_path: str,
+    commit_hash: str,
+    github: Github,
+    source_full_name: str,
+    branch: str | None = None,
+) -> str | None:
+    """
+    Find the branch of the source repo to publish as the audit repo's main.
 
-        # Push the branch to the remote audit repository as 'main'
-        # subprocess.run(f"git -C {repo_path} push -u origin {branch}:{MAIN_BRANCH_NAME}")
-        subprocess.run(
-            [
-                "git",
-                "-C",
-                repo_path,
-                "push",
-                "-u",
-                "origin",
-                f"{branch}:{MAIN_BRANCH_NAME}",
-            ],
-            check=False,
-        )
+    An explicit `branch` wins. Otherwise GitHub is asked whether the default
+    branch contains the commit, or which branches point at it, and only when
+    that fails are the clone's branches searched. Never prompts, so setup can
+    run unattended.
 
+    Returns:
+        The branch name, or None if no branch holding the commit was found.
+    """
+    if branch:
+        return branch
+    try:
+        source_repo = github.get_repo(source_full_name)
+        default = source_repo.default_branch
+        comparison = source_repo.compare(default, commit_hash)
+        if comparison.status in ("behind", "identical"):
+            return default
+        heads = source_repo.get_commit(commit_hash).get_branches_where_head()
+        if heads:
+            return heads[0].name
     except Exception as e:
-        logger.error(f"Error extracting branch of commit hash: {e}")
-        repo.delete()
-        exit()
-
-    return repo
+        # Only a shortcut: the clone can always answer, if more slowly
+        logger.debug(f"Could not find the commit's branch through the API: {e}")
+    return find_branch_containing(repo_path, commit_hash)
 
 
 def prompt_for_missing(
@@ -741,16 +1009,13 @@ def prompt_for_missing(
 
 
 def add_issue_template_to_repo(repo) -> Repository:
-    # Get the existing finding.md file, if it exists
-    try:
-        finding_file = repo.get_contents(".github/ISSUE_TEMPLATE/finding.md")
-    except GithubException:
-        finding_file = None
-
-    # If finding.md already exists, leave it be. Otherwise, create the file.
-    if finding_file is None:
-        repo.create_file(
-            ".github/ISSUE_TEMPLATE/finding.md", "finding.md", ISSUE_TEMPLATE
+    # If finding.md already exists, leave it be. Otherwise, commit the file.
+    if verify_file(repo, ISSUE_TEMPLATE_PATH) is None:
+        commit_files(
+            repo,
+            MAIN_BRANCH_NAME,
+            [TreeFile(ISSUE_TEMPLATE_PATH, ISSUE_TEMPLATE.encode())],
+            "Add finding issue template",
         )
     return repo
 
@@ -5,10 +5,10 @@ from pathlib import Path
 
 import tomli_w
 import tomllib
-from github import Github
 
 from cyaudit.config import load_config
 from cyaudit.constants import REPORT_FOLDER
+from cyaudit.github_client import get_audit_repo
 from cyaudit.logging import logger
 from cyaudit.utils.create_report import fetch_issues, generate_markdown_from_issues
 
@@ -48,9 +48,10 @@ def source_command():
     update_summary_information(source_url, commit_hash, project_title)
     if org_github_token is None:
         org_github_token = personal_github_token
-    g = Github(org_github_token)
-    github_repo = g.get_repo(target_organization + "/" + target_repo_name)
-    issues_dict, summary_of_findings = fetch_issues(github_repo, g)
+    github_repo = get_audit_repo(
+        org_github_token, target_organization + "/" + target_repo_name
+    )
+    issues_dict, summary_of_findings = fetch_issues(github_repo)
     generate_markdown_from_issues(issues_dict, summary_of_findings)
     # update severity count
 
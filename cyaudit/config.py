@@ -1,11 +1,14 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Tuple
 
 import tomllib
-from github import Organization, Repository
+from github import Organization, Repository, UnknownObjectException
 
 from cyaudit.constants import DEFAULT_REPO_PERMISSION
+from cyaudit.github_client import get_teams, own_connection
+from cyaudit.state import AuditState
 
 
 def load_config() -> Tuple[str, str, str, list[str], str, str, str, str, str]:
@@ -36,30 +39,71 @@ def load_config() -> Tuple[str, str, str, list[str], str, str, str, str, str]:
     with open(config_path, "rb") as f:
         config = tomllib.load(f)
 
-    def substitute_env_vars(value: str) -> str:
-        """Replace $VAR or ${VAR} with environment variable values."""
-        if not isinstance(value, str):
-            return value
-
-        if value.startswith("$"):
-            # Handle both $VAR and ${VAR} formats
-            env_var = value[1:] if not value.startswith("${") else value[2:-1]
-            if env_var not in os.environ:
-                raise ValueError(f"Environment variable not found: {env_var}")
-            return os.environ[env_var]
-        if value == "":
-            return None
+    return parse_config_table(config.get("cyaudit", {}))
+
+
+def load_batch_config(path: str | Path) -> dict[str, tuple]:
+    """
+    Load a batch manifest, where every table describes one audit with the
+    fields of the [cyaudit] table of cyaudit.toml.
+
+    Returns:
+        The parsed config of every audit, keyed by table name, in file order.
+
+    Raises:
+        FileNotFoundError: If the manifest doesn't exist
+        ValueError: If the manifest has no audit tables, or environment
+            variable substitution fails
+    """
+    config_path = Path(path)
+    if not config_path.exists():
+        raise FileNotFoundError(f"Batch manifest not found: {config_path}")
+
+    with open(config_path, "rb") as f:
+        config = tomllib.load(f)
+
+    audits = {
+        name: parse_config_table(table)
+        for name, table in config.items()
+        if isinstance(table, dict)
+    }
+    if not audits:
+        raise ValueError(f"No audits found in {config_path}")
+    return audits
+
+
+def substitute_env_vars(value: str) -> str:
+    """Replace $VAR or ${VAR} with environment variable values."""
+    if not isinstance(value, str):
         return value
 
-    cyaudit_config = config.get("cyaudit", {})
+    if value.startswith("$"):
+        # Handle both $VAR and ${VAR} formats
+        env_var = value[1:] if not value.startswith("${") else value[2:-1]
+        if env_var not in os.environ:
+            raise ValueError(f"Environment variable not found: {env_var}")
+        return os.environ[env_var]
+    if value == "":
+        return None
+    return value
+
+
+def env_github_token() -> str | None:
+    """The org token from the environment, or else the personal one."""
+    return os.getenv("CYAUDIT_ORG_GITHUB_TOKEN") or os.getenv(
+        "CYAUDIT_PERSONAL_GITHUB_TOKEN"
+    )
+
 
+def parse_config_table(cyaudit_config: dict) -> tuple:
+    """Read the fields of one audit from a config table, see load_config."""
     # Extract and process each value with defaults
     source_url = substitute_env_vars(cyaudit_config.get("source_url", None))
     target_repo_name = substitute_env_vars(cyaudit_config.get("target_repo_name", None))
     target_organization = substitute_env_vars(
         cyaudit_config.get("target_organization", None)
     )
-    auditors = [substitute_env_vars(a) for a in cyaudit_config.get("auditors", None)]
+    auditors = [substitute_env_vars(a) for a in cyaudit_config.get("auditors") or []]
     commit_hash = substitute_env_vars(cyaudit_config.get("commit_hash", None))
     personal_github_token = os.getenv("CYAUDIT_PERSONAL_GITHUB_TOKEN")
     org_github_token = os.getenv("CYAUDIT_ORG_GITHUB_TOKEN")
@@ -94,38 +138,59 @@ def give_access_to_users_and_teams(
     g_org: Organization,
     users: List[str] | None,
     team_names: List[str],
-) -> None:
+    max_workers: int = 8,
+) -> list[str]:
     """
-    Give repository access to specified users and teams
+    Give repository access to specified users and teams, with concurrent API
+    calls.
 
     Args:
         repo: The GitHub repository to give access to
         organization: The GitHub organization
         users: List of GitHub usernames to give access to
         team_names: List of team names to give access to
+
+    Returns:
+        A message for every user or team that didn't get access.
     """
+    errors = []
     try:
-        if users:
-            for username in users:
-                try:
-                    repo.add_to_collaborators(username, permission="push")
-                    print(f"✅ Gave access to user: {username}")
-                except Exception as e:
-                    print(f"❌ Failed to give access to user {username}: {e}")
-
-        if team_names:
-            teams = {team.name: team for team in g_org.get_teams()}
-            for team_name in team_names:
-                try:
-                    if team_name not in teams:
-                        print(f"❌ Team not found: {team_name}")
-                        continue
-
-                    team = teams[team_name]
-                    team.update_team_repository(repo, DEFAULT_REPO_PERMISSION)
-                    print(f"✅ Gave access to team: {team_name}")
-                except Exception as e:
-                    print(f"❌ Failed to give access to team {team_name}: {e}")
-
+        teams = get_teams(g_org, team_names) if team_names else {}
     except Exception as e:
-        print(f"❌ Error giving access: {e}")
+        teams = None
+        errors.append(f"❌ Error looking up teams: {e}")
+
+    def give_user(username: str) -> None:
+        own_connection(repo).add_to_collaborators(username, permission="push")
+        print(f"✅ Gave access to user: {username} ({repo.full_name})")
+
+    def give_team(team_name: str) -> None:
+        team = own_connection(teams[team_name])
+        try:
+            team.update_team_repository(repo, DEFAULT_REPO_PERMISSION)
+        except UnknownObjectException:
+            # The recorded team may be gone, look it up again next time
+            AuditState().forget(g_org.login, "teams", team_name)
+            raise
+        print(f"✅ Gave access to team: {team_name} ({repo.full_name})")
+
+    tasks = [(give_user, f"user {username}", username) for username in users or []]
+    for team_name in team_names or []:
+        if teams is None:
+            break
+        if team_name in teams:
+            tasks.append((give_team, f"team {team_name}", team_name))
+        else:
+            errors.append(f"❌ Team not found: {team_name}")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(executor.submit(task, arg), what) for task, what, arg in tasks]
+        for future, what in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(
+                    f"❌ Failed to give {what} access to {repo.full_name}: {e}"
+                )
+    for error in errors:
+        print(error)
+    return errors
@@ -3,6 +3,9 @@ MAIN_BRANCH_NAME = "main"
 SUBTREE_URL = "https://github.com/Cyfrin/report-generator-template.git"
 SUBTREE_NAME = "report-generator-template"
 REPORT_FOLDER = "cyfrin-report"
+AUDIT_TAG_NAME = "cyfrin-audit"
+SUMMARY_TOML_PATH = f"{REPORT_FOLDER}/source/summary_information.toml"
+ISSUE_TEMPLATE_PATH = ".github/ISSUE_TEMPLATE/finding.md"
 GITHUB_WORKFLOW_ACTION_NAME = "generate-report"
 TEMPLATE_PROJECT_ID = "5"
 CONFIG_FILE_NAME = "cyaudit.toml"
@@ -71,3 +74,25 @@ SEVERITY_DATA = [
     {"name": "Report Status: Resolved", "color": "0E8A16"},
     {"name": "Report Status: Closed", "color": "bfdadc"},
 ]
+
+CACHE_LOCATION = "~/.cyaudit/cache"
+CACHE_DIR_ENV_VAR = "CYAUDIT_CACHE_DIR"
+CACHE_MAX_SIZE_ENV_VAR = "CYAUDIT_CACHE_MAX_SIZE_MB"
+DEFAULT_CACHE_MAX_SIZE_MB = 1024
+
+MIRRORS_LOCATION = "~/.cyaudit/mirrors"
+MIRRORS_DIR_ENV_VAR = "CYAUDIT_MIRRORS_DIR"
+MIRRORS_MAX_SIZE_ENV_VAR = "CYAUDIT_MIRRORS_MAX_SIZE_MB"
+DEFAULT_MIRRORS_MAX_SIZE_MB = 10240
+DEFAULT_MIRROR_MAX_AGE_DAYS = 90
+
+# Limits of `cyaudit setup --batch`
+DEFAULT_MAX_PARALLEL_AUDITS = 4
+DEFAULT_MAX_GITHUB_CALLS = 8
+DEFAULT_MAX_CLONES = 2
+
+JOURNAL_LOCATION = "~/.cyaudit/journal"
+STATE_LOCATION = "~/.cyaudit/state.json"
+STATE_MAX_AGE_DAYS = 30
+# Teams are renamed or deleted more often than repos, so they are looked up again sooner
+TEAM_CACHE_TTL_HOURS = 24
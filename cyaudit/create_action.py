@@ -1,12 +1,10 @@
-from github import GithubException, Repository
+def workflow_path(workflow_name: str) -> str:
+    return f".github/workflows/{workflow_name}.yml"
 
 
-def create_action(
-    repo: Repository, workflow_name, generator_path, branch_name, datetime
-):
-    try:
-        # Define the contents of the workflow file
-        workflow_contents = f"""name: {workflow_name}
+def workflow_contents(workflow_name, generator_path, branch_name, datetime) -> str:
+    """Contents of the workflow that generates the report on every push to `branch_name`."""
+    return f"""name: {workflow_name}
 
 on:
   push:
@@ -22,16 +20,3 @@ jobs:
       # currently, this will be the date at which the tool is initially run (so leave blank for now and use action default)
       # time: {datetime}
 """
-        # Create a new file in the .github/workflows directory with the workflow contents
-        repo.create_file(
-            path=f".github/workflows/{workflow_name}.yml",
-            message=f"Add {workflow_name} GitHub Action workflow",
-            content=workflow_contents,
-            branch=branch_name,
-        )
-
-        print(f"Successfully added {workflow_name} workflow to {repo.name} repository!")
-
-    except GithubException as e:
-        print(f"Failed to add {workflow_name} workflow to {repo.name} repository.")
-        print(e)
@@ -0,0 +1,74 @@
+import base64
+import hashlib
+from dataclasses import dataclass
+from importlib import resources
+from importlib.resources.abc import Traversable
+from typing import Iterator, List
+
+from github import InputGitTreeElement, Repository
+from github.GitCommit import GitCommit
+
+from cyaudit.logging import logger
+
+FILE_MODE = "100644"
+
+
+@dataclass
+class TreeFile:
+    path: str
+    content: bytes
+    mode: str = FILE_MODE
+
+
+def _walk(directory: Traversable, prefix: str) -> Iterator[TreeFile]:
+    for entry in sorted(directory.iterdir(), key=lambda e: e.name):
+        path = f"{prefix}/{entry.name}"
+        if entry.is_dir():
+            if entry.name != "__pycache__":
+                yield from _walk(entry, path)
+        else:
+            yield TreeFile(path, entry.read_bytes())
+
+
+def template_files(destination: str) -> List[TreeFile]:
+    """The files of the bundled report template, placed under `destination`."""
+    return list(_walk(resources.files("cyaudit") / "report_template", destination))
+
+
+def commit_files(
+    repo: Repository, branch: str, files: List[TreeFile], message: str
+) -> GitCommit:
+    """
+    Add `files` to `branch` in a single commit, through the Git Data API.
+
+    Text files are sent inline in the tree; binary files are uploaded as
+    base64 blobs first, once per distinct content. No working copy is needed.
+    """
+    ref = repo.get_git_ref(f"heads/{branch}")
+    parent = repo.get_git_commit(ref.object.sha)
+
+    blobs: dict[str, str] = {}
+    elements = []
+    for file in files:
+        try:
+            text = file.content.decode("utf-8")
+        except UnicodeDecodeError:
+            digest = hashlib.sha256(file.content).hexdigest()
+            if digest not in blobs:
+                blob = repo.create_git_blob(
+                    base64.b64encode(file.content).decode(), "base64"
+                )
+                blobs[digest] = blob.sha
+            elements.append(
+                InputGitTreeElement(file.path, file.mode, "blob", sha=blobs[digest])
+            )
+        else:
+            elements.append(
+                InputGitTreeElement(file.path, file.mode, "blob", content=text)
+            )
+
+    tree = repo.create_git_tree(elements, base_tree=parent.tree)
+    commit = repo.create_git_commit(message, tree, [parent])
+    ref.edit(commit.sha)
+    logger.debug(f"Committed {len(files)} files to {branch} as {commit.sha}")
+    return commit
@@ -0,0 +1,337 @@
+import base64
+import os
+import subprocess
+from dataclasses import dataclass
+from pathlib import Path
+
+from cyaudit import limits
+from cyaudit.logging import logger
+
+# Flags of `git push --porcelain` that mean the ref was not updated
+PUSH_FAILURE_FLAGS = {"!"}
+PUSH_FLAG_MEANINGS = {
+    " ": "updated",
+    "+": "forced update",
+    "-": "deleted",
+    "*": "created",
+    "!": "rejected",
+    "=": "up to date",
+}
+
+# Name of the client's remote in audit clones; `origin` is the audit repo
+SOURCE_REMOTE = "source"
+# Extra `git clone` flags of each clone strategy. Every strategy keeps the
+# full history and contents of what it clones: shallow clones can't be pushed
+# to an empty repo, and partial (blobless or treeless) clones would download
+# everything they skipped, one lazy fetch at a time, during that push.
+CLONE_STRATEGIES = {"full": [], "single-branch": ["--single-branch", "--no-tags"]}
+# Branches checked locally for the audited commit, most recently updated first
+MAX_BRANCHES_TO_CHECK = 50
+
+
+def github_url(full_name: str) -> str:
+    """HTTPS URL of a GitHub repo, as used for its remote and its credentials."""
+    return f"https://github.com/{full_name}.git"
+
+
+def credentials_for(url: str, token: str | None) -> dict[str, str]:
+    """Credentials sending `token` to `url` only, none without a token."""
+    return {url: token} if token else {}
+
+
+def git_env(credentials: dict[str, str] | None = None) -> dict[str, str]:
+    """
+    Environment of a git command authenticating to each URL of `credentials`
+    with its token.
+
+    Every token is sent as an `http.<url>.extraHeader` set through the
+    GIT_CONFIG_COUNT variables, so it applies to this one command and only to
+    requests to its own repo: nothing is written to the global config, the
+    repo's config or its remote URLs, concurrent commands can use different
+    tokens, and a command talking to two repos, like a push from a partial
+    clone fetching missing objects from the client's repo, uses the right
+    token for each. Git never prompts for credentials, a missing or bad token
+    makes the command fail instead.
+    """
+    env = {**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+    index = int(env.get("GIT_CONFIG_COUNT", "0"))
+    for url, token in (credentials or {}).items():
+        basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        env[f"GIT_CONFIG_KEY_{index}"] = f"http.{url}.extraHeader"
+        env[f"GIT_CONFIG_VALUE_{index}"] = f"Authorization: Basic {basic}"
+        index += 1
+    env["GIT_CONFIG_COUNT"] = str(index)
+    return env
+
+
+def run_git(
+    args: list[str],
+    repo_path: str | Path | None = None,
+    credentials: dict[str, str] | None = None,
+    **kwargs,
+) -> subprocess.CompletedProcess:
+    """Run `git <args>`, in `repo_path` if given, with `credentials` by URL."""
+    location = ["-C", str(repo_path)] if repo_path is not None else []
+    return subprocess.run(["git", *location, *args], env=git_env(credentials), **kwargs)
+
+
+@dataclass
+class PushResult:
+    ref: str
+    flag: str
+    summary: str
+
+    @property
+    def ok(self) -> bool:
+        return self.flag not in PUSH_FAILURE_FLAGS
+
+    def __str__(self) -> str:
+        status = PUSH_FLAG_MEANINGS.get(self.flag, self.flag)
+        return f"{self.ref}: {status} ({self.summary})"
+
+
+def parse_push_porcelain(output: str) -> list[PushResult]:
+    """
+    Parse the output of `git push --porcelain`.
+
+    Each ref is reported on a line of the form `<flag>\\t<from>:<to>\\t<summary>`.
+    """
+    results = []
+    for line in output.splitlines():
+        parts = line.split("\t")
+        if len(parts) != 3 or len(parts[0]) != 1:
+            continue
+        flag, refspec, summary = parts
+        results.append(PushResult(refspec.split(":")[-1], flag, summary))
+    return results
+
+
+def push_refs(
+    repo_path: str,
+    refspecs: list[str],
+    remote: str = "origin",
+    credentials: dict[str, str] | None = None,
+) -> list[PushResult]:
+    """
+    Publish several refs in a single `git push`, over one connection.
+
+    Returns:
+        The result of every ref. Rejected refs don't stop the others.
+    """
+    logger.debug(f"Pushing {len(refspecs)} refs to {remote}")
+    result = run_git(
+        ["push", "--porcelain", remote, *refspecs],
+        repo_path,
+        credentials,
+        capture_output=True,
+        text=True,
+    )
+    results = parse_push_porcelain(result.stdout)
+    if not results and result.returncode != 0:
+        raise RuntimeError(f"git push failed: {result.stderr.strip()}")
+    return results
+
+
+def clone_source(
+    url: str,
+    repo_path: str,
+    strategy: str = "full",
+    reference: str | Path | None = None,
+    token: str | None = None,
+) -> None:
+    """
+    Clone the client's repo into `repo_path` with the remote named `source`.
+
+    With a `reference` repo, objects it already has are borrowed through
+    alternates instead of being downloaded.
+    """
+    if strategy not in CLONE_STRATEGIES:
+        raise ValueError(f"Unknown clone strategy: {strategy}")
+    reference_args = ["--reference", str(reference)] if reference else []
+    with limits.git_clone():
+        run_git(
+            [
+                "clone",
+                "--origin",
+                SOURCE_REMOTE,
+                *CLONE_STRATEGIES[strategy],
+                *reference_args,
+                url,
+                repo_path,
+            ],
+            credentials=credentials_for(url, token),
+            check=True,
+        )
+
+
+def clone_sparse_branch(
+    url: str, repo_path: str, branch: str, folder: str, token: str | None = None
+) -> None:
+    """
+    Clone the tip of `branch` only, with nothing but `folder` and the files
+    at the root checked out.
+
+    The clone is single-branch and of depth 1, so it downloads one commit.
+    It isn't a partial clone: switching to a branch added later with
+    `fetch_branches` needs no further download, and no credentials.
+    """
+    with limits.git_clone():
+        run_git(
+            [
+                "clone",
+                "--single-branch",
+                "--branch",
+                branch,
+                "--depth",
+                "1",
+                "--sparse",
+                url,
+                repo_path,
+            ],
+            credentials=credentials_for(url, token),
+            check=True,
+        )
+        run_git(["sparse-checkout", "set", folder], repo_path, check=True)
+
+
+def fetch_branches(
+    repo_path: str,
+    pattern: str,
+    remote: str = "origin",
+    credentials: dict[str, str] | None = None,
+) -> None:
+    """
+    Start tracking the branches of `remote` matching `pattern`, e.g.
+    `audit/*`, in a single-branch clone, and fetch their tips.
+    """
+    run_git(["remote", "set-branches", "--add", remote, pattern], repo_path, check=True)
+    with limits.git_clone():
+        run_git(["fetch", "--depth", "1", remote], repo_path, credentials, check=True)
+
+
+def has_commit(repo_path: str, commit_hash: str) -> bool:
+    result = run_git(
+        ["cat-file", "-e", f"{commit_hash}^{{commit}}"], repo_path, capture_output=True
+    )
+    return result.returncode == 0
+
+
+def ensure_commit(
+    repo_path: str,
+    commit_hash: str,
+    remote: str = SOURCE_REMOTE,
+    credentials: dict[str, str] | None = None,
+) -> None:
+    """
+    Make sure the clone has `commit_hash`, fetching it on its own if no cloned
+    branch contains it.
+
+    Raises:
+        RuntimeError: If the remote doesn't have the commit either.
+    """
+    if has_commit(repo_path, commit_hash):
+        return
+    logger.info(f"Commit {commit_hash} is not on a cloned branch, fetching it...")
+    run_git(
+        ["fetch", "--no-tags", remote, commit_hash],
+        repo_path,
+        credentials,
+        capture_output=True,
+    )
+    if not has_commit(repo_path, commit_hash):
+        raise RuntimeError(f"Commit {commit_hash} not found in {remote}")
+
+
+def default_branch(repo_path: str, remote: str = SOURCE_REMOTE) -> str | None:
+    """The branch `<remote>/HEAD` points to, as recorded by the clone."""
+    result = run_git(
+        ["symbolic-ref", "--short", f"refs/remotes/{remote}/HEAD"],
+        repo_path,
+        text=True,
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip().removeprefix(f"{remote}/")
+
+
+def remote_url(repo_path: str | Path, remote: str = "origin") -> str | None:
+    """The URL `remote` fetches from, as configured in the clone."""
+    result = run_git(
+        ["remote", "get-url", remote], repo_path, text=True, capture_output=True
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def is_ancestor(repo_path: str, commit_hash: str, ref: str) -> bool:
+    result = run_git(
+        ["merge-base", "--is-ancestor", commit_hash, ref],
+        repo_path,
+        capture_output=True,
+    )
+    return result.returncode == 0
+
+
+def fetch_branch(
+    repo_path: str,
+    branch: str,
+    remote: str = SOURCE_REMOTE,
+    credentials: dict[str, str] | None = None,
+) -> None:
+    """Fetch `branch` if the clone doesn't have it, as single-branch clones."""
+    ref = f"refs/remotes/{remote}/{branch}"
+    exists = run_git(
+        ["rev-parse", "--verify", "--quiet", ref], repo_path, capture_output=True
+    )
+    if exists.returncode == 0:
+        return
+    run_git(
+        ["fetch", "--no-tags", remote, f"{branch}:{ref}"],
+        repo_path,
+        credentials,
+        check=True,
+    )
+
+
+def find_branch_containing(
+    repo_path: str,
+    commit_hash: str,
+    remote: str = SOURCE_REMOTE,
+    max_branches: int = MAX_BRANCHES_TO_CHECK,
+) -> str | None:
+    """
+    Find a branch of the clone that contains `commit_hash`.
+
+    Only the default branch and the most recently updated branches are
+    checked, in that order, so the answer stays fast on repos with hundreds
+    of branches. A commit-graph file is written first to speed up the
+    ancestry checks on deep histories.
+
+    Returns:
+        The first branch found, or None.
+    """
+    run_git(["commit-graph", "write", "--reachable"], repo_path, capture_output=True)
+    result = run_git(
+        [
+            "for-each-ref",
+            "--sort=-committerdate",
+            "--format=%(refname:strip=3)",
+            f"refs/remotes/{remote}/",
+        ],
+        repo_path,
+        text=True,
+        capture_output=True,
+        check=True,
+    )
+    branches = [b for b in result.stdout.split() if b != "HEAD"]
+    default = default_branch(repo_path, remote)
+    if default in branches:
+        branches.remove(default)
+        branches.insert(0, default)
+
+    for branch in branches[:max_branches]:
+        if is_ancestor(repo_path, commit_hash, f"{remote}/{branch}"):
+            return branch
+    return None
@@ -0,0 +1,388 @@
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, TypeVar
+
+import requests
+from github import Github, UnknownObjectException
+from github.GithubObject import GithubObject
+from github.Organization import Organization
+from github.Repository import Repository
+from github.Requester import (
+    HTTPRequestsConnectionClass,
+    HTTPSRequestsConnectionClass,
+    Requester,
+    RequestsResponse,
+)
+from github.Team import Team
+from gql import Client, GraphQLRequest
+from gql.transport.requests import RequestsHTTPTransport
+from graphql import DocumentNode, OperationDefinitionNode, OperationType
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from cyaudit.constants import TEAM_CACHE_TTL_HOURS
+from cyaudit.http_cache import CachedResponse, conditional_headers, get_http_cache
+from cyaudit.logging import logger
+from cyaudit.rate_limit import IDEMPOTENT_METHODS, scheduler
+from cyaudit.state import AuditState, repo_fields
+
+T = TypeVar("T", bound=GithubObject)
+V = TypeVar("V")
+
+GRAPHQL_URL = "https://api.github.com/graphql"
+POOL_SIZE = 32
+CONNECT_RETRIES = 2
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+_memo: dict[tuple, Any] = {}
+_memo_locks: dict[tuple, threading.Lock] = {}
+_memo_lock = threading.Lock()
+_memo_hits: Counter[str] = Counter()
+_pool_installed = False
+
+
+def shared_session(base_url: str) -> requests.Session:
+    """The session used for every request to ``base_url``, created on first use.
+
+    requests sessions are thread-safe for sending requests, so all clients and
+    threads share its keep-alive connections. Every response goes through the
+    rate limit scheduler; the adapter itself only retries failed connections,
+    which never reached GitHub.
+    """
+    with _sessions_lock:
+        session = _sessions.get(base_url)
+        if session is None:
+            session = requests.Session()
+            session.auth = Requester.noopAuth
+            adapter = HTTPAdapter(
+                max_retries=Retry(total=CONNECT_RETRIES, read=0, status=0),
+                pool_connections=POOL_SIZE,
+                pool_maxsize=POOL_SIZE,
+            )
+            session.mount("https://", adapter)
+            session.hooks["response"].append(scheduler.observe_response)
+            _sessions[base_url] = session
+        return session
+
+
+class PooledHTTPSConnection(HTTPSRequestsConnectionClass):
+    """PyGithub connection that sends its request through the shared session.
+
+    PyGithub creates one of these per request once the class is injected, so a
+    single client can be used from several threads.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int | None = None,
+        strict: bool = False,
+        timeout: int | None = None,
+        retry: Any = None,
+        pool_size: int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self.port = port if port else 443
+        self.host = host
+        self.protocol = "https"
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self.retry = retry
+        self.session = shared_session(f"https://{host}:{self.port}")
+
+    def getresponse(self) -> RequestsResponse | CachedResponse:
+        http_cache = None
+        if (
+            self.verb.upper() == "GET"
+            # Streamed downloads are never cached
+            and not getattr(self, "stream", False)
+            and "If-None-Match" not in self.headers
+            and "If-Modified-Since" not in self.headers
+        ):
+            http_cache = get_http_cache()
+        if http_cache is not None:
+            key, entry = http_cache.lookup(self.headers, f"{self.host}{self.url}")
+            if entry is not None:
+                self.headers = {**self.headers, **conditional_headers(entry)}
+        response = scheduler.send(
+            super().getresponse, idempotent=self.verb.upper() in IDEMPOTENT_METHODS
+        )
+        if http_cache is not None:
+            return http_cache.handle(key, entry, response)
+        return response
+
+    def close(self) -> None:
+        # The session outlives the request
+        pass
+
+
+class PooledGraphQLTransport(RequestsHTTPTransport):
+    """gql transport on the shared session, safe to use from several threads.
+
+    gql connects and closes the transport around every query, so connecting
+    only picks up the session and closing leaves it open.
+    """
+
+    def connect(self) -> None:
+        if self.session is None:
+            self.session = shared_session(GRAPHQL_URL)
+
+    def close(self) -> None:
+        pass
+
+    def execute(self, request: Any, *args: Any, **kwargs: Any):
+        # Queries can be sent again, mutations only by their journaled step
+        return scheduler.send(
+            lambda: super(PooledGraphQLTransport, self).execute(
+                request, *args, **kwargs
+            ),
+            idempotent=not is_mutation(request),
+        )
+
+
+def is_mutation(request: GraphQLRequest | DocumentNode) -> bool:
+    # gql 4 transports receive a GraphQLRequest, gql 3 the document itself
+    document = request if isinstance(request, DocumentNode) else request.document
+    return any(
+        isinstance(definition, OperationDefinitionNode)
+        and definition.operation == OperationType.MUTATION
+        for definition in document.definitions
+    )
+
+
+def use_connection_pool() -> None:
+    """Make every PyGithub client created from now on use the shared sessions."""
+    global _pool_installed
+    with _sessions_lock:
+        if not _pool_installed:
+            Requester.injectConnectionClasses(
+                HTTPRequestsConnectionClass, PooledHTTPSConnection
+            )
+            _pool_installed = True
+
+
+def memoized(key: tuple, compute: Callable[[], V]) -> V:
+    """Compute the value for ``key`` once per process.
+
+    Callers asking for the same key at the same time wait for the first one,
+    so concurrent audits never repeat a lookup. The first element of the key
+    names the kind of lookup in the debug stats.
+    """
+    with _memo_lock:
+        if key in _memo:
+            _memo_hits[key[0]] += 1
+            return _memo[key]
+        lock = _memo_locks.setdefault(key, threading.Lock())
+    with lock:
+        if key in _memo:
+            with _memo_lock:
+                _memo_hits[key[0]] += 1
+        else:
+            _memo[key] = compute()
+        return _memo[key]
+
+
+def get_github(github_token: str, lazy: bool = False) -> Github:
+    """The pooled client for ``github_token``, shared by every thread.
+
+    Objects from a lazy client cost no request until an attribute they
+    weren't created with is read.
+    """
+    use_connection_pool()
+    return memoized(
+        ("github", github_token, lazy), lambda: Github(github_token, lazy=lazy)
+    )
+
+
+def get_graphql_client(github_token: str) -> Client:
+    """The GraphQL client for ``github_token``, shared by every thread."""
+
+    def create() -> Client:
+        transport = PooledGraphQLTransport(
+            url=GRAPHQL_URL,
+            headers={"Authorization": f"Bearer {github_token}"},
+            use_json=True,
+        )
+        return Client(transport=transport, fetch_schema_from_transport=False)
+
+    return memoized(("graphql", github_token), create)
+
+
+def team_slug(name: str) -> str:
+    """The slug GitHub gives a team named ``name``."""
+    return re.sub(r"[^a-z0-9_]+", "-", name.lower()).strip("-")
+
+
+def get_teams(org: Organization, names: List[str]) -> dict[str, Team]:
+    """
+    The teams of ``org`` with the given names or slugs.
+
+    Teams looked up in the last TEAM_CACHE_TTL_HOURS are built from the
+    organization's team directory in the state file, without a request. The
+    others are fetched by slug, concurrently, and the organization's teams
+    are only listed for names whose slug GitHub doesn't know. Names that
+    match no team are left out.
+    """
+    state = AuditState()
+    directory = state.get(org.login).get("teams", {})
+    now = time.time()
+    fresh = {
+        name: record
+        for name, record in directory.items()
+        if now - record.get("checked_at", 0) < TEAM_CACHE_TTL_HOURS * 60 * 60
+    }
+    teams = {
+        name: Team(
+            org.requester,
+            {},
+            {
+                "id": fresh[name]["id"],
+                "slug": fresh[name]["slug"],
+                "name": fresh[name]["name"],
+                "url": f"{org.url}/teams/{fresh[name]['slug']}",
+                "organization": {"login": org.login, "url": org.url},
+            },
+            completed=False,
+        )
+        for name in names
+        if name in fresh
+    }
+    missing = [name for name in names if name not in teams]
+    if not missing:
+        return teams
+
+    def by_slug(name: str) -> Team | None:
+        try:
+            return own_connection(org).get_team_by_slug(team_slug(name))
+        except UnknownObjectException:
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(len(missing), 8)) as executor:
+        found = {
+            name: team
+            for name, team in zip(missing, executor.map(by_slug, missing))
+            if team is not None
+        }
+    unresolved = [name for name in missing if name not in found]
+    if unresolved:
+        org_teams = get_org_teams(org)
+        found.update(
+            {name: org_teams[name] for name in unresolved if name in org_teams}
+        )
+    teams.update(found)
+    if found:
+        state.update_dict(
+            org.login,
+            "teams",
+            {
+                name: {
+                    "id": team.id,
+                    "slug": team.slug,
+                    "name": team.name,
+                    "checked_at": now,
+                }
+                for name, team in found.items()
+            },
+        )
+    return teams
+
+
+def get_org_teams(org: Organization) -> dict[str, Team]:
+    """
+    The teams of ``org``, by name and by slug, listed once per process.
+    Listing paginates over every team, prefer ``get_teams`` for a few names.
+    """
+
+    def list_teams() -> dict[str, Team]:
+        teams = {}
+        for team in org.get_teams():
+            teams[team.name] = team
+            teams[team.slug] = team
+        return teams
+
+    return memoized(("teams", org.login.lower()), list_teams)
+
+
+def get_organization(github_token: str, login: str) -> Organization:
+    """The organization ``login``, fetched once per process and token."""
+    return memoized(
+        ("org", github_token, login.lower()),
+        lambda: get_github(github_token).get_organization(login),
+    )
+
+
+def get_repo(github_token: str, full_name: str) -> Repository:
+    """The repo ``full_name``, fetched once per process and token.
+
+    Lookups that fail aren't remembered, so a repo that didn't exist can be
+    looked up again after it is created.
+    """
+    return memoized(
+        ("repo", github_token, full_name.lower()),
+        lambda: get_github(github_token).get_repo(full_name),
+    )
+
+
+def get_audit_repo(github_token: str, full_name: str) -> Repository:
+    """
+    The audit repo ``full_name``.
+
+    Repos recorded in the state file are returned lazily, without a request;
+    others are fetched once and recorded.
+    """
+    state = AuditState()
+    if state.get(full_name).get("id"):
+        return get_github(github_token, lazy=True).get_repo(full_name)
+    repo = get_repo(github_token, full_name)
+    state.update(full_name, **repo_fields(repo))
+    return repo
+
+
+def remember_repo(github_token: str, repo: Repository) -> Repository:
+    """Let later ``get_repo`` calls reuse ``repo``, e.g. one just created."""
+    return memoized(("repo", github_token, repo.full_name.lower()), lambda: repo)
+
+
+def own_connection(obj: T) -> T:
+    """
+    Copy of a PyGithub object bound to a client of its own.
+
+    Without the connection pool a PyGithub client holds a single connection,
+    which can't be shared between threads. The copy is built from the
+    object's raw data, so it costs no request. With the pool, clients are
+    safe to share and the object is returned as is.
+    """
+    if _pool_installed:
+        return obj
+    github = Github(**obj.requester.kwargs)
+    return github.create_from_raw_data(type(obj), obj.raw_data)
+
+
+def log_client_stats() -> None:
+    """Log the HTTP connections opened and the lookups served from memory."""
+    with _sessions_lock:
+        sessions = dict(_sessions)
+    for base_url, session in sessions.items():
+        connections, requests_sent = 0, 0
+        for adapter in session.adapters.values():
+            pools = adapter.poolmanager.pools
+            for pool_key in pools.keys():
+                pool = pools[pool_key]
+                connections += pool.num_connections
+                requests_sent += pool.num_requests
+        logger.debug(
+            f"{base_url}: {requests_sent} requests over {connections} connections"
+        )
+    with _memo_lock:
+        hits = dict(_memo_hits)
+    reused = hits.pop("github", 0) + hits.pop("graphql", 0)
+    if reused:
+        logger.debug(f"{reused} GitHub clients reused")
+    if hits:
+        details = ", ".join(f"{kind}: {count}" for kind, count in sorted(hits.items()))
+        logger.debug(f"{sum(hits.values())} duplicate lookups avoided ({details})")
+    scheduler.log_stats()
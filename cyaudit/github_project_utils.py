@@ -1,43 +1,94 @@
 from github import Repository
 from gql import Client, gql
-from gql.transport.requests import RequestsHTTPTransport
+from gql.transport.exceptions import TransportQueryError
+
+from cyaudit.github_client import get_graphql_client, memoized
+from cyaudit.logging import logger
+from cyaudit.state import AuditState
+
+
+def get_template_project_node_id(
+    client: Client, organization: str, template_project_id: int
+) -> str | None:
+    """
+    Node id of the template project, or None if the organization has no such
+    project. Every audit copies the same one, so it is looked up once and
+    recorded in the state file under the organization.
+    """
+    query = gql(
+        """
+    query GetTemplateProject($owner: String!, $number: Int!) {
+        organization(login: $owner) {
+            projectV2(number: $number) {
+                id
+            }
+        }
+    }
+    """
+    )
+
+    def lookup() -> str | None:
+        recorded = AuditState().get(organization).get("template_projects", {})
+        if recorded.get(str(template_project_id)):
+            return recorded[str(template_project_id)]
+        response = client.execute(
+            query,
+            variable_values={"owner": organization, "number": template_project_id},
+        )
+        project = (response.get("organization") or {}).get("projectV2")
+        if not project:
+            return None
+        AuditState().update_dict(
+            organization, "template_projects", {str(template_project_id): project["id"]}
+        )
+        return project["id"]
+
+    return memoized(
+        ("template-project", organization.lower(), template_project_id), lookup
+    )
 
 
 def get_node_ids(
     client: Client, organization: str, target_repo_name: str, template_project_id: int
 ) -> tuple[str, str, str]:
+    """
+    Node ids of the audit repo, its owner and the template project. The
+    repo's ids are read from the state file when setup recorded them.
+    """
     query = gql(
         """
-    query GetNodeIds($owner: String!, $repo_name: String!, $project_number: Int!) {
+    query GetNodeIds($owner: String!, $repo_name: String!) {
         repository(owner: $owner, name: $repo_name) {
             id
             owner {
                 id
             }
         }
-        organization(login: $owner) {
-            projectV2(number: $project_number) {
-                id
-            }
-        }
     }
     """
     )
 
-    query_variables = {
-        "owner": organization,
-        "repo_name": target_repo_name,
-        "project_number": template_project_id,
-    }
+    query_variables = {"owner": organization, "repo_name": target_repo_name}
 
+    full_name = f"{organization}/{target_repo_name}"
     try:
-        response = client.execute(query, variable_values=query_variables)
-        repo_node_id = response["repository"]["id"]
-        org_node_id = response["repository"]["owner"]["id"]
-        project_node_id = response["organization"]["projectV2"]["id"]
-        # print(f"Node ID of the repository is: {repo_node_id}")
-        # print(f"Node ID of the owner is: {org_node_id}")
-        # print(f"Node ID of the project is: {project_node_id}")
+        recorded = AuditState().get(full_name)
+        repo_node_id = recorded.get("node_id")
+        org_node_id = recorded.get("owner_node_id")
+        if not repo_node_id or not org_node_id:
+            response = client.execute(query, variable_values=query_variables)
+            repo_node_id = response["repository"]["id"]
+            org_node_id = response["repository"]["owner"]["id"]
+            AuditState().update(
+                full_name, node_id=repo_node_id, owner_node_id=org_node_id
+            )
+        project_node_id = get_template_project_node_id(
+            client, organization, template_project_id
+        )
+        if not project_node_id:
+            raise Exception(
+                f"Template project {template_project_id} not found in {organization}"
+            )
         return repo_node_id, org_node_id, project_node_id
     except Exception as e:
         raise Exception(f"Error occurred while getting owner/repo node ids: {str(e)}")
@@ -76,88 +127,97 @@ def copy_project(
         )
         project_id = response["copyProjectV2"]["projectV2"]["id"]
         project_title = response["copyProjectV2"]["projectV2"]["title"]
-        print(
-            f'Project "{project_title}" has been created successfully with id {project_id}'
-        )
+        logger.info(f'Project "{project_title}" has been created with id {project_id}')
         return project_id
     except Exception as e:
         raise Exception(f"Error occurred while copying the template project: {str(e)}")
 
 
-def link_project_to_repo(client: Client, project_id: str, repo_node_id: str) -> str:
-    # GraphQL Mutation for linking a project to a repo
-    link_project_mutation = gql(
-        """
-        mutation LinkProjectV2ToRepository($input: LinkProjectV2ToRepositoryInput!) {
-            linkProjectV2ToRepository(input: $input) {
-                repository {
-                    __typename
-                }
+# Each mutation of FINISH_PROJECT_MUTATION by alias, as reported on failure
+FINISH_PROJECT_STEPS = {
+    "update": "updating the project board description",
+    "link": "linking the project to the repo",
+}
+FINISH_PROJECT_MUTATION = """
+    mutation FinishProject(
+        $update: UpdateProjectV2Input!
+        $link: LinkProjectV2ToRepositoryInput!
+    ) {
+        update: updateProjectV2(input: $update) {
+            projectV2 {
+                id
+            }
+        }
+        link: linkProjectV2ToRepository(input: $link) {
+            repository {
+                id
             }
         }
+    }
+"""
+
+
+def finish_project(
+    client: Client, target_repo_name: str, project_id: str, repo_node_id: str
+) -> list[str]:
     """
-    )
+    Make the copied project private, describe it and link it to the audit
+    repo, with both mutations in a single request.
 
-    # Variables for the mutation
-    link_mutation_variables = {
-        "input": {"projectId": project_id, "repositoryId": repo_node_id}
+    Returns:
+        A message for every mutation that failed.
+    """
+    variables = {
+        "update": {
+            "projectId": project_id,
+            "public": False,
+            "shortDescription": (
+                f"A collaborative board for the {target_repo_name} audit"
+            ),
+        },
+        "link": {"projectId": project_id, "repositoryId": repo_node_id},
     }
-
     try:
-        # Execute the mutation
-        client.execute(link_project_mutation, variable_values=link_mutation_variables)
-        print(f"Project with id {project_id} has been successfully linked to the repo.")
-        return project_id
+        client.execute(gql(FINISH_PROJECT_MUTATION), variable_values=variables)
+    except TransportQueryError as e:
+        return [
+            f"Error occurred while {describe_failed_step(error)}: "
+            f"{error.get('message', error)}"
+            for error in e.errors or [{"message": str(e)}]
+        ]
     except Exception as e:
-        raise Exception(
-            f"Error occurred while linking the project to the repo: {str(e)}"
-        )
+        return [f"Error occurred while finishing the project board setup: {e}"]
+    return []
 
 
-def update_project(
-    client: Client, target_repo_name: str, project_id: str, project_title: str
-):
-    # GraphQL Mutation for updating a project
-    update_project_mutation = gql(
-        """
-        mutation UpdateProjectV2($input: UpdateProjectV2Input!) {
-            updateProjectV2(input: $input) {
-                projectV2 {
-                    __typename
-                }
-            }
-        }
-    """
+def describe_failed_step(error: dict) -> str:
+    path = error.get("path") or []
+    return FINISH_PROJECT_STEPS.get(
+        path[0] if path else None, "finishing the project board setup"
     )
 
-    project_description = f"A collaborative board for the {target_repo_name} audit"
 
-    # Variables for the mutation
-    update_mutation_variables = {
-        "input": {
-            "projectId": project_id,
-            "public": False,
-            "shortDescription": project_description,
+def project_exists(github_token: str, project_id: str | None) -> bool:
+    """Whether the project with the given node id still exists and is open."""
+    if not project_id:
+        return False
+    query = gql(
+        """
+    query GetProject($id: ID!) {
+        node(id: $id) {
+            ... on ProjectV2 {
+                closed
+            }
         }
     }
-
+    """
+    )
+    client = get_graphql_client(github_token)
     try:
-        # Execute the mutation
-        response = client.execute(
-            update_project_mutation, variable_values=update_mutation_variables
-        )
-
-        # Check for errors
-        if "errors" in response:
-            error_messages = [error["message"] for error in response["errors"]]
-            error_text = "\n".join(error_messages)
-            raise Exception(f"GraphQL errors:\n{error_text}")
-        else:
-            print(f"Project {project_title} has been updated successfully")
-    except Exception as e:
-        raise Exception(
-            f"Error occurred while updating the project board description: {str(e)}"
-        )
+        response = client.execute(query, variable_values={"id": project_id})
+    except Exception:
+        return False
+    return response.get("node") is not None and not response["node"].get("closed")
 
 
 def clone_project(
@@ -177,18 +237,19 @@ def clone_project(
         template_project_id (str): ID of the project template, can be extracted from the link (e.g. https://github.com/orgs/Cyfrin/projects/5/views/1 => 5 is the ID)
         project_title (str): Name of the new project.
 
-        Return the cloned project's ID, empty string on failure
+        Return the cloned project's ID
+
+    Takes a single GraphQL request once the node ids are in the state file.
+    The copy is finished by `finish_project`, in a step of its own so that
+    `--resume` can retry it without copying the template again.
     """
 
     try:
-        repo.edit(has_projects=True)
+        # Repos are created with projects enabled, so this rarely costs a request
+        if not repo.has_projects:
+            repo.edit(has_projects=True)
 
-        transport = RequestsHTTPTransport(
-            url="https://api.github.com/graphql",
-            headers={"Authorization": f"Bearer {github_token}"},
-            use_json=True,
-        )
-        client = Client(transport=transport, fetch_schema_from_transport=False)
+        client = get_graphql_client(github_token)
 
         repo_node_id, org_node_id, template_project_id = get_node_ids(
             client, organization, target_repo_name, int(template_project_id)
@@ -207,16 +268,4 @@ def clone_project(
     except Exception as e:
         raise Exception(f"Error occurred while cloning project: {str(e)}")
 
-    try:
-        # it doesn't matter if this call fails, we can still use the project as it is only a description update
-        update_project(client, target_repo_name, project_node_id, project_title)
-    except Exception as e:
-        print(f"Error occurred while updating project: {str(e)}")
-
-    try:
-        # it doesn't matter if this call fails, we can still use the project as it is only a linking step
-        link_project_to_repo(client, project_node_id, repo_node_id)
-    except Exception as e:
-        print(f"Error occurred while linking project to repo: {str(e)}")
-
     return project_node_id
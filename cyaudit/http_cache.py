@@ -0,0 +1,151 @@
+import hashlib
+import json
+import threading
+from dataclasses import dataclass
+from typing import ItemsView, Iterator, Mapping
+
+from requests.structures import CaseInsensitiveDict
+
+from cyaudit.cache import ArtifactCache, get_cache, make_key
+from cyaudit.logging import logger
+
+HTTP_NAMESPACE = "http"
+# Larger responses aren't worth keeping, GitHub rarely sends an ETag for them
+MAX_ENTRY_SIZE = 1024 * 1024
+# Headers that describe the response at the time it is served, not its body
+FRESH_HEADERS = {
+    "date",
+    "x-ratelimit-limit",
+    "x-ratelimit-remaining",
+    "x-ratelimit-reset",
+    "x-ratelimit-resource",
+    "x-ratelimit-used",
+}
+
+_lock = threading.Lock()
+_revalidated = 0
+_stored = 0
+
+
+@dataclass
+class CachedResponse:
+    """A cached GitHub response, served in place of a ``304 Not Modified``.
+
+    Mimics PyGithub's RequestsResponse, like the responses it replaces.
+    """
+
+    status: int
+    headers: CaseInsensitiveDict
+    body: str
+
+    def getheaders(self) -> ItemsView[str, str]:
+        return self.headers.items()
+
+    def read(self) -> str:
+        return self.body
+
+    def iter_content(self, chunk_size: int | None = 1) -> Iterator[bytes]:
+        yield self.body.encode()
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+def cache_key(authorization: str | None, url: str) -> str:
+    """Key of ``url`` as seen by the given credentials.
+
+    Responses depend on what the token can see, so entries are scoped by a
+    hash of the Authorization header and never shared between tokens.
+    """
+    scope = hashlib.sha256((authorization or "").encode()).hexdigest()
+    return make_key(scope, url)
+
+
+def conditional_headers(entry: dict) -> dict[str, str]:
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+class HttpCache:
+    """ETag and Last-Modified revalidation of GitHub REST reads.
+
+    Bodies of GET responses carrying a validator are kept in the artifact
+    cache. The next GET of the same URL with the same token is sent as a
+    conditional request, and a ``304 Not Modified``, which doesn't count
+    against the rate limit, is answered with the cached body.
+    """
+
+    def __init__(self, cache: ArtifactCache):
+        self.cache = cache
+
+    def lookup(self, headers: Mapping[str, str], url: str) -> tuple[str, dict | None]:
+        key = cache_key(headers.get("Authorization"), url)
+        data = self.cache.get(HTTP_NAMESPACE, key)
+        if data is None:
+            return key, None
+        try:
+            return key, json.loads(data)
+        except ValueError:
+            return key, None
+
+    def handle(self, key: str, entry: dict | None, response):
+        """Serve a 304 from ``entry``, or store a fresh response with validators."""
+        global _revalidated, _stored
+        if response.status == 304 and entry is not None:
+            headers = CaseInsensitiveDict(entry["headers"])
+            for name, value in response.headers.items():
+                if name.lower() in FRESH_HEADERS:
+                    headers[name] = value
+            with _lock:
+                _revalidated += 1
+            return CachedResponse(entry["status"], headers, entry["body"])
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if response.status != 200 or not (etag or last_modified):
+            return response
+        body = response.read()
+        if len(body) > MAX_ENTRY_SIZE:
+            return response
+        entry = {
+            "etag": etag,
+            "last_modified": last_modified,
+            "status": response.status,
+            "headers": {
+                name: value
+                for name, value in response.headers.items()
+                if name.lower() not in FRESH_HEADERS
+            },
+            "body": body,
+        }
+        try:
+            self.cache.put(HTTP_NAMESPACE, key, json.dumps(entry).encode())
+        except OSError as e:
+            logger.debug(f"Could not cache a GitHub response: {e}")
+        else:
+            with _lock:
+                _stored += 1
+        return response
+
+
+def get_http_cache() -> HttpCache | None:
+    """The HTTP cache on top of the artifact cache, or None if it is disabled."""
+    cache = get_cache()
+    return HttpCache(cache) if cache is not None else None
+
+
+def finish() -> None:
+    """Log how many requests were revalidated, and keep the cache in its size cap."""
+    with _lock:
+        revalidated, stored = _revalidated, _stored
+    if revalidated or stored:
+        logger.debug(
+            f"{revalidated} GitHub responses served from the HTTP cache, "
+            f"{stored} stored"
+        )
+    cache = get_cache()
+    if stored and cache is not None:
+        cache.prune()
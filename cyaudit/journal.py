@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from cyaudit.constants import JOURNAL_LOCATION
+from cyaudit.logging import logger
+
+JSON_TYPES = (str, int, float, bool, list, dict)
+
+
+class Journal:
+    """Record of the setup steps completed for one audit repo.
+
+    Journals live at ``<root>/<organization>__<repo>.json``. Every finished
+    step is written to disk straight away, so a setup that fails or is
+    interrupted can be resumed from where it stopped. Steps record their
+    return value when it is plain JSON, such as the id of the project board.
+    """
+
+    def __init__(self, path: Path, data: dict | None = None):
+        self.path = path
+        self.data = data if data is not None else {"steps": {}}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(
+        cls, organization: str, repo_name: str, root: Path | str | None = None
+    ) -> "Journal":
+        root = Path(root or JOURNAL_LOCATION).expanduser()
+        path = root / f"{organization.lower()}__{repo_name.lower()}.json"
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            data = None
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring corrupt setup journal {path}")
+            data = None
+        return cls(path, data)
+
+    def start(self, **details: Any) -> None:
+        """Forget the steps of previous runs and record what this setup is for."""
+        with self._lock:
+            self.data = {**details, "steps": {}}
+            self._save()
+
+    def check_matches(self, **details: Any) -> None:
+        """Make sure a resumed setup is for the same source and commit.
+
+        Raises:
+            ValueError: If a recorded detail differs.
+        """
+        for key, value in details.items():
+            recorded = self.data.get(key)
+            if recorded is not None and recorded != value:
+                raise ValueError(
+                    f"Can't resume: the journal at {self.path} was recorded with {key} {recorded!r}, not {value!r}"
+                )
+
+    def is_done(self, step: str) -> bool:
+        return self.data["steps"].get(step, {}).get("status") == "done"
+
+    def value(self, step: str) -> Any:
+        return self.data["steps"].get(step, {}).get("value")
+
+    def record(
+        self, step: str, status: str, value: Any = None, error: str | None = None
+    ) -> None:
+        entry = {
+            "status": status,
+            "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        if isinstance(value, JSON_TYPES):
+            entry["value"] = value
+        if error is not None:
+            entry["error"] = error
+        with self._lock:
+            self.data["steps"][step] = entry
+            self._save()
+
+    def _save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(temp_name, self.path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from github import Label, Repository
+
+from cyaudit.constants import DEFAULT_LABELS, SEVERITY_DATA
+from cyaudit.github_client import own_connection
+from cyaudit.logging import logger
+from cyaudit.state import AuditState
+
+
+@dataclass
+class LabelPlan:
+    create: list[dict] = field(default_factory=list)
+    update: list[dict] = field(default_factory=list)
+    delete: list[str] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.create or self.update or self.delete)
+
+
+def plan_label_sync(
+    existing: dict[str, str],
+    desired: list[dict] = SEVERITY_DATA,
+    remove: list[str] = DEFAULT_LABELS,
+) -> LabelPlan:
+    """
+    Compute the changes that bring a repo's labels in line with `desired`.
+
+    Args:
+        existing: Colour of every label in the repo, keyed by name.
+        desired: Labels the repo must have, as dicts with a name and a colour.
+        remove: Labels the repo must not have, GitHub's defaults.
+
+    Label names are compared case-insensitively, like GitHub does.
+    """
+    plan = LabelPlan()
+    existing_by_key = {name.lower(): (name, color) for name, color in existing.items()}
+    desired_keys = {data["name"].lower() for data in desired}
+
+    for data in desired:
+        current = existing_by_key.get(data["name"].lower())
+        if current is None:
+            plan.create.append(data)
+        elif current[1].lower() != data["color"].lower() or current[0] != data["name"]:
+            plan.update.append({"current_name": current[0], **data})
+
+    for name in remove:
+        current = existing_by_key.get(name.lower())
+        if current is not None and name.lower() not in desired_keys:
+            plan.delete.append(current[0])
+    return plan
+
+
+def apply_label_plan(
+    repo: Repository,
+    plan: LabelPlan,
+    labels: dict[str, Label.Label],
+    max_workers: int = 8,
+) -> list[str]:
+    """
+    Apply a LabelPlan with concurrent API calls. `labels` is kept up to date
+    with the changes that succeed.
+
+    Returns:
+        A message for every change that failed.
+    """
+
+    def create(data: dict) -> None:
+        labels[data["name"]] = own_connection(repo).create_label(**data)
+        logger.info(f"Created label {data['name']}")
+
+    def update(data: dict) -> None:
+        label = own_connection(labels[data["current_name"]])
+        label.edit(data["name"], data["color"])
+        labels[data["name"]] = labels.pop(data["current_name"])
+        logger.info(f"Updated label {data['name']}")
+
+    def delete(name: str) -> None:
+        own_connection(labels[name]).delete()
+        del labels[name]
+        logger.info(f"Deleted label {name}")
+
+    tasks = (
+        [(create, data) for data in plan.create]
+        + [(update, data) for data in plan.update]
+        + [(delete, name) for name in plan.delete]
+    )
+    errors = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [(executor.submit(task, arg), arg) for task, arg in tasks]
+        for future, arg in futures:
+            try:
+                future.result()
+            except Exception as e:
+                name = arg["name"] if isinstance(arg, dict) else arg
+                errors.append(f"Failed to sync label {name}: {e}")
+    return errors
+
+
+def sync_labels(repo: Repository, dry_run: bool = False) -> LabelPlan:
+    """List the repo's labels once and apply the minimal changes to match SEVERITY_DATA."""
+    labels = {label.name: label for label in repo.get_labels()}
+    plan = plan_label_sync({name: label.color for name, label in labels.items()})
+    if plan.is_empty():
+        logger.info("Labels are already in sync")
+    if dry_run:
+        return plan
+    for error in apply_label_plan(repo, plan, labels):
+        logger.warning(error)
+    AuditState().update(
+        repo.full_name, labels={name: label.id for name, label in labels.items()}
+    )
+    return plan
@@ -0,0 +1,34 @@
+import threading
+from contextlib import AbstractContextManager, contextmanager
+from typing import Iterator
+
+from cyaudit.constants import DEFAULT_MAX_GITHUB_CALLS
+from cyaudit.rate_limit import scheduler
+
+_git_clones: threading.BoundedSemaphore | None = None
+
+
+def set_limits(github_calls: int | None = None, git_clones: int | None = None) -> None:
+    """Cap the GitHub API calls and git clones in flight across all threads.
+
+    GitHub calls are always capped, by default to DEFAULT_MAX_GITHUB_CALLS,
+    and the rate limit scheduler lowers the cap further while GitHub pushes
+    back. None lifts the limit on clones. Used when several audits are set
+    up at once.
+    """
+    global _git_clones
+    scheduler.set_max_concurrency(github_calls or DEFAULT_MAX_GITHUB_CALLS)
+    _git_clones = threading.BoundedSemaphore(git_clones) if git_clones else None
+
+
+@contextmanager
+def _slot(semaphore: threading.BoundedSemaphore | None) -> Iterator[None]:
+    if semaphore is None:
+        yield
+        return
+    with semaphore:
+        yield
+
+
+def git_clone() -> AbstractContextManager[None]:
+    return _slot(_git_clones)
@@ -0,0 +1,198 @@
+import os
+import shutil
+import subprocess
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from cyaudit import limits
+from cyaudit.cache import file_lock
+from cyaudit.constants import (
+    DEFAULT_MIRROR_MAX_AGE_DAYS,
+    DEFAULT_MIRRORS_MAX_SIZE_MB,
+    MIRRORS_DIR_ENV_VAR,
+    MIRRORS_LOCATION,
+    MIRRORS_MAX_SIZE_ENV_VAR,
+)
+from cyaudit.git_tools import credentials_for, run_git
+from cyaudit.logging import logger
+
+# Branches and tags only: GitHub's refs/pull/* would make mirrors much larger
+MIRROR_REFSPECS = ["+refs/heads/*:refs/heads/*", "+refs/tags/*:refs/tags/*"]
+
+
+@dataclass
+class MirrorInfo:
+    name: str
+    path: Path
+    size: int
+    last_used: float
+
+
+def get_mirrors_max_size() -> int:
+    """Size cap of the mirrors in bytes, from $CYAUDIT_MIRRORS_MAX_SIZE_MB if set."""
+    max_size_mb = os.getenv(MIRRORS_MAX_SIZE_ENV_VAR)
+    if not max_size_mb:
+        return DEFAULT_MIRRORS_MAX_SIZE_MB * 1024 * 1024
+    try:
+        return int(float(max_size_mb) * 1024 * 1024)
+    except ValueError:
+        raise ValueError(
+            f"${MIRRORS_MAX_SIZE_ENV_VAR} must be a number of megabytes, got {max_size_mb}"
+        )
+
+
+def directory_size(path: Path) -> int:
+    size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                size += os.lstat(os.path.join(dirpath, filename)).st_size
+            except FileNotFoundError:
+                continue
+    return size
+
+
+class MirrorCache:
+    """Bare mirrors of client repositories, shared by every audit on this machine.
+
+    Mirrors live at ``<root>/<owner>/<repo>.git`` and are updated incrementally
+    with ``git fetch``. Clones borrow their objects with ``--reference``, so
+    setting up a re-audit only downloads the commits pushed since the last one.
+    Each mirror has a ``<repo>.git.lock`` next to it: updates hold it
+    exclusively, clones borrowing the mirror hold it shared, and eviction skips
+    mirrors that are in use.
+    """
+
+    def __init__(
+        self,
+        root: Path | str | None = None,
+        max_size: int | None = None,
+        max_age_days: float = DEFAULT_MIRROR_MAX_AGE_DAYS,
+    ):
+        if root is None:
+            root = os.getenv(MIRRORS_DIR_ENV_VAR) or MIRRORS_LOCATION
+        self.root = Path(root).expanduser()
+        self.max_size = max_size if max_size is not None else get_mirrors_max_size()
+        self.max_age_days = max_age_days
+
+    def path_for(self, owner: str, repo: str) -> Path:
+        return self.root / owner.lower() / f"{repo.lower()}.git"
+
+    def _lock_path(self, mirror: Path) -> Path:
+        return mirror.with_name(mirror.name + ".lock")
+
+    def update(
+        self,
+        url: str,
+        owner: str,
+        repo: str,
+        blocking: bool = True,
+        token: str | None = None,
+    ) -> Path:
+        """Create or fetch the mirror of ``owner/repo``.
+
+        The URL is only passed on the command line and ``token`` only to the
+        fetch, so neither is written to the mirror's config.
+
+        Raises:
+            BlockingIOError: If ``blocking`` is False and another process or
+                thread is using the mirror
+        """
+        mirror = self.path_for(owner, repo)
+        with file_lock(self._lock_path(mirror), blocking=blocking):
+            if not mirror.exists():
+                logger.info(f"Creating a local mirror of {owner}/{repo}...")
+                subprocess.run(
+                    ["git", "init", "--quiet", "--bare", str(mirror)], check=True
+                )
+            else:
+                logger.info(f"Updating the local mirror of {owner}/{repo}...")
+            with limits.git_clone():
+                run_git(
+                    ["fetch", "--prune", url, *MIRROR_REFSPECS],
+                    mirror,
+                    credentials_for(url, token),
+                    check=True,
+                )
+            os.utime(mirror)
+        return mirror
+
+    @contextmanager
+    def borrow(
+        self, url: str, owner: str, repo: str, token: str | None = None
+    ) -> Iterator[Path | None]:
+        """Update the mirror of ``owner/repo`` and keep it from being evicted
+        for the duration of the block.
+
+        If another audit is using the mirror, it is borrowed without updating
+        it, so audits of the same repo don't wait for each other; the clone
+        then fetches whatever the mirror lacks from GitHub.
+
+        Yields:
+            The mirror's path, or None if it couldn't be updated, in which case
+            the caller clones from scratch.
+        """
+        mirror = self.path_for(owner, repo)
+        try:
+            self.update(url, owner, repo, blocking=False, token=token)
+        except BlockingIOError:
+            logger.debug(f"Mirror of {owner}/{repo} is in use, borrowing it as is")
+        except (subprocess.CalledProcessError, OSError) as e:
+            logger.warning(f"Could not update the mirror of {owner}/{repo}: {e}")
+            mirror = None
+        if mirror is None:
+            yield None
+            return
+        # Waits only while another audit is updating the mirror
+        with file_lock(self._lock_path(mirror), shared=True):
+            yield mirror if mirror.exists() else None
+
+    def list(self) -> list[MirrorInfo]:
+        mirrors = []
+        if not self.root.exists():
+            return mirrors
+        for path in self.root.glob("*/*.git"):
+            if not path.is_dir():
+                continue
+            name = f"{path.parent.name}/{path.name.removesuffix('.git')}"
+            mirrors.append(
+                MirrorInfo(name, path, directory_size(path), path.stat().st_mtime)
+            )
+        return mirrors
+
+    def prune(
+        self, max_size: int | None = None, max_age_days: float | None = None
+    ) -> tuple[int, int]:
+        """Evict mirrors unused for ``max_age_days``, then the least recently
+        used ones until the mirrors fit ``max_size``. Mirrors in use are kept.
+
+        Returns:
+            Tuple of the number of mirrors removed and the bytes freed.
+        """
+        if max_size is None:
+            max_size = self.max_size
+        if max_age_days is None:
+            max_age_days = self.max_age_days
+        cutoff = time.time() - max_age_days * 24 * 60 * 60
+
+        mirrors = sorted(self.list(), key=lambda m: m.last_used)
+        total = sum(m.size for m in mirrors)
+        removed, freed = 0, 0
+        for mirror in mirrors:
+            if total <= max_size and mirror.last_used >= cutoff:
+                continue
+            try:
+                with file_lock(self._lock_path(mirror.path), blocking=False):
+                    shutil.rmtree(mirror.path, ignore_errors=True)
+            except BlockingIOError:
+                logger.debug(f"Mirror {mirror.name} is in use, keeping it")
+                continue
+            total -= mirror.size
+            removed += 1
+            freed += mirror.size
+        if removed:
+            logger.debug(f"Evicted {removed} mirrors ({freed} bytes)")
+        return removed, freed
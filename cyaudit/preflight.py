@@ -0,0 +1,185 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List
+
+from github import GithubException, UnknownObjectException
+from gql.transport.exceptions import TransportQueryError
+
+from cyaudit.github_client import (
+    get_github,
+    get_graphql_client,
+    get_organization,
+    get_repo,
+    get_teams,
+    use_connection_pool,
+)
+from cyaudit.github_project_utils import get_template_project_node_id
+from cyaudit.logging import logger
+
+
+@dataclass
+class Check:
+    """A read-only check of the setup inputs. `run` returns a problem, or None."""
+
+    name: str
+    run: Callable[[], str | None]
+
+
+def describe(e: GithubException) -> str:
+    message = e.data.get("message") if isinstance(e.data, dict) else e.data
+    return f"{e.status} {message}" if message else str(e.status)
+
+
+def is_not_found(e: TransportQueryError) -> bool:
+    return any(
+        isinstance(error, dict) and error.get("type") == "NOT_FOUND"
+        for error in e.errors or []
+    )
+
+
+def run_checks(checks: List[Check], max_workers: int = 16) -> List[str]:
+    """
+    Run every check at once.
+
+    Returns:
+        The problems found, in the order of the checks.
+    """
+
+    def run(check: Check) -> str | None:
+        try:
+            return check.run()
+        except GithubException as e:
+            return f"{check.name}: unexpected GitHub error ({describe(e)})"
+        except Exception as e:
+            return f"{check.name}: {e}"
+
+    logger.info(f"Running {len(checks)} pre-flight checks...")
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        problems = list(executor.map(run, checks))
+    return [problem for problem in problems if problem is not None]
+
+
+def setup_checks(
+    source_full_name: str,
+    target_organization: str,
+    target_repo_name: str,
+    commit_hash: str,
+    personal_github_token: str,
+    org_github_token: str,
+    template_project_id: str | None = None,
+    give_users_access: List[str] | None = None,
+    give_teams_access: List[str] | None = None,
+    branch: str | None = None,
+    resume: bool = False,
+) -> List[Check]:
+    """
+    Build the checks that must pass before setup changes anything.
+
+    The checks share the pooled clients and use lazy objects, so most cost a
+    single request, and the team and template project lookups are reused by
+    the setup itself.
+    """
+    use_connection_pool()
+    target_full_name = f"{target_organization}/{target_repo_name}"
+
+    def organization() -> str | None:
+        try:
+            get_organization(org_github_token, target_organization)
+        except UnknownObjectException:
+            return f"Organization {target_organization} not found, or the organization token can't see it"
+        return None
+
+    def target_absent() -> str | None:
+        try:
+            get_repo(org_github_token, target_full_name)
+        except UnknownObjectException:
+            return None
+        return (
+            f"{target_full_name} already exists. "
+            "Run `cyaudit setup --resume` to finish a setup that stopped part way."
+        )
+
+    def source_repo() -> str | None:
+        try:
+            get_repo(personal_github_token, source_full_name)
+        except UnknownObjectException:
+            return f"Source repo {source_full_name} not found, or the personal token can't read it"
+        return None
+
+    def commit() -> str | None:
+        repo = get_github(personal_github_token, lazy=True).get_repo(source_full_name)
+        try:
+            repo.get_commit(commit_hash)
+        except UnknownObjectException:
+            return f"Commit {commit_hash} not found in {source_full_name}"
+        except GithubException as e:
+            if e.status == 422:
+                return f"Commit {commit_hash} not found in {source_full_name}"
+            raise
+        return None
+
+    def source_branch() -> str | None:
+        repo = get_github(personal_github_token, lazy=True).get_repo(source_full_name)
+        try:
+            repo.get_branch(branch)
+        except UnknownObjectException:
+            return f"Branch {branch} not found in {source_full_name}"
+        return None
+
+    def template_project() -> str | None:
+        try:
+            number = int(template_project_id)
+        except (TypeError, ValueError):
+            return f"Template project id must be a number, got {template_project_id!r}"
+        try:
+            project_id = get_template_project_node_id(
+                get_graphql_client(org_github_token), target_organization, number
+            )
+        except TransportQueryError as e:
+            # A missing project is a NOT_FOUND error, anything else is reported
+            if not is_not_found(e):
+                raise
+            project_id = None
+        if not project_id:
+            return f"Template project {number} not found in {target_organization}"
+        return None
+
+    def teams() -> str | None:
+        org = get_github(org_github_token, lazy=True).get_organization(
+            target_organization
+        )
+        try:
+            existing = get_teams(org, give_teams_access)
+        except UnknownObjectException:
+            # Reported by the organization check
+            return None
+        missing = [team for team in give_teams_access if team not in existing]
+        if missing:
+            return f"Teams not found in {target_organization}: {', '.join(missing)}"
+        return None
+
+    def user(login: str) -> Check:
+        def run() -> str | None:
+            try:
+                get_github(org_github_token).get_user(login)
+            except UnknownObjectException:
+                return f"User {login} not found"
+            return None
+
+        return Check(f"user {login}", run)
+
+    checks = [
+        Check("organization", organization),
+        Check("source repo", source_repo),
+        Check("commit", commit),
+    ]
+    if not resume:
+        checks.append(Check("target repo", target_absent))
+    if branch:
+        checks.append(Check("branch", source_branch))
+    if template_project_id:
+        checks.append(Check("template project", template_project))
+    if give_teams_access:
+        checks.append(Check("teams", teams))
+    checks += [user(login) for login in give_users_access or []]
+    return checks
@@ -0,0 +1,245 @@
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator, Mapping, TypeVar
+
+import requests
+from github import GithubException, RateLimitExceededException
+
+from cyaudit.constants import DEFAULT_MAX_GITHUB_CALLS
+from cyaudit.logging import logger
+
+R = TypeVar("R")
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRYABLE_STATUSES = {502, 503, 504}
+MAX_RETRIES = 5
+BASE_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+# GitHub asks to wait at least a minute after a secondary rate limit
+SECONDARY_LIMIT_WAIT = 60.0
+# Below this share of a rate limit left, concurrency is reduced
+LOW_REMAINING = 0.1
+
+
+@dataclass
+class Quota:
+    """The state of one of GitHub's rate limits (core, graphql, search...)."""
+
+    limit: int
+    remaining: int
+    reset: float
+    first_remaining: int
+
+    @property
+    def used(self) -> int:
+        """Requests, or GraphQL points, used since this process first saw the limit."""
+        return max(self.first_remaining - self.remaining, 0)
+
+
+def backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt."""
+    return random.uniform(0, min(MAX_BACKOFF, BASE_BACKOFF * 2**attempt))
+
+
+def is_rate_limited(status: int, headers: Mapping[str, str], body: str = "") -> bool:
+    if status not in (403, 429):
+        return False
+    if status == 429 or "retry-after" in headers:
+        return True
+    if headers.get("x-ratelimit-remaining") == "0":
+        return True
+    return "rate limit" in body.lower()
+
+
+def is_retryable_error(e: BaseException) -> bool:
+    """Whether an exception raised by PyGithub is worth retrying later."""
+    if isinstance(e, RateLimitExceededException):
+        return True
+    if isinstance(e, GithubException):
+        return e.status == 429 or e.status in RETRYABLE_STATUSES
+    return False
+
+
+class Scheduler:
+    """
+    Admission control for every request to GitHub.
+
+    Requests wait for a slot before they are sent. The number of slots
+    follows AIMD: it grows by one after as many successful requests as there
+    are slots, up to ``max_concurrency``, and halves on every rate limit
+    signal. When a rate limit is exhausted or GitHub asks to back off, no
+    request is sent until the wait is over.
+
+    Rate limit headers of every response are tracked per resource, so
+    GraphQL point costs are accounted for separately from REST calls.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_MAX_GITHUB_CALLS):
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self.max_concurrency = max_concurrency
+        self.concurrency = max_concurrency
+        self.in_flight = 0
+        self.resume_at = 0.0
+        self.quotas: dict[str, Quota] = {}
+        self.retries = 0
+        self.rate_limited = 0
+        self._successes = 0
+
+    def set_max_concurrency(self, max_concurrency: int) -> None:
+        with self._condition:
+            self.max_concurrency = max_concurrency
+            self.concurrency = max_concurrency
+            self._condition.notify_all()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._condition:
+            while True:
+                wait = self.resume_at - time.time()
+                if wait <= 0 and self.in_flight < self.concurrency:
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+    def observe(
+        self, status: int, headers: Mapping[str, str], body: str = ""
+    ) -> float | None:
+        """
+        Take in the status and headers of a response.
+
+        Returns:
+            How long to wait before retrying the request, if it may succeed
+            later, or None if it went through or won't.
+        """
+        headers = {k.lower(): v for k, v in headers.items()}
+        now = time.time()
+        with self._condition:
+            quota = self._track_quota(headers)
+            if is_rate_limited(status, headers, body):
+                self.rate_limited += 1
+                if "retry-after" in headers:
+                    wait = float(headers["retry-after"])
+                elif quota is not None and quota.remaining == 0:
+                    wait = max(quota.reset - now, 1.0)
+                else:
+                    wait = SECONDARY_LIMIT_WAIT
+                self._decrease()
+                self.resume_at = max(self.resume_at, now + wait)
+                logger.warning(
+                    f"GitHub rate limit hit, pausing requests for {wait:.0f}s "
+                    f"and sending at most {self.concurrency} at a time"
+                )
+                return wait
+            if status in RETRYABLE_STATUSES:
+                return 0.0
+            if quota is not None and quota.remaining == 0:
+                # The next request would be refused, wait for the reset
+                self.resume_at = max(self.resume_at, quota.reset)
+            if quota is not None and quota.remaining < quota.limit * LOW_REMAINING:
+                self._decrease()
+            elif status < 400:
+                self._increase()
+        return None
+
+    def _track_quota(self, headers: Mapping[str, str]) -> Quota | None:
+        if "x-ratelimit-remaining" not in headers:
+            return None
+        resource = headers.get("x-ratelimit-resource", "core")
+        try:
+            limit = int(headers.get("x-ratelimit-limit", 0))
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset = float(headers.get("x-ratelimit-reset", 0))
+        except ValueError:
+            return None
+        quota = self.quotas.get(resource)
+        if quota is None:
+            quota = Quota(limit, remaining, reset, remaining)
+            self.quotas[resource] = quota
+        elif reset > quota.reset:
+            # A new window: count the usage of the last one as done
+            quota.first_remaining += limit - quota.remaining
+            quota.limit, quota.remaining, quota.reset = limit, remaining, reset
+        else:
+            # Responses to concurrent requests arrive out of order
+            quota.remaining = min(quota.remaining, remaining)
+        return quota
+
+    def _decrease(self) -> None:
+        self.concurrency = max(1, self.concurrency // 2)
+        self._successes = 0
+
+    def _increase(self) -> None:
+        self._successes += 1
+        if self._successes >= self.concurrency:
+            self._successes = 0
+            if self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                self._condition.notify()
+
+    def observe_response(self, response: requests.Response, *args, **kwargs) -> None:
+        """requests response hook: observe the response in the sending thread."""
+        body = ""
+        if response.status_code in (403, 429):
+            body = response.text
+        self._local.retry_after = self.observe(
+            response.status_code, response.headers, body
+        )
+
+    def retry_after(self) -> float | None:
+        """What ``observe`` returned for the last response of this thread."""
+        return getattr(self._local, "retry_after", None)
+
+    def send(self, send: Callable[[], R], idempotent: bool) -> R:
+        """
+        Send a request when a slot is free. While GitHub asks to retry it
+        later, idempotent requests are retried with jittered backoff, others
+        are returned or raised as they are.
+        """
+        attempt = 0
+        while True:
+            self._local.retry_after = None
+            # `result` is only set, and only returned, when `send` succeeds
+            error: Exception | None = None
+            with self.slot():
+                try:
+                    result = send()
+                except Exception as e:
+                    error = e
+            wait = self.retry_after()
+            if wait is None or not idempotent or attempt >= MAX_RETRIES:
+                if error is not None:
+                    raise error
+                return result
+            self.retries += 1
+            delay = max(wait, backoff(attempt))
+            logger.debug(f"Retrying GitHub request in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def log_stats(self) -> None:
+        with self._condition:
+            quotas = dict(self.quotas)
+            retries, rate_limited = self.retries, self.rate_limited
+        for resource, quota in sorted(quotas.items()):
+            unit = "points" if resource == "graphql" else "requests"
+            logger.debug(
+                f"GitHub {resource} rate limit: {quota.used} {unit} used, "
+                f"{quota.remaining}/{quota.limit} left"
+            )
+        if retries or rate_limited:
+            logger.debug(
+                f"{rate_limited} rate limited responses, {retries} requests retried"
+            )
+
+
+scheduler = Scheduler()
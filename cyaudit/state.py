@@ -0,0 +1,111 @@
+import json
+import os
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from cyaudit.cache import file_lock
+from cyaudit.constants import STATE_LOCATION, STATE_MAX_AGE_DAYS
+from cyaudit.logging import logger
+
+
+class AuditState:
+    """GitHub identifiers of the audit repos set up on this machine.
+
+    Entries are keyed by the repo's full name and hold what setup learnt
+    about it: the repo's ids and node ids, the project board and label ids.
+    Ids shared by an organization's audits, such as its template projects
+    and teams, are kept under the organization's login. Later commands read
+    them instead of asking GitHub again. Entries older than ``max_age_days``
+    are treated as missing, and commands drop the fields GitHub no longer
+    recognises.
+
+    Every update re-reads the file under a lock and replaces it atomically,
+    so concurrent cyaudit processes never lose each other's entries.
+    """
+
+    def __init__(
+        self, path: Path | str | None = None, max_age_days: float = STATE_MAX_AGE_DAYS
+    ):
+        self.path = Path(path or STATE_LOCATION).expanduser()
+        self.max_age_days = max_age_days
+
+    def _lock_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".lock")
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            logger.warning(f"Ignoring corrupt state file {self.path}")
+            return {}
+
+    def get(self, full_name: str) -> dict[str, Any]:
+        """The recorded fields of ``full_name``, empty if unknown or stale."""
+        entry = self._read().get(full_name.lower(), {})
+        updated_at = entry.get("updated_at")
+        if updated_at is None:
+            return {}
+        age = time.time() - datetime.fromisoformat(updated_at).timestamp()
+        if age > self.max_age_days * 24 * 60 * 60:
+            logger.debug(f"State of {full_name} is stale, ignoring it")
+            return {}
+        return entry
+
+    def update(self, full_name: str, **fields: Any) -> None:
+        """Record ``fields`` for ``full_name``, replacing their previous values."""
+        with file_lock(self._lock_path()):
+            data = self._read()
+            entry = data.setdefault(full_name.lower(), {})
+            entry.update(fields)
+            entry["updated_at"] = datetime.now(timezone.utc).isoformat(
+                timespec="seconds"
+            )
+            self._save(data)
+
+    def update_dict(self, full_name: str, field: str, entries: dict[str, Any]) -> None:
+        """Add ``entries`` to the dict field ``field`` of ``full_name``.
+
+        Unlike ``update``, the keys recorded meanwhile by other processes or
+        threads are kept, as the field is merged after re-reading the file.
+        """
+        with file_lock(self._lock_path()):
+            data = self._read()
+            entry = data.setdefault(full_name.lower(), {})
+            entry[field] = {**entry.get(field, {}), **entries}
+            entry["updated_at"] = datetime.now(timezone.utc).isoformat(
+                timespec="seconds"
+            )
+            self._save(data)
+
+    def forget(self, full_name: str, field: str, key: str | None = None) -> None:
+        """Drop a field of ``full_name``, or one key of a dict field."""
+        with file_lock(self._lock_path()):
+            data = self._read()
+            entry = data.get(full_name.lower(), {})
+            if key is None:
+                entry.pop(field, None)
+            else:
+                entry.get(field, {}).pop(key, None)
+            self._save(data)
+
+    def _save(self, data: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=self.path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_name, self.path)
+        except BaseException:
+            Path(temp_name).unlink(missing_ok=True)
+            raise
+
+
+def repo_fields(repo) -> dict[str, Any]:
+    """The identifiers of a fully fetched PyGithub repo worth recording."""
+    return {"id": repo.id, "node_id": repo.node_id, "owner_node_id": repo.owner.node_id}
@@ -0,0 +1,162 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from cyaudit.journal import Journal
+from cyaudit.logging import logger
+from cyaudit.rate_limit import backoff, is_retryable_error
+
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+STEP_RETRIES = 2
+
+
+@dataclass
+class Step:
+    """
+    One unit of work in a pipeline.
+
+    `run` receives the return values of every step finished so far, keyed by
+    step name, and only starts once all steps in `depends_on` are done.
+
+    When resuming, `verify` is called instead of `run` for steps the journal
+    has as done. It returns the step's value if its changes still exist, or
+    None to run the step again. Steps without `verify` always run.
+
+    Steps with `verify` are also retried when GitHub rate limits them or is
+    unavailable, unless `verify` finds the failed attempt went through.
+    """
+
+    name: str
+    run: Callable[[dict[str, Any]], Any]
+    depends_on: list[str] = field(default_factory=list)
+    verify: Callable[[dict[str, Any]], Any] | None = None
+
+
+@dataclass
+class StepResult:
+    name: str
+    status: str
+    duration: float = 0.0
+    value: Any = None
+    error: BaseException | None = None
+    resumed: bool = False
+
+
+def run_steps(
+    steps: list[Step], max_workers: int = 8, journal: Journal | None = None
+) -> dict[str, StepResult]:
+    """
+    Run steps on a thread pool, each as soon as its dependencies are done.
+
+    A failing step doesn't stop independent steps; steps depending on it,
+    directly or not, are skipped. With a journal, finished and failed steps
+    are recorded as they happen, and steps it has as done are only verified.
+
+    Returns:
+        The result of every step, keyed by step name, in the order given.
+    """
+    names = {step.name for step in steps}
+    for step in steps:
+        unknown = [d for d in step.depends_on if d not in names]
+        if unknown:
+            raise ValueError(f"Step {step.name} depends on unknown steps: {unknown}")
+
+    results: dict[str, StepResult] = {}
+    values: dict[str, Any] = {}
+    pending = list(steps)
+    running: dict[Future, Step] = {}
+
+    def timed(step: Step, done: dict[str, Any]) -> tuple[Any, float, bool]:
+        start = time.monotonic()
+        verify = step.verify
+        if journal is not None and journal.is_done(step.name) and verify:
+            value = verify(done)
+            if value is not None:
+                return value, time.monotonic() - start, True
+            logger.info(f"The changes of step {step.name} are gone, running it again")
+        for attempt in range(STEP_RETRIES + 1):
+            try:
+                value = step.run(done)
+                break
+            except Exception as e:
+                # Steps that can be verified can be retried, after checking
+                # whether the failed attempt went through after all
+                retryable = is_retryable_error(e)
+                if verify is None or not retryable or attempt == STEP_RETRIES:
+                    raise
+                delay = backoff(attempt + 2)
+                logger.warning(
+                    f"Step {step.name} failed with {e!r}, retrying in {delay:.0f}s"
+                )
+                time.sleep(delay)
+                value = verify(done)
+                if value is not None:
+                    break
+        return value, time.monotonic() - start, False
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            scheduled = True
+            while scheduled:
+                scheduled = False
+                for step in list(pending):
+                    statuses = [
+                        results[d].status if d in results else None
+                        for d in step.depends_on
+                    ]
+                    if any(s in (FAILED, SKIPPED) for s in statuses):
+                        logger.debug(
+                            f"Skipping {step.name}, a dependency did not finish"
+                        )
+                        results[step.name] = StepResult(step.name, SKIPPED)
+                    elif all(s == DONE for s in statuses):
+                        logger.debug(f"Starting step {step.name}")
+                        future = executor.submit(timed, step, dict(values))
+                        running[future] = step
+                    else:
+                        continue
+                    pending.remove(step)
+                    scheduled = True
+
+            if not running:
+                if pending:
+                    cycle = [step.name for step in pending]
+                    raise ValueError(f"Steps depend on each other in a cycle: {cycle}")
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                step = running.pop(future)
+                try:
+                    value, duration, resumed = future.result()
+                except BaseException as e:
+                    # Steps may call exit(), which must not take the pool down
+                    logger.debug(f"Step {step.name} failed: {e!r}")
+                    results[step.name] = StepResult(step.name, FAILED, error=e)
+                    if journal is not None:
+                        journal.record(step.name, FAILED, error=repr(e))
+                    continue
+                values[step.name] = value
+                results[step.name] = StepResult(
+                    step.name, DONE, duration, value, resumed=resumed
+                )
+                if journal is not None and not resumed:
+                    journal.record(step.name, DONE, value)
+
+    return {step.name: results[step.name] for step in steps}
+
+
+def log_summary(results: dict[str, StepResult]) -> None:
+    logger.info("Summary:")
+    for result in results.values():
+        if result.status == DONE and result.resumed:
+            logger.info(f"  ✅ {result.name} (already done)")
+        elif result.status == DONE:
+            logger.info(f"  ✅ {result.name} ({result.duration:.1f}s)")
+        elif result.status == FAILED:
+            logger.info(f"  ❌ {result.name}: {result.error!r}")
+        else:
+            logger.info(f"  ⏭️  {result.name} (skipped)")
@@ -1,4 +1,5 @@
 import configparser
+import functools
 import math
 import re
 import subprocess
@@ -9,10 +10,12 @@ from typing import Tuple
 
 import tomllib
 from dateutil.parser import parse
-from github import Github, Repository
+from github import Repository
 
+from cyaudit.cache import get_cache, make_key
 from cyaudit.constants import REPORT_FOLDER
 from cyaudit.logging import logger
+from cyaudit.utils.source_map import IssueRange, SourceMap
 
 # Define file paths
 SOURCE_PATH = f"./{REPORT_FOLDER}/source/"
@@ -25,6 +28,8 @@ SEVERITY_COUNTS = SOURCE_PATH + "severity_counts.toml"
 SUMMARY_TEX = f"./{REPORT_FOLDER}/templates/summary.tex"
 SUMMARY_INFORMATION = SOURCE_PATH + "summary_information.toml"
 SOURCE_REPORT = SOURCE_PATH + "report.md"
+SOURCE_MAP = SOURCE_PATH + "report_map.json"
+WORKING_MAP = WORKING_PATH + "report_map.json"
 OUTPUT_SOLODIT = OUTPUT_PATH + "solodit_report.md"
 MITIGATION_TABLE = OUTPUT_PATH + "mitigation_table.csv"
 
@@ -100,7 +105,25 @@ def replace_internal_links(issues, issues_by_number) -> dict:
     return issues
 
 
+@functools.lru_cache(maxsize=None)
+def pandoc_version() -> str:
+    """First line of `pandoc --version`, used to key cached pandoc output."""
+    return subprocess.check_output(["pandoc", "--version"], text=True).split("\n")[0]
+
+
 def markdown_heading_to_latex_hypertarget(heading):
+    cache = get_cache()
+    if cache is not None:
+        key = make_key(pandoc_version(), heading)
+        hypertarget = cache.get_text("hypertarget", key)
+        if hypertarget is None:
+            hypertarget = _markdown_heading_to_latex_hypertarget(heading)
+            cache.put_text("hypertarget", key, hypertarget)
+        return hypertarget
+    return _markdown_heading_to_latex_hypertarget(heading)
+
+
+def _markdown_heading_to_latex_hypertarget(heading):
     # Use Pandoc to generate LaTeX with a table of contents
     markdown = f"# Table of Contents\n\n{heading}"
     latex = subprocess.check_output(
@@ -155,7 +178,7 @@ def generate_markdown_from_issues(issue_dict, summary_of_findings):
     # Dictionary for count by severity
     count_by_severity: dict[str, int] = {}
 
-    with open(SOURCE_REPORT, "w") as report:
+    with open(SOURCE_REPORT, "w", newline="\n") as report:
         for label in SEVERITY_LABELS:
             # Do nothing if there are no issues with this label
             if get_issue_count(issue_dict, label) == 0:
@@ -166,8 +189,19 @@ def generate_markdown_from_issues(issue_dict, summary_of_findings):
                 report.write(content.replace("\r\n", "\n"))
             report.write("\n\\clearpage\n")
 
+    # Record where each finding landed in report.md
+    source_map = SourceMap(
+        issues=[
+            IssueRange(number, f"### {issue_title}")
+            for label in SEVERITY_LABELS
+            for issue_title, _, number in summary_of_findings.get(label, [])
+        ]
+    )
+    source_map.anchor_markdown(get_file_contents(SOURCE_REPORT))
+    source_map.save(SOURCE_MAP)
+
     total_count = 0
-    with open(SEVERITY_COUNTS, "w") as counts_file:
+    with open(SEVERITY_COUNTS, "w", newline="\n") as counts_file:
         counts_file.write("[counts]" + "\n")
         for label in SEVERITY_LABELS:
             variable_name = (
@@ -195,7 +229,7 @@ def generate_markdown_from_issues(issue_dict, summary_of_findings):
         mitigation_table += f"{label.split()[1].upper()},,,\n"
 
         # Iterate through all findings for the current severity
-        for counter, (issue_title, status_label) in enumerate(
+        for counter, (issue_title, status_label, _) in enumerate(
             summary_of_findings[label], start=1
         ):
             linted_title = replace_ampersand_in_findings_headings(issue_title)
@@ -238,25 +272,21 @@ def generate_markdown_from_issues(issue_dict, summary_of_findings):
         )
         exit(1)
 
-    with open(SUMMARY_TEX, "w") as summary_file:
+    with open(SUMMARY_TEX, "w", newline="\n") as summary_file:
         summary_file.write(updated_summary_tex_content)
 
-    with open(MITIGATION_TABLE, "w") as mitigation_file:
+    with open(MITIGATION_TABLE, "w", newline="\n") as mitigation_file:
         mitigation_file.write(mitigation_table)
 
     return total_count
 
 
-def fetch_issues(repository: Repository, github: Github) -> Tuple[dict, dict]:
+def fetch_issues(repository: Repository) -> Tuple[dict, dict]:
     """
     fetches issues from the github.
 
     Returns a dictionary with issues by severity and a dictionary with summary of findings.
     """
-    repository_url = re.sub(
-        r"^https://github.com/(.*?)(\.git)?$", r"\1", repository.clone_url
-    )  # Remove the leading "https://github.com/" and trailing ".git"
-
     # The dictionary where the issues will be stored, by severity.
     issue_dict: dict[str, list[str]] = {}
 
@@ -264,13 +294,13 @@ def fetch_issues(repository: Repository, github: Github) -> Tuple[dict, dict]:
     issues_by_number: dict[int, str] = {}
 
     # Dictionary for summary of findings
-    summary_of_findings: dict[str, list[tuple[str, str]]] = {}
+    summary_of_findings: dict[str, list[tuple[str, str, int]]] = {}
 
-    # TODO catch get_repo() 404 errors and produce a gentle suggestion on what's wrong.
     # "GitHub's REST API v3 considers every pull request an issue"--need to filter them out.
-    issues_list = list(github.get_repo(repository_url).get_issues())
-    for i in range(len(issues_list) - 1, -1, -1):
-        issue = issues_list[i]
+    # Sort by issue number so the report, summary and mitigation tables always
+    # list findings in the same order, whatever order the API returns them in.
+    issues_list = sorted(repository.get_issues(), key=lambda i: i.number)
+    for issue in issues_list:
         if issue.state == "open" and issue.pull_request is None:
             # get issue number and title for replacing links
             issues_by_number[issue.number] = issue.title
@@ -300,10 +330,12 @@ def fetch_issues(repository: Repository, github: Github) -> Tuple[dict, dict]:
             )
 
             status_label = status_labels_in_issue[0]
-            # Append issue title and status to summary of findings dictionary
+            # Append issue title, status and number to summary of findings dictionary
             if severity_label not in summary_of_findings:
                 summary_of_findings[severity_label] = []
-            summary_of_findings[severity_label].append((issue.title, status_label))
+            summary_of_findings[severity_label].append(
+                (issue.title, status_label, issue.number)
+            )
 
     issues_dict = replace_internal_links(issue_dict, issues_by_number)
     return issues_dict, summary_of_findings
@@ -470,8 +502,22 @@ def replace_ampersand_in_findings_headings(line):
     return line
 
 
+def describe_location(source_map: SourceMap | None, index: int) -> str:
+    """Finding a 0-based report.md line index belongs to, formatted for messages."""
+    if source_map is None:
+        return ""
+    location = source_map.locate_markdown(index + 1)
+    return f" ({location})" if location is not None else ""
+
+
 def lint(
-    report, team_name, source_org, source_repo_name, internal_org, internal_repo_name
+    report,
+    team_name,
+    source_org,
+    source_repo_name,
+    internal_org,
+    internal_repo_name,
+    source_map: SourceMap | None = None,
 ):
     for line in report:
         new_line = line
@@ -496,7 +542,9 @@ def lint(
             # Check if the first 4 characters after the open-paren are "http"
             if line[pos + 2 : pos + 6] != "http" and line[pos + 2] != "#":
                 position = report.index(line)
-                print(f"Possible broken link at report.md line {position}: ")
+                print(
+                    f"Possible broken link at report.md line {position}{describe_location(source_map, position)}: "
+                )
                 print(f"\t{line}")
             pos = line.find("](", pos + 1)
 
@@ -507,7 +555,9 @@ def lint(
             # Check if the character to the left of "http" is an open-paren preceded by a close-bracket
             if line[pos - 2 : pos] != "](":
                 position = report.index(line)
-                print(f"Possible raw link at report.md line {position}: ")
+                print(
+                    f"Possible raw link at report.md line {position}{describe_location(source_map, position)}: "
+                )
                 print(f"\t{line}")
             pos = line.find("http", pos + 1)
 
@@ -0,0 +1,85 @@
+import re
+from collections import deque
+from dataclasses import dataclass, field
+
+# `-file-line-error` style: "./report.tex:123: Undefined control sequence."
+FILE_LINE_ERROR = re.compile(r"^(?P<file>[^\s:]+\.\w+):(?P<line>\d+): (?P<message>.*)$")
+# Classic style: "! Undefined control sequence."
+CLASSIC_ERROR = re.compile(r"^! (?P<message>.*)$")
+# Where TeX stopped reading: "l.123 \foo"
+ERROR_LOCATION = re.compile(r"^l\.(?P<line>\d+)")
+# Errors after which TeX gives up on its own, with no "l.<n>" line to wait for
+FATAL_MESSAGES = ["Emergency stop", "Fatal error occurred", "==> Fatal error"]
+
+
+@dataclass
+class LatexError:
+    message: str
+    file: str | None = None
+    line: int | None = None
+    context: list[str] = field(default_factory=list)
+
+    def __str__(self) -> str:
+        location = ""
+        if self.file:
+            location = f"{self.file}:{self.line}: " if self.line else f"{self.file}: "
+        return f"{location}{self.message}\n" + "\n".join(self.context)
+
+
+class LatexLogParser:
+    """
+    Incremental parser for pdflatex terminal output.
+
+    Feed it one line at a time; it returns a LatexError as soon as an error is
+    complete, i.e. once TeX has printed the "l.<n>" line telling where it
+    stopped, or straight away for errors TeX can't recover from.
+    """
+
+    def __init__(self, context_lines: int = 8, max_error_lines: int = 20):
+        self.recent: deque[str] = deque(maxlen=context_lines)
+        self.max_error_lines = max_error_lines
+        self.pending: LatexError | None = None
+
+    def feed(self, line: str) -> LatexError | None:
+        line = line.rstrip("\n")
+        if self.pending is not None:
+            return self._continue_error(line)
+
+        match = FILE_LINE_ERROR.match(line) or CLASSIC_ERROR.match(line)
+        if match is None:
+            self.recent.append(line)
+            return None
+
+        groups = match.groupdict()
+        self.pending = LatexError(
+            message=groups["message"],
+            file=groups.get("file"),
+            line=int(groups["line"]) if groups.get("line") else None,
+            context=list(self.recent) + [line],
+        )
+        if any(fatal in line for fatal in FATAL_MESSAGES):
+            return self._finish()
+        return None
+
+    def close(self) -> LatexError | None:
+        """Flush an error whose location line never arrived."""
+        if self.pending is not None:
+            return self._finish()
+        return None
+
+    def _continue_error(self, line: str) -> LatexError | None:
+        assert self.pending is not None
+        self.pending.context.append(line)
+        location = ERROR_LOCATION.match(line)
+        if location:
+            if self.pending.line is None:
+                self.pending.line = int(location.group("line"))
+            return self._finish()
+        if len(self.pending.context) >= len(self.recent) + self.max_error_lines:
+            return self._finish()
+        return None
+
+    def _finish(self) -> LatexError:
+        assert self.pending is not None
+        error, self.pending = self.pending, None
+        return error
@@ -0,0 +1,174 @@
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+TEX_HEADING = re.compile(
+    r"^(\\Needspace\{[^}]*\})?\\(section|subsection|subsubsection|paragraph|subparagraph)\*?\{"
+)
+TEX_CODE_BLOCK = re.compile(r"^\\begin\{minted\}")
+
+
+@dataclass
+class Location:
+    number: int
+    line: int
+
+    def __str__(self) -> str:
+        if self.line <= 0:
+            return f"issue #{self.number}, title"
+        return f"issue #{self.number}, line {self.line}"
+
+
+@dataclass
+class IssueRange:
+    number: int
+    heading: str
+    # 1-based, inclusive line numbers; None when the finding can't be found
+    start: int | None = None
+    end: int | None = None
+
+
+@dataclass
+class SourceMap:
+    """
+    Maps lines of report.md and report.tex back to the GitHub issues they came from.
+
+    The map is built by the `source` command and re-anchored by the `report`
+    command against the current report.md, since linting and hand edits move
+    lines around. Findings are found again by their headings, in order.
+    """
+
+    issues: list[IssueRange] = field(default_factory=list)
+    # (report.tex line, report.md line, lines after the anchor map one to one)
+    tex_anchors: list[tuple[int, int, bool]] = field(default_factory=list)
+
+    @classmethod
+    def load(cls, path: Path | str) -> "SourceMap | None":
+        if not Path(path).exists():
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        return cls(
+            issues=[IssueRange(**issue) for issue in data.get("issues", [])],
+            tex_anchors=[tuple(a) for a in data.get("tex_anchors", [])],
+        )
+
+    def save(self, path: Path | str) -> None:
+        with open(path, "w", newline="\n") as f:
+            json.dump(asdict(self), f, indent=2)
+            f.write("\n")
+
+    def anchor_markdown(self, report: list[str]) -> None:
+        """Locate every finding's line range in report.md."""
+        headings = [
+            (number, line)
+            for number, line in markdown_structure(report)[0]
+            if line.startswith("### ") or line.startswith("## ")
+        ]
+        cursor = 0
+        for issue in self.issues:
+            issue.start = issue.end = None
+            expected = normalize_heading(issue.heading)
+            for index in range(cursor, len(headings)):
+                number, line = headings[index]
+                if normalize_heading(line) == expected:
+                    issue.start = number
+                    cursor = index + 1
+                    break
+
+        found = [issue for issue in self.issues if issue.start is not None]
+        for issue, next_issue in zip(found, found[1:] + [None]):
+            assert issue.start is not None
+            end = len(report)
+            for number, line in headings:
+                if number > issue.start and (
+                    line.startswith("## ")
+                    or (next_issue is not None and number == next_issue.start)
+                ):
+                    end = number - 1
+                    break
+            issue.end = end
+
+    def anchor_tex(self, report: list[str], tex: list[str]) -> None:
+        """
+        Pair report.tex lines with report.md lines.
+
+        Pandoc turns each markdown heading into one sectioning command and each
+        code block into one minted environment, in order, so the n-th of each
+        in report.tex comes from the n-th in report.md. Lines inside code
+        blocks map one to one.
+        """
+        md_headings, md_code_blocks = markdown_structure(report)
+        tex_headings = [
+            number
+            for number, line in enumerate(tex, start=1)
+            if TEX_HEADING.match(line)
+        ]
+        tex_code_blocks = [
+            number
+            for number, line in enumerate(tex, start=1)
+            if TEX_CODE_BLOCK.match(line)
+        ]
+        anchors = [
+            (tex_line, md_line, False)
+            for tex_line, (md_line, _) in zip(tex_headings, md_headings)
+        ]
+        anchors += [
+            (tex_line, md_line, True)
+            for tex_line, md_line in zip(tex_code_blocks, md_code_blocks)
+        ]
+        self.tex_anchors = sorted(anchors)
+
+    def locate_markdown(self, line: int) -> Location | None:
+        """Finding and line within it for a 1-based report.md line."""
+        for issue in self.issues:
+            if issue.start is None or issue.end is None:
+                continue
+            if issue.start <= line <= issue.end:
+                # The issue body starts two lines below its heading
+                return Location(issue.number, max(line - issue.start - 1, 0))
+        return None
+
+    def locate_tex(self, line: int) -> Location | None:
+        """Finding and line within it for a 1-based report.tex line."""
+        anchor = None
+        for tex_anchor in self.tex_anchors:
+            if tex_anchor[0] > line:
+                break
+            anchor = tex_anchor
+        if anchor is None:
+            return None
+        tex_line, md_line, exact = anchor
+        if exact:
+            md_line += line - tex_line
+        return self.locate_markdown(md_line)
+
+
+def normalize_heading(heading: str) -> str:
+    # Linting replaces '&' in finding headings with 'and'
+    return heading.strip().replace("&", "and")
+
+
+def markdown_structure(report: list[str]) -> tuple[list[tuple[int, str]], list[int]]:
+    """
+    Find the headings and code blocks of a markdown document.
+
+    Returns:
+        Tuple of the (1-based line, text) of every ATX heading and the 1-based
+        line of every opening code fence.
+    """
+    headings = []
+    code_blocks = []
+    fence = None
+    for number, line in enumerate(report, start=1):
+        stripped = line.lstrip()
+        if fence is None:
+            if stripped.startswith("```") or stripped.startswith("~~~"):
+                fence = stripped[:3]
+                code_blocks.append(number)
+            elif re.match(r"#{1,6} ", line):
+                headings.append((number, line))
+        elif stripped.startswith(fence):
+            fence = None
+    return headings, code_blocks
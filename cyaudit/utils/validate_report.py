@@ -0,0 +1,186 @@
+import re
+from dataclasses import dataclass
+from pathlib import Path
+
+from cyaudit.utils.source_map import Location, SourceMap
+
+try:
+    from pygments.lexers import get_lexer_by_name
+    from pygments.util import ClassNotFound
+except ImportError:  # pragma: no cover - pygments ships with minted installs
+    get_lexer_by_name = None
+
+MARKDOWN_IMAGE = re.compile(r"!\[[^\]]*\]\(([^)\s]+)[^)]*\)")
+# Commands whose arguments are labels or URLs, where '_' and '%' are allowed
+TEX_RAW_ARGUMENTS = re.compile(
+    r"\\(hypertarget|hyperlink|label|ref|url|href|includegraphics|Needspace)"
+    r"(\[[^\]]*\])?\{[^{}]*\}"
+)
+TEX_MATH = re.compile(r"\\\(.*?\\\)|\\\[.*?\\\]|(?<!\\)\$.*?(?<!\\)\$")
+TEX_VERBATIM_ENVIRONMENTS = ["minted", "verbatim", "Verbatim", "lstlisting"]
+TEX_TABLE_ENVIRONMENTS = ["tabular", "longtable", "tabularx", "array"]
+SUMMARY_TABLE_START = "% __PLACEHOLDER__SUMMARY_OF_FINDINGS_START"
+SUMMARY_TABLE_END = "% __PLACEHOLDER__SUMMARY_OF_FINDINGS_END"
+
+
+@dataclass
+class Problem:
+    file: str
+    line: int
+    message: str
+    location: Location | None = None
+
+    def __str__(self) -> str:
+        finding = f" ({self.location})" if self.location is not None else ""
+        return f"{self.file}:{self.line}{finding}: {self.message}"
+
+
+def is_known_language(language: str) -> bool:
+    if get_lexer_by_name is None:
+        return True
+    try:
+        get_lexer_by_name(language)
+    except ClassNotFound:
+        return False
+    return True
+
+
+def validate_markdown(
+    report: list[str], working_dir: Path | str, source_map: SourceMap | None = None
+) -> list[Problem]:
+    """
+    Find problems in report.md that would break the LaTeX build.
+
+    Checks for unclosed code fences, code languages minted can't highlight and
+    images that don't exist. Image paths are resolved from the working
+    directory, where pdflatex runs.
+    """
+    problems = []
+
+    def add(line: int, message: str) -> None:
+        location = source_map.locate_markdown(line) if source_map else None
+        problems.append(Problem("report.md", line, message, location))
+
+    fence = None
+    fence_line = 0
+    for number, line in enumerate(report, start=1):
+        stripped = line.lstrip()
+        if fence is not None:
+            if stripped.startswith(fence):
+                fence = None
+            continue
+
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            fence = stripped[:3]
+            fence_line = number
+            info = stripped.lstrip(fence[0]).strip()
+            language = info.split()[0].strip("{}.") if info else ""
+            if language and not is_known_language(language):
+                add(number, f"Unknown code block language '{language}'")
+            continue
+
+        for image in MARKDOWN_IMAGE.findall(line):
+            if re.match(r"https?://", image):
+                continue
+            if not (Path(working_dir) / image).exists():
+                add(number, f"Image not found: {image}")
+
+    if fence is not None:
+        add(fence_line, "Code block is never closed")
+    return problems
+
+
+def unescaped(line: str, char: str) -> list[int]:
+    """Positions of `char` in `line` that aren't escaped with a backslash."""
+    positions = []
+    for match in re.finditer(re.escape(char), line):
+        backslashes = len(line[: match.start()]) - len(
+            line[: match.start()].rstrip("\\")
+        )
+        if backslashes % 2 == 0:
+            positions.append(match.start())
+    return positions
+
+
+def strip_raw_tex(line: str) -> str:
+    line = TEX_RAW_ARGUMENTS.sub("", line)
+    return TEX_MATH.sub("", line)
+
+
+def validate_tex(
+    tex: list[str], name: str = "report.tex", source_map: SourceMap | None = None
+) -> list[Problem]:
+    """
+    Find unescaped special characters and broken code listings in LaTeX output.
+
+    '&' is allowed inside tables, and '%' at the end of a line, where pandoc
+    uses it to swallow the line break.
+    """
+    problems = []
+
+    def add(line: int, message: str) -> None:
+        location = None
+        if source_map is not None and name == "report.tex":
+            location = source_map.locate_tex(line)
+        problems.append(Problem(name, line, message, location))
+
+    verbatim = None
+    verbatim_line = 0
+    table_depth = 0
+    for number, line in enumerate(tex, start=1):
+        if verbatim is not None:
+            if f"\\end{{{verbatim}}}" in line:
+                verbatim = None
+            continue
+
+        begin = re.search(r"\\begin\{(\w+)\}(\[[^\]]*\])?(\{(\w[\w+#-]*)\})?", line)
+        if begin and begin.group(1) in TEX_VERBATIM_ENVIRONMENTS:
+            verbatim = begin.group(1)
+            verbatim_line = number
+            language = begin.group(4)
+            if verbatim == "minted" and language and not is_known_language(language):
+                add(number, f"Unknown minted language '{language}'")
+            continue
+
+        for environment in TEX_TABLE_ENVIRONMENTS:
+            table_depth += line.count(f"\\begin{{{environment}}}")
+            table_depth -= line.count(f"\\end{{{environment}}}")
+
+        text = strip_raw_tex(line)
+        if text.lstrip().startswith("%"):
+            continue
+        if unescaped(text, "_"):
+            add(number, "Unescaped '_' outside code")
+        trailing = len(text.rstrip()) - 1
+        if any(position < trailing for position in unescaped(text, "%")):
+            add(number, "Unescaped '%' comments out the rest of the line")
+        if table_depth <= 0 and unescaped(text, "&"):
+            add(number, "Unescaped '&' outside a table")
+
+    if verbatim is not None:
+        add(verbatim_line, f"\\begin{{{verbatim}}} is never closed")
+    return problems
+
+
+def validate_summary_table(
+    summary: list[str], name: str = "summary.tex"
+) -> list[Problem]:
+    """Check that every row of the summary of findings table has two columns."""
+    problems = []
+    inside = False
+    for number, line in enumerate(summary, start=1):
+        if SUMMARY_TABLE_START in line:
+            inside = True
+            continue
+        if SUMMARY_TABLE_END in line:
+            break
+        if not inside:
+            continue
+        text = strip_raw_tex(line)
+        if len(unescaped(text, "&")) > 1:
+            problems.append(Problem(name, number, "Unescaped '&' in a finding title"))
+        if unescaped(text, "_"):
+            problems.append(Problem(name, number, "Unescaped '_' in a finding title"))
+        if unescaped(text, "%"):
+            problems.append(Problem(name, number, "Unescaped '%' in a finding title"))
+    return problems
@@ -1,5 +1,7 @@
 import os
+import subprocess
 from datetime import datetime
+from pathlib import Path
 
 import pytest
 from dotenv import load_dotenv
@@ -51,6 +53,25 @@ def create_test_repo(
         )
 
 
+def git(*args, cwd) -> str:
+    """Run a git command in `cwd` and return its output"""
+    return subprocess.run(
+        ["git", "-c", "user.name=a", "-c", "user.email=a@b", *args],
+        cwd=cwd,
+        text=True,
+        capture_output=True,
+        check=True,
+    ).stdout.strip()
+
+
+def make_upstream(path: Path) -> Path:
+    """Create a local repo with a single empty commit on `main`"""
+    path.mkdir(parents=True, exist_ok=True)
+    git("init", "-q", "-b", "main", cwd=path)
+    git("commit", "-q", "--allow-empty", "-m", "first", cwd=path)
+    return path
+
+
 def delete_repo(repo: Repository) -> None:
     """Delete a test repository"""
     try:
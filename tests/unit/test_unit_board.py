@@ -0,0 +1,132 @@
+from gql.transport.exceptions import TransportQueryError
+
+from cyaudit.board import (
+    BoardPlan,
+    FieldUpdate,
+    SelectField,
+    apply_board_plan,
+    plan_board_sync,
+    sync_board,
+)
+from cyaudit.state import AuditState
+
+SEVERITY = SelectField("F_sev", {"high risk": "O_high", "low risk": "O_low"})
+STATUS = SelectField("F_status", {"open": "O_open", "resolved": "O_resolved"})
+
+
+def test_plan_board_sync_only_touches_changed_items():
+    issues = {
+        "I_1": (1, ["Severity: High Risk", "Report Status: Open"]),
+        "I_2": (2, ["Severity: Low Risk", "Report Status: Resolved"]),
+        "I_3": (3, ["Severity: Low Risk", "Report Status: Open", "bug"]),
+        "I_4": (4, ["Report Status: Open"]),
+    }
+    items = {
+        "I_1": ("PVTI_1", {"F_sev": "O_high", "F_status": "O_open"}),
+        "I_2": ("PVTI_2", {"F_sev": "O_low", "F_status": "O_open"}),
+    }
+
+    plan = plan_board_sync(issues, items, {"severity": SEVERITY, "status": STATUS})
+
+    assert plan.add == ["I_3", "I_4"]
+    assert plan.update == [
+        FieldUpdate("I_2", "F_status", "O_resolved"),
+        FieldUpdate("I_3", "F_sev", "O_low"),
+        FieldUpdate("I_3", "F_status", "O_open"),
+        FieldUpdate("I_4", "F_status", "O_open"),
+    ]
+    assert len(plan.problems) == 1
+    assert plan.problems[0].startswith("Issue #4 has 0 of the labels")
+
+
+def test_plan_board_sync_skips_missing_fields():
+    issues = {"I_1": (1, ["Severity: High Risk", "Report Status: Open"])}
+
+    plan = plan_board_sync(issues, {}, {"severity": None, "status": STATUS})
+
+    assert plan.update == [FieldUpdate("I_1", "F_status", "O_open")]
+
+
+class FakeClient:
+    def __init__(self):
+        self.requests = []
+
+    def execute(self, document, variable_values=None):
+        self.requests.append(variable_values)
+        if "m0" in variable_values and "contentId" in variable_values["m0"]:
+            return {
+                alias: {"item": {"id": f"PVTI_{value['contentId']}"}}
+                for alias, value in variable_values.items()
+            }
+        raise TransportQueryError(
+            "GraphQL errors",
+            errors=[{"message": "Field not found", "path": ["m1"]}],
+            data={"m0": {"projectV2Item": {"id": "x"}}, "m1": None},
+        )
+
+
+def test_apply_board_plan_batches_mutations(monkeypatch):
+    monkeypatch.setattr("cyaudit.board.BOARD_BATCH_SIZE", 2)
+    plan = BoardPlan(
+        add=["I_1", "I_2", "I_3"],
+        update=[
+            FieldUpdate("I_1", "F_sev", "O_high"),
+            FieldUpdate("I_9", "F_sev", "O_low"),
+        ],
+    )
+    client = FakeClient()
+
+    errors = apply_board_plan(client, "PVT_1", plan, {"I_9": ("PVTI_9", {})})
+
+    # Two requests for the three adds, one for both updates
+    assert len(client.requests) == 3
+    assert client.requests[2]["m0"]["itemId"] == "PVTI_I_1"
+    assert client.requests[2]["m1"]["itemId"] == "PVTI_9"
+    assert errors == ["updateProjectV2ItemFieldValue (m1) failed: Field not found"]
+
+
+class BoardClient:
+    """A repo whose recorded board PVT_old was deleted and replaced by PVT_new."""
+
+    def __init__(self):
+        self.projects = []
+
+    def execute(self, document, variable_values=None):
+        if "project" in variable_values:
+            self.projects.append(variable_values["project"])
+            if variable_values["project"] == "PVT_old":
+                raise TransportQueryError(
+                    "GraphQL errors",
+                    errors=[{"message": "Could not resolve to a node"}],
+                    data={"node": None},
+                )
+            page = {"pageInfo": {"hasNextPage": False, "endCursor": None}}
+            fields = {"nodes": [{"id": "F_status", "name": "Status", "options": []}]}
+            return {"node": {"fields": fields, "items": {**page, "nodes": []}}}
+        if "m0" in variable_values:
+            raise TransportQueryError(
+                "GraphQL errors", errors=[{"message": "Forbidden"}], data=None
+            )
+        if "after" in variable_values:
+            issue = {"id": "I_1", "number": 1, "labels": {"nodes": []}}
+            page = {"pageInfo": {"hasNextPage": False, "endCursor": None}}
+            return {"repository": {"issues": {**page, "nodes": [issue]}}}
+        projects = [{"id": "PVT_new", "title": "Audit", "closed": False}]
+        return {"repository": {"projectsV2": {"nodes": projects}}}
+
+
+def test_sync_board_replaces_a_deleted_board_and_reports_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "cyaudit.board.AuditState", lambda: AuditState(tmp_path / "state.json")
+    )
+    AuditState(tmp_path / "state.json").update("cyfrin/audit", project_id="PVT_old")
+    client = BoardClient()
+
+    plan = sync_board(client, "cyfrin/audit")
+
+    assert client.projects == ["PVT_old", "PVT_new"]
+    assert AuditState(tmp_path / "state.json").get("cyfrin/audit")["project_id"] == (
+        "PVT_new"
+    )
+    assert plan.add == ["I_1"]
+    assert plan.errors == ["addProjectV2ItemById failed: Forbidden"]
@@ -0,0 +1,37 @@
+import os
+import tempfile
+
+from cyaudit.cache import ArtifactCache, make_key
+
+
+def test_put_and_get_roundtrip():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ArtifactCache(temp_dir, max_size=1024)
+        key = make_key("pandoc 3.1", b"# Title")
+
+        assert cache.get("pandoc", key) is None
+        cache.put("pandoc", key, b"\\section{Title}")
+        assert cache.get("pandoc", key) == b"\\section{Title}"
+
+
+def test_make_key_separates_parts():
+    assert make_key("ab", "c") != make_key("a", "bc")
+
+
+def test_prune_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        cache = ArtifactCache(temp_dir, max_size=20)
+        keys = [make_key(str(i)) for i in range(3)]
+        for age, key in enumerate(keys):
+            cache.put("test", key, b"x" * 10)
+            path = cache.root / "test" / key[:2] / key
+            os.utime(path, (1000 + age, 1000 + age))
+
+        # Reading the oldest entry makes it the most recently used one
+        cache.get("test", keys[0])
+        removed, freed = cache.prune()
+
+        assert (removed, freed) == (1, 10)
+        assert cache.get("test", keys[1]) is None
+        assert cache.get("test", keys[0]) is not None
+        assert cache.stats().entries == 2
@@ -0,0 +1,80 @@
+import subprocess
+from argparse import Namespace
+
+import pytest
+
+from cyaudit.commands import clone
+from cyaudit.commands.clone import matches_filter, sync_repo
+from cyaudit.git_tools import run_git
+from tests.conftest import git, make_upstream
+
+
+def test_matches_filter():
+    assert matches_filter(None, "audit-vault", [])
+    assert matches_filter("prefix:audit-", "Audit-Vault", [])
+    assert not matches_filter("prefix:audit-", "website", [])
+    assert matches_filter("topic:audit", "vault", ["defi", "Audit"])
+    assert not matches_filter("topic:audit", "vault", ["defi"])
+    with pytest.raises(ValueError):
+        matches_filter("owner:cyfrin", "vault", [])
+
+
+def test_sync_repo_clones_then_fetches(tmp_path):
+    upstream = make_upstream(tmp_path / "upstream")
+
+    clone = tmp_path / "audits" / "vault"
+    assert sync_repo(f"file://{upstream}", clone) == "cloned"
+
+    git("commit", "-q", "--allow-empty", "-m", "second", cwd=upstream)
+    assert sync_repo(f"file://{upstream}", clone) == "fetched"
+    assert git("rev-parse", "origin/main", cwd=clone) == git(
+        "rev-parse", "HEAD", cwd=upstream
+    )
+
+    with pytest.raises(subprocess.CalledProcessError):
+        sync_repo(f"file://{tmp_path}/missing", tmp_path / "audits" / "missing")
+
+
+def test_sync_repo_fetches_with_the_credentials_of_the_clones_origin(
+    tmp_path, monkeypatch
+):
+    upstream = make_upstream(tmp_path / "upstream")
+    path = tmp_path / "audits" / "vault"
+    sync_repo(f"file://{upstream}", path)
+    git("remote", "set-url", "origin", str(upstream), cwd=path)
+
+    sent = []
+
+    def spy(args, repo_path=None, credentials=None, **kwargs):
+        sent.append(credentials)
+        return run_git(args, repo_path, credentials, **kwargs)
+
+    monkeypatch.setattr(clone, "run_git", spy)
+    assert sync_repo(f"file://{upstream}", path, "token") == "fetched"
+    assert sent[-1] == {str(upstream): "token"}
+
+
+def test_clone_all_requires_a_filter_and_records_each_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(clone, "env_github_token", lambda: "token")
+    monkeypatch.setattr(clone, "discover_repos", lambda *_: ["vault", "broken"])
+
+    def sync_repo(url, path, token, report_only):
+        if path.name == "broken":
+            raise OSError("No space left on device")
+        return "cloned"
+
+    results = []
+    monkeypatch.setattr(clone, "sync_repo", sync_repo)
+    monkeypatch.setattr(clone, "log_clone_table", results.extend)
+    args = Namespace(
+        org="cyfrin", filter=None, dest=str(tmp_path), max_clones=2, report_only=False
+    )
+    assert clone.clone_all(args) == 1
+    assert results == []
+
+    args.filter = "topic:audit"
+    assert clone.clone_all(args) == 1
+    assert [(r.name, r.action, r.error) for r in results] == [
+        ("vault", "cloned", None),
+        ("broken", "clone", "No space left on device"),
+    ]
@@ -0,0 +1,46 @@
+import pytest
+
+from cyaudit.config import load_batch_config
+
+MANIFEST = """
+[vault]
+source_url = "https://github.com/client/vault"
+target_organization = "Cyfrin"
+auditors = ["alice", "bob"]
+commit_hash = "$VAULT_COMMIT"
+
+[bridge]
+source_url = "https://github.com/client/bridge"
+target_repo_name = "2025-01-bridge"
+target_organization = "Cyfrin"
+commit_hash = "abc123"
+give_teams_access = ["auditors"]
+"""
+
+
+def test_load_batch_config(tmp_path, monkeypatch):
+    monkeypatch.setenv("VAULT_COMMIT", "def456")
+    manifest = tmp_path / "audits.toml"
+    manifest.write_text(MANIFEST)
+
+    audits = load_batch_config(manifest)
+
+    assert list(audits) == ["vault", "bridge"]
+    vault, bridge = audits["vault"], audits["bridge"]
+    assert vault[0] == "https://github.com/client/vault"
+    assert vault[1] is None
+    assert vault[3] == ["alice", "bob"]
+    assert vault[4] == "def456"
+    assert bridge[1] == "2025-01-bridge"
+    assert bridge[3] == []
+    assert bridge[10] == ["auditors"]
+
+
+def test_load_batch_config_needs_audits(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_batch_config(tmp_path / "missing.toml")
+
+    manifest = tmp_path / "audits.toml"
+    manifest.write_text('title = "no tables"\n')
+    with pytest.raises(ValueError):
+        load_batch_config(manifest)
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import tomllib
+
+from cyaudit.commands.setup import patch_summary_toml
+from cyaudit.constants import REPORT_FOLDER, SUMMARY_TOML_PATH
+from cyaudit.git_data import TreeFile, commit_files, template_files
+
+
+class FakeRepo:
+    def __init__(self):
+        self.blobs = []
+        self.trees = []
+        self.ref = SimpleNamespace(object=SimpleNamespace(sha="parent"), edits=[])
+        self.ref.edit = self.ref.edits.append
+
+    def get_git_ref(self, ref):
+        return self.ref
+
+    def get_git_commit(self, sha):
+        return SimpleNamespace(sha=sha, tree="base-tree")
+
+    def create_git_blob(self, content, encoding):
+        self.blobs.append((content, encoding))
+        return SimpleNamespace(sha=f"blob{len(self.blobs)}")
+
+    def create_git_tree(self, elements, base_tree):
+        self.trees.append((elements, base_tree))
+        return "tree"
+
+    def create_git_commit(self, message, tree, parents):
+        return SimpleNamespace(sha="new-commit")
+
+
+def test_commit_files_makes_one_commit_and_uploads_binaries_once():
+    repo = FakeRepo()
+    png = b"\x89PNG\r\n\x1a\n\xff"
+    files = [
+        TreeFile("a/logo.png", png),
+        TreeFile("b/logo.png", png),
+        TreeFile("a/main.tex", b"\\begin{document}"),
+    ]
+
+    commit = commit_files(repo, "report", files, "install")
+
+    assert commit.sha == "new-commit"
+    assert repo.ref.edits == ["new-commit"]
+    assert len(repo.blobs) == 1 and repo.blobs[0][1] == "base64"
+    elements, base_tree = repo.trees[0]
+    assert base_tree == "base-tree"
+    assert [e._identity["path"] for e in elements] == [f.path for f in files]
+
+
+def test_template_files_cover_the_report_template():
+    paths = [file.path for file in template_files("test_output")]
+
+    assert {"output", "source", "templates"} <= {path.split("/")[1] for path in paths}
+    assert not any("__pycache__" in path for path in paths)
+
+
+def test_template_files_include_the_summary_information():
+    files = {file.path: file for file in template_files(REPORT_FOLDER)}
+    summary = files[SUMMARY_TOML_PATH].content
+
+    patched = tomllib.loads(
+        patch_summary_toml(summary, "client", "repo", "org", "audit", "abc").decode()
+    )
+
+    assert patched["summary"]["project_github"] == "https://github.com/client/repo.git"
+    assert patched["summary"]["private_github"] == "https://github.com/org/audit.git"
+    assert patched["summary"]["commit_hash"] == "abc"
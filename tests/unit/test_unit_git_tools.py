@@ -0,0 +1,252 @@
+import base64
+import os
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from cyaudit.git_tools import (
+    SOURCE_REMOTE,
+    clone_source,
+    clone_sparse_branch,
+    ensure_commit,
+    fetch_branches,
+    find_branch_containing,
+    has_commit,
+    parse_push_porcelain,
+    run_git,
+)
+from tests.conftest import git, make_upstream
+
+PORCELAIN_OUTPUT = """To https://github.com/org/audit-repo.git
+*\trefs/tags/cyfrin-audit:refs/tags/cyfrin-audit\t[new tag]
+*\t069cf56ec051216ccab79b550fba5e2a188ade9c:refs/heads/audit/alice\t[new branch]
+=\t069cf56ec051216ccab79b550fba5e2a188ade9c:refs/heads/report\t[up to date]
+!\t069cf56ec051216ccab79b550fba5e2a188ade9c:refs/heads/audit/bob\t[rejected] (fetch first)
+Done
+"""
+
+
+def test_parse_push_porcelain():
+    results = parse_push_porcelain(PORCELAIN_OUTPUT)
+
+    assert [(r.ref, r.ok) for r in results] == [
+        ("refs/tags/cyfrin-audit", True),
+        ("refs/heads/audit/alice", True),
+        ("refs/heads/report", True),
+        ("refs/heads/audit/bob", False),
+    ]
+    assert (
+        str(results[3]) == "refs/heads/audit/bob: rejected ([rejected] (fetch first))"
+    )
+
+
+def test_single_branch_clone_fetches_missing_commit(tmp_path):
+    upstream = make_upstream(tmp_path / "upstream")
+    git("checkout", "-q", "-b", "feature", cwd=upstream)
+    git("commit", "-q", "--allow-empty", "-m", "second", cwd=upstream)
+    commit = git("rev-parse", "HEAD", cwd=upstream)
+    git("checkout", "-q", "main", cwd=upstream)
+    git("config", "uploadpack.allowAnySHA1InWant", "true", cwd=upstream)
+
+    clone = str(tmp_path / "clone")
+    clone_source(f"file://{upstream}", clone, "single-branch")
+    assert not has_commit(clone, commit)
+
+    ensure_commit(clone, commit)
+    assert has_commit(clone, commit)
+    assert find_branch_containing(clone, commit) is None
+    with pytest.raises(RuntimeError):
+        ensure_commit(clone, "0" * 40)
+
+
+def test_find_branch_containing_prefers_default_branch(tmp_path):
+    upstream = make_upstream(tmp_path / "upstream")
+    commit = git("rev-parse", "HEAD", cwd=upstream)
+    git("checkout", "-q", "-b", "feature", cwd=upstream)
+    git("commit", "-q", "--allow-empty", "-m", "newer", cwd=upstream)
+    git("checkout", "-q", "main", cwd=upstream)
+
+    clone = str(tmp_path / "clone")
+    clone_source(f"file://{upstream}", clone)
+
+    assert find_branch_containing(clone, commit) == "main"
+    feature_commit = git("rev-parse", "feature", cwd=upstream)
+    assert find_branch_containing(clone, feature_commit) == "feature"
+
+
+def test_run_git_scopes_each_token_to_its_url(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.delenv("GIT_CONFIG_COUNT", raising=False)
+    credentials = {
+        "https://github.com/client/repo.git": "ghp_personal",
+        "https://github.com/org/audit.git": "ghp_org",
+    }
+
+    def header(url: str) -> str | None:
+        result = run_git(
+            ["config", "--get-urlmatch", "http.extraHeader", url],
+            credentials=credentials,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None
+        return base64.b64decode(result.stdout.split()[-1]).decode()
+
+    assert header("https://github.com/client/repo.git/info/refs") == (
+        "x-access-token:ghp_personal"
+    )
+    assert header("https://github.com/org/audit.git") == "x-access-token:ghp_org"
+    assert header("https://github.com/org/other.git") is None
+    assert header("https://example.com/client/repo.git") is None
+    assert not (tmp_path / ".gitconfig").exists()
+
+
+class GitHTTPHandler(BaseHTTPRequestHandler):
+    """Serves the repos of `server.root` through `git http-backend`, each
+    only to requests carrying its token."""
+
+    def do_GET(self):
+        self.run_backend()
+
+    def do_POST(self):
+        self.run_backend()
+
+    def run_backend(self):
+        path, _, query = self.path.partition("?")
+        repo = path.split("/")[1]
+        token = self.server.tokens[repo]
+        basic = base64.b64encode(f"x-access-token:{token}".encode()).decode()
+        if self.headers.get("Authorization") != f"Basic {basic}":
+            self.send_response(401)
+            self.send_header("WWW-Authenticate", 'Basic realm="git"')
+            self.end_headers()
+            return
+        env = {
+            **os.environ,
+            "GIT_PROJECT_ROOT": str(self.server.root),
+            "GIT_HTTP_EXPORT_ALL": "1",
+            "PATH_INFO": path,
+            "QUERY_STRING": query,
+            "REQUEST_METHOD": self.command,
+            "CONTENT_TYPE": self.headers.get("Content-Type", ""),
+            "REMOTE_USER": "x-access-token",
+            "REMOTE_ADDR": "127.0.0.1",
+            "HTTP_CONTENT_ENCODING": self.headers.get("Content-Encoding", ""),
+            "GIT_PROTOCOL": self.headers.get("Git-Protocol", ""),
+        }
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        output = subprocess.run(
+            ["git", "http-backend"], input=body, env=env, capture_output=True
+        ).stdout
+        head, _, content = output.partition(b"\r\n\r\n")
+        headers = [line.split(": ", 1) for line in head.decode().split("\r\n")]
+        status = dict(headers).get("Status", "200").split()[0]
+        self.send_response(int(status))
+        for name, value in headers:
+            if name != "Status":
+                self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def git_server(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GitHTTPHandler)
+    server.root = tmp_path / "served"
+    server.root.mkdir()
+    server.tokens = {}
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_push_from_partial_clone_sends_each_remote_its_token(tmp_path, git_server):
+    upstream = make_upstream(tmp_path / "upstream")
+    git("checkout", "-q", "-b", "feature", cwd=upstream)
+    for version in range(3):
+        (upstream / "Vault.sol").write_text(f"contract Vault{version} {{}}\n")
+        git("add", ".", cwd=upstream)
+        git("commit", "-q", "-m", f"version {version}", cwd=upstream)
+    served = git_server.root
+    git(
+        "clone", "-q", "--bare", str(upstream), str(served / "client.git"), cwd=tmp_path
+    )
+    git("config", "uploadpack.allowFilter", "true", cwd=served / "client.git")
+    git("config", "uploadpack.allowAnySHA1InWant", "true", cwd=served / "client.git")
+    git("init", "-q", "--bare", str(served / "audit.git"), cwd=tmp_path)
+    git("config", "http.receivepack", "true", cwd=served / "audit.git")
+    git_server.tokens = {"client.git": "personal", "audit.git": "org"}
+    base = f"http://127.0.0.1:{git_server.server_port}"
+    source_url, audit_url = f"{base}/client.git", f"{base}/audit.git"
+
+    clone = tmp_path / "clone"
+    # Only the blobs of the checked out commit are downloaded
+    run_git(
+        ["clone", "-q", "--filter=blob:none", "--origin", SOURCE_REMOTE]
+        + [source_url, str(clone)],
+        credentials={source_url: "personal"},
+        check=True,
+    )
+    run_git(
+        ["checkout", "-q", "-B", "feature", f"{SOURCE_REMOTE}/feature"],
+        clone,
+        {source_url: "personal"},
+        check=True,
+    )
+    run_git(["remote", "add", "origin", audit_url], clone, check=True)
+
+    push = ["push", "-q", "origin", "feature:main"]
+    # The push fetches the older blobs from source, which needs its own token
+    failed = run_git(push, clone, {audit_url: "org"}, capture_output=True)
+    assert failed.returncode != 0
+    run_git(
+        push,
+        clone,
+        {source_url: "personal", audit_url: "org"},
+        capture_output=True,
+        check=True,
+    )
+    assert git("rev-parse", "main", cwd=served / "audit.git") == git(
+        "rev-parse", "feature", cwd=upstream
+    )
+
+
+def test_sparse_branch_clone_then_fetch_branches(tmp_path):
+    upstream = tmp_path / "upstream"
+    (upstream / "src").mkdir(parents=True)
+    (upstream / "cyfrin-report").mkdir()
+    git("init", "-q", "-b", "main", cwd=upstream)
+    (upstream / "src" / "Vault.sol").write_text("contract Vault {}\n")
+    git("add", ".", cwd=upstream)
+    git("commit", "-q", "-m", "source", cwd=upstream)
+    git("branch", "audit/alice", cwd=upstream)
+    git("checkout", "-q", "-b", "report", cwd=upstream)
+    (upstream / "cyfrin-report" / "report.md").write_text("# Report\n")
+    git("add", ".", cwd=upstream)
+    git("commit", "-q", "-m", "report", cwd=upstream)
+    git("checkout", "-q", "main", cwd=upstream)
+
+    clone = tmp_path / "clone"
+    clone_sparse_branch(f"file://{upstream}", str(clone), "report", "cyfrin-report")
+
+    assert (clone / "cyfrin-report" / "report.md").exists()
+    assert not (clone / "src").exists()
+    assert git("rev-list", "--count", "HEAD", cwd=clone) == "1"
+    assert git("branch", "-r", cwd=clone).split() == ["origin/report"]
+
+    fetch_branches(str(clone), "audit/*")
+    assert "origin/audit/alice" in git("branch", "-r", cwd=clone).split()
+
+    # The hint printed after fetching works without the remote
+    upstream.rename(tmp_path / "gone")
+    git("switch", "-q", "audit/alice", cwd=clone)
+    git("sparse-checkout", "disable", cwd=clone)
+    assert (clone / "src" / "Vault.sol").exists()
@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from gql import GraphQLRequest
+from graphql import parse
+
+from cyaudit import github_client, limits
+from cyaudit.github_client import (
+    PooledHTTPSConnection,
+    get_repo,
+    is_mutation,
+    memoized,
+    remember_repo,
+)
+from cyaudit.rate_limit import scheduler
+
+
+def test_memoized_computes_once_under_concurrency():
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        time.sleep(0.05)
+        return "PVT_node"
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        values = list(
+            executor.map(lambda _: memoized(("test", "template"), lookup), range(8))
+        )
+
+    assert values == ["PVT_node"] * 8
+    assert len(calls) == 1
+
+
+def test_github_call_limit():
+    limits.set_limits(github_calls=2)
+    in_flight, peak = 0, 0
+    lock = threading.Lock()
+
+    def call(_):
+        nonlocal in_flight, peak
+        with scheduler.slot():
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.02)
+            with lock:
+                in_flight -= 1
+
+    try:
+        with ThreadPoolExecutor(max_workers=6) as executor:
+            list(executor.map(call, range(12)))
+    finally:
+        limits.set_limits()
+
+    assert peak == 2
+
+
+class FakeGithub:
+    def __init__(self):
+        self.lookups = []
+
+    def get_repo(self, full_name):
+        self.lookups.append(full_name)
+        if full_name == "org/missing":
+            raise LookupError(full_name)
+        return SimpleNamespace(full_name=full_name)
+
+
+def test_get_repo_remembers_found_repos_only(monkeypatch):
+    github = FakeGithub()
+    monkeypatch.setattr("cyaudit.github_client.get_github", lambda token: github)
+
+    assert get_repo("token-a", "Org/Audit") is get_repo("token-a", "org/audit")
+    for _ in range(2):
+        with pytest.raises(LookupError):
+            get_repo("token-a", "org/missing")
+    created = remember_repo("token-a", SimpleNamespace(full_name="org/new"))
+
+    assert get_repo("token-a", "org/new") is created
+    assert github.lookups == ["Org/Audit", "org/missing", "org/missing"]
+
+
+def test_pooled_connection_does_not_need_the_stream_attribute(monkeypatch):
+    # `stream` is an undocumented attribute that PyGithub only sets from 2.6
+    monkeypatch.setattr(github_client, "get_http_cache", lambda: None)
+    monkeypatch.setattr(
+        github_client.scheduler, "send", lambda call, idempotent: "response"
+    )
+    connection = PooledHTTPSConnection("api.github.com")
+    connection.verb, connection.url, connection.headers = "GET", "/repos/o/r", {}
+    assert not hasattr(connection, "stream")
+
+    assert connection.getresponse() == "response"
+
+
+def test_is_mutation_accepts_requests_and_documents():
+    mutation = 'mutation { addStar(input: {starrableId: "R_1"}) { clientMutationId } }'
+    query = "query { viewer { login } }"
+
+    # gql 3 transports get the document, gql 4 ones a GraphQLRequest
+    assert is_mutation(parse(mutation))
+    assert not is_mutation(parse(query))
+    assert is_mutation(GraphQLRequest(parse(mutation)))
+    assert not is_mutation(GraphQLRequest(parse(query)))
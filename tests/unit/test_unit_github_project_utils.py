@@ -0,0 +1,37 @@
+from gql.transport.exceptions import TransportQueryError
+
+from cyaudit.github_project_utils import finish_project
+
+
+class FakeClient:
+    def __init__(self, error=None):
+        self.error = error
+        self.requests = []
+
+    def execute(self, document, variable_values=None):
+        self.requests.append(variable_values)
+        if self.error is not None:
+            raise self.error
+        return {"update": {}, "link": {}}
+
+
+def test_finish_project_sends_one_request():
+    client = FakeClient()
+
+    assert finish_project(client, "audit-vault", "PVT_1", "R_1") == []
+    assert len(client.requests) == 1
+    assert client.requests[0]["update"]["projectId"] == "PVT_1"
+    assert client.requests[0]["link"] == {"projectId": "PVT_1", "repositoryId": "R_1"}
+
+
+def test_finish_project_reports_each_failed_mutation():
+    error = TransportQueryError(
+        "GraphQL errors",
+        errors=[{"message": "Could not resolve to a Repository", "path": ["link"]}],
+        data={"update": {"projectV2": {"id": "PVT_1"}}, "link": None},
+    )
+
+    assert finish_project(FakeClient(error), "audit-vault", "PVT_1", "R_1") == [
+        "Error occurred while linking the project to the repo: "
+        "Could not resolve to a Repository"
+    ]
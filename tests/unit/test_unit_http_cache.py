@@ -0,0 +1,45 @@
+from types import SimpleNamespace
+
+from requests.structures import CaseInsensitiveDict
+
+from cyaudit.cache import ArtifactCache
+from cyaudit.http_cache import HttpCache, conditional_headers
+
+URL = "api.github.com/repos/cyfrin/audit"
+TOKEN = {"Authorization": "token abc"}
+
+
+def response(status, body="", **headers):
+    return SimpleNamespace(
+        status=status, headers=CaseInsensitiveDict(headers), read=lambda: body
+    )
+
+
+def test_not_modified_is_served_from_the_cache(tmp_path):
+    http_cache = HttpCache(ArtifactCache(tmp_path))
+
+    key, entry = http_cache.lookup(TOKEN, URL)
+    assert entry is None
+    fresh = response(200, '{"id": 1}', ETag='"v1"', **{"X-RateLimit-Remaining": "10"})
+    assert http_cache.handle(key, entry, fresh) is fresh
+
+    key, entry = http_cache.lookup(TOKEN, URL)
+    assert conditional_headers(entry) == {"If-None-Match": '"v1"'}
+    served = http_cache.handle(
+        key, entry, response(304, ETag='"v1"', **{"X-RateLimit-Remaining": "9"})
+    )
+    assert served.status == 200
+    assert served.read() == '{"id": 1}'
+    assert served.headers["x-ratelimit-remaining"] == "9"
+
+
+def test_entries_are_scoped_by_token_and_need_a_validator(tmp_path):
+    http_cache = HttpCache(ArtifactCache(tmp_path))
+
+    key, entry = http_cache.lookup(TOKEN, URL)
+    http_cache.handle(key, entry, response(200, "{}", ETag='"v1"'))
+    assert http_cache.lookup({"Authorization": "token other"}, URL)[1] is None
+
+    key, entry = http_cache.lookup(TOKEN, URL + "/issues")
+    http_cache.handle(key, entry, response(200, "[]"))
+    assert http_cache.lookup(TOKEN, URL + "/issues")[1] is None
@@ -0,0 +1,31 @@
+from cyaudit.constants import SEVERITY_DATA
+from cyaudit.labels import plan_label_sync
+
+
+def test_plan_for_fresh_repo():
+    existing = {"bug": "d73a4a", "wontfix": "ffffff", "custom": "000000"}
+    plan = plan_label_sync(existing)
+
+    assert plan.create == SEVERITY_DATA
+    assert plan.update == []
+    assert plan.delete == ["bug", "wontfix"]
+
+
+def test_plan_only_touches_what_changed():
+    existing = {data["name"]: data["color"] for data in SEVERITY_DATA}
+    existing["Severity: High Risk"] = "000000"
+    existing["severity: low risk"] = "fbca04"
+
+    plan = plan_label_sync(existing)
+
+    assert plan.create == []
+    assert plan.delete == []
+    assert [data["current_name"] for data in plan.update] == [
+        "Severity: High Risk",
+        "severity: low risk",
+    ]
+
+
+def test_plan_is_empty_when_in_sync():
+    existing = {data["name"]: data["color"].upper() for data in SEVERITY_DATA}
+    assert plan_label_sync(existing).is_empty()
@@ -0,0 +1,50 @@
+from cyaudit.utils.latex_log import LatexLogParser
+
+
+def feed_all(parser, lines):
+    for line in lines:
+        error = parser.feed(line)
+        if error is not None:
+            return error
+    return parser.close()
+
+
+def test_parser_reports_file_line_error_with_context():
+    parser = LatexLogParser()
+    error = feed_all(
+        parser,
+        [
+            "(./report.tex",
+            "./report.tex:42: Undefined control sequence.",
+            "l.42 \\foo",
+            "never reached",
+        ],
+    )
+
+    assert error is not None
+    assert error.file == "./report.tex"
+    assert error.line == 42
+    assert error.message == "Undefined control sequence."
+    assert "(./report.tex" in error.context
+    assert error.context[-1] == "l.42 \\foo"
+
+
+def test_parser_stops_immediately_on_fatal_error():
+    parser = LatexLogParser()
+    error = parser.feed("! Emergency stop.")
+
+    assert error is not None
+    assert error.message == "Emergency stop."
+
+
+def test_parser_ignores_warnings():
+    parser = LatexLogParser()
+    error = feed_all(
+        parser,
+        [
+            "Overfull \\hbox (1.2pt too wide) in paragraph at lines 12--13",
+            "LaTeX Warning: Reference `foo' on page 1 undefined on input line 5.",
+        ],
+    )
+
+    assert error is None
@@ -0,0 +1,31 @@
+import os
+
+from cyaudit.mirrors import MirrorCache
+from tests.conftest import make_upstream
+
+
+def test_borrow_creates_and_updates_mirror(tmp_path):
+    make_upstream(tmp_path / "upstream")
+    mirrors = MirrorCache(tmp_path / "mirrors")
+
+    with mirrors.borrow(f"file://{tmp_path}/upstream", "Client", "Repo") as mirror:
+        assert mirror == mirrors.path_for("client", "repo")
+        assert (mirror / "objects").is_dir()
+
+    assert [m.name for m in mirrors.list()] == ["client/repo"]
+
+
+def test_prune_skips_mirrors_in_use(tmp_path):
+    make_upstream(tmp_path / "upstream")
+    mirrors = MirrorCache(tmp_path / "mirrors")
+    url = f"file://{tmp_path}/upstream"
+    old = mirrors.update(url, "client", "old")
+    os.utime(old, (1000, 1000))
+
+    with mirrors.borrow(url, "client", "busy") as busy:
+        os.utime(busy, (1000, 1000))
+        removed, _ = mirrors.prune(max_age_days=30)
+
+    assert removed == 1
+    assert not old.exists()
+    assert busy.exists()
@@ -0,0 +1,77 @@
+import threading
+
+from github import GithubException
+from gql.transport.exceptions import TransportQueryError
+
+from cyaudit import preflight
+from cyaudit.preflight import Check, run_checks, setup_checks
+
+
+def test_run_checks_reports_every_problem():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def passing():
+        barrier.wait()
+
+    def problem():
+        barrier.wait()
+        return "Commit abc not found"
+
+    def failing():
+        barrier.wait()
+        raise GithubException(401, {"message": "Bad credentials"})
+
+    checks = [
+        Check("organization", passing),
+        Check("commit", problem),
+        Check("teams", failing),
+    ]
+
+    assert run_checks(checks) == [
+        "Commit abc not found",
+        "teams: unexpected GitHub error (401 Bad credentials)",
+    ]
+
+
+def test_setup_checks_only_include_configured_inputs():
+    def names(**kwargs):
+        checks = setup_checks(
+            "client/repo", "org", "audit", "abc", "pat", "org-pat", **kwargs
+        )
+        return [check.name for check in checks]
+
+    assert names() == ["organization", "source repo", "commit", "target repo"]
+    assert names(resume=True, give_users_access=["alice"]) == [
+        "organization",
+        "source repo",
+        "commit",
+        "user alice",
+    ]
+
+
+def test_template_project_check_only_hides_missing_projects(monkeypatch):
+    def check(error):
+        def lookup(client, organization, number):
+            raise error
+
+        monkeypatch.setattr(preflight, "get_graphql_client", lambda token: None)
+        monkeypatch.setattr(preflight, "get_template_project_node_id", lookup)
+        checks = setup_checks(
+            "client/repo",
+            "org",
+            "audit",
+            "abc",
+            "pat",
+            "org-pat",
+            template_project_id="7",
+            resume=True,
+        )
+        return run_checks([c for c in checks if c.name == "template project"])
+
+    missing = TransportQueryError(
+        "missing", errors=[{"type": "NOT_FOUND", "message": "Could not resolve"}]
+    )
+    assert check(missing) == ["Template project 7 not found in org"]
+    assert check(TransportQueryError("Bad credentials")) == [
+        "template project: Bad credentials"
+    ]
@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from github import GithubException, RateLimitExceededException
+
+from cyaudit.rate_limit import Scheduler
+from cyaudit.steps import DONE, FAILED, Step, run_steps
+
+
+def test_secondary_rate_limit_pauses_and_halves_concurrency():
+    scheduler = Scheduler(max_concurrency=8)
+
+    wait = scheduler.observe(403, {"Retry-After": "30"}, "secondary rate limit")
+
+    assert wait == 30
+    assert scheduler.concurrency == 4
+    assert scheduler.resume_at >= time.time() + 29
+
+
+def test_exhausted_primary_limit_waits_for_the_reset():
+    scheduler = Scheduler(max_concurrency=8)
+    reset = time.time() + 120
+    headers = {
+        "X-RateLimit-Limit": "5000",
+        "X-RateLimit-Remaining": "0",
+        "X-RateLimit-Reset": str(reset),
+        "X-RateLimit-Resource": "graphql",
+    }
+
+    assert scheduler.observe(200, headers) is None
+    assert scheduler.resume_at == reset
+    assert scheduler.quotas["graphql"].remaining == 0
+
+
+def test_concurrency_grows_back_after_successes():
+    scheduler = Scheduler(max_concurrency=4)
+    scheduler.observe(429, {"Retry-After": "0"})
+    assert scheduler.concurrency == 2
+
+    headers = {"X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "4000"}
+    for _ in range(2):
+        scheduler.observe(200, headers)
+    assert scheduler.concurrency == 3
+
+
+def test_send_only_retries_idempotent_requests(monkeypatch):
+    monkeypatch.setattr("cyaudit.rate_limit.time.sleep", lambda seconds: None)
+    scheduler = Scheduler()
+    statuses = []
+
+    def flaky(status):
+        def send():
+            statuses.append(status)
+            scheduler._local.retry_after = scheduler.observe(
+                status if len(statuses) == 1 else 200, {}
+            )
+            return len(statuses)
+
+        return send
+
+    assert scheduler.send(flaky(503), idempotent=True) == 2
+    statuses.clear()
+    assert scheduler.send(flaky(503), idempotent=False) == 1
+
+
+@pytest.mark.parametrize("went_through", [False, True])
+def test_verifiable_steps_are_retried_after_rate_limits(monkeypatch, went_through):
+    monkeypatch.setattr("cyaudit.steps.time.sleep", lambda seconds: None)
+    attempts = []
+
+    def create_repo(done):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RateLimitExceededException(403, {"message": "secondary"}, {})
+        return "repo"
+
+    def forbidden(done):
+        raise GithubException(403, {"message": "Resource not accessible"}, {})
+
+    steps = [
+        Step(
+            "repo", create_repo, verify=lambda done: "found" if went_through else None
+        ),
+        Step("labels", forbidden, verify=lambda done: None),
+    ]
+    results = run_steps(steps)
+
+    assert results["repo"].status == DONE
+    assert results["repo"].value == ("found" if went_through else "repo")
+    assert len(attempts) == (1 if went_through else 2)
+    assert results["labels"].status == FAILED
@@ -0,0 +1,61 @@
+from cyaudit.commands import report
+from cyaudit.commands.report import compile_latex_report, get_source_date_epoch
+from cyaudit.utils.create_report import OUTPUT_PATH, SOURCE_PATH, WORKING_PATH
+from tests.conftest import git
+
+
+def test_source_date_epoch_prefers_the_environment(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    assert get_source_date_epoch() == "1700000000"
+
+
+def test_source_date_epoch_falls_back_to_the_last_source_commit(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("SOURCE_DATE_EPOCH", raising=False)
+    monkeypatch.setenv("GIT_CEILING_DIRECTORIES", str(tmp_path.parent))
+    assert get_source_date_epoch() == "0"
+
+    git("init", "-q", cwd=tmp_path)
+    source = tmp_path / SOURCE_PATH
+    source.mkdir(parents=True)
+    (source / "report.md").write_text("# Report\n")
+    git("add", ".", cwd=tmp_path)
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "@1600000000 +0000")
+    git("commit", "-q", "-m", "report", cwd=tmp_path)
+    monkeypatch.setenv("GIT_COMMITTER_DATE", "@1650000000 +0000")
+    (tmp_path / "README.md").write_text("Unrelated\n")
+    git("add", ".", cwd=tmp_path)
+    git("commit", "-q", "-m", "readme", cwd=tmp_path)
+
+    assert get_source_date_epoch() == "1600000000"
+
+
+def test_deterministic_build_pins_dates_and_drops_pdf_ids(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    (tmp_path / WORKING_PATH).mkdir(parents=True)
+    (tmp_path / OUTPUT_PATH).mkdir(parents=True)
+    (tmp_path / WORKING_PATH / "main.pdf").write_bytes(b"%PDF-1.5\n")
+    runs = []
+
+    def run_pdflatex(command, env):
+        runs.append((command, env))
+
+    monkeypatch.setattr(report, "run_pdflatex", run_pdflatex)
+    assert compile_latex_report(deterministic=True)
+
+    assert len(runs) == 2
+    command, env = runs[0]
+    assert command == [
+        "pdflatex",
+        "-shell-escape",
+        "-interaction=nonstopmode",
+        "-file-line-error",
+        "-jobname=main",
+        r"\pdfinfoomitdate=1\pdftrailerid{}\pdfsuppressptexinfo=-1\input{main.tex}",
+    ]
+    assert env["SOURCE_DATE_EPOCH"] == "1700000000"
+    assert env["FORCE_SOURCE_DATE"] == "1"
+    digest = (tmp_path / OUTPUT_PATH / "report.pdf.sha256").read_text()
+    assert digest.endswith("  report.pdf\n")
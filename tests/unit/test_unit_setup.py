@@ -1,16 +1,66 @@
-import tempfile
-from pathlib import Path
+from types import SimpleNamespace
 
-from cyaudit.commands.setup import copy_template_folder_to
+import pytest
+from github import GithubException
 
+from cyaudit.commands.setup import finish_project_board, resolve_commit_branch
 
-def test_copy_template_folder_to():
-    with tempfile.TemporaryDirectory() as temp_dir:
-        test_dir = Path(temp_dir) / "test_output"
 
-        copy_template_folder_to(str(test_dir))
+class FakeSourceRepo:
+    default_branch = "main"
 
-        assert test_dir.exists(), "Output directory wasn't created"
-        assert (test_dir / "output").exists(), "output directory not found"
-        assert (test_dir / "source").exists(), "source directory not found"
-        assert (test_dir / "templates").exists(), "templates not found"
+    def __init__(self, status, heads=()):
+        self.status = status
+        self.heads = heads
+
+    def compare(self, base, head):
+        return SimpleNamespace(status=self.status)
+
+    def get_commit(self, sha):
+        heads = [SimpleNamespace(name=name) for name in self.heads]
+        return SimpleNamespace(get_branches_where_head=lambda: heads)
+
+
+class FakeGithub:
+    def __init__(self, repo):
+        self.repo = repo
+
+    def get_repo(self, full_name):
+        if self.repo is None:
+            raise GithubException(404)
+        return self.repo
+
+
+def test_resolve_commit_branch_through_the_api():
+    assert (
+        resolve_commit_branch("", "abc", FakeGithub(FakeSourceRepo("behind")), "o/r")
+        == "main"
+    )
+    github = FakeGithub(FakeSourceRepo("diverged", heads=["fix"]))
+    assert resolve_commit_branch("", "abc", github, "o/r") == "fix"
+    assert resolve_commit_branch("", "abc", github, "o/r", branch="dev") == "dev"
+
+
+def test_resolve_commit_branch_falls_back_to_the_clone(monkeypatch):
+    monkeypatch.setattr(
+        "cyaudit.commands.setup.find_branch_containing", lambda path, sha: "local"
+    )
+    assert resolve_commit_branch("", "abc", FakeGithub(None), "o/r") == "local"
+    # A commit without get_branches_where_head, as in PyGithub before 2.6
+    repo = FakeSourceRepo("diverged")
+    repo.get_commit = lambda sha: SimpleNamespace()
+    assert resolve_commit_branch("", "abc", FakeGithub(repo), "o/r") == "local"
+
+
+def test_finish_project_board_fails_its_step_on_errors(monkeypatch):
+    monkeypatch.setattr("cyaudit.commands.setup.get_graphql_client", lambda token: None)
+    errors = []
+    monkeypatch.setattr(
+        "cyaudit.commands.setup.finish_project", lambda *args: list(errors)
+    )
+    repo = SimpleNamespace(node_id="R_1")
+
+    assert finish_project_board(repo, "token", "audit", "PVT_1") == "PVT_1"
+    errors.append("Error occurred while linking the project to the repo: Forbidden")
+    with pytest.raises(RuntimeError, match="linking the project"):
+        finish_project_board(repo, "token", "audit", "PVT_1")
@@ -0,0 +1,73 @@
+from cyaudit.utils.source_map import IssueRange, Location, SourceMap
+
+REPORT = [
+    "## High Risk",  # 1
+    "",
+    "",
+    "### Reentrancy in withdraw",  # 4
+    "",
+    "**Description:** The balance is updated after the call.",  # 6
+    "",
+    "```solidity",  # 8
+    'msg.sender.call{value: amount}("");',
+    "balance[msg.sender] = 0;",  # 10
+    "```",
+    "",
+    "### Fees & rewards rounding",  # 13
+    "",
+    "**Description:** Rounds down.",  # 15
+    "",
+    "\\clearpage",
+    "## Low Risk",  # 18
+]
+
+TEX = [
+    "\\hypertarget{high-risk}{%",
+    "\\Needspace{8cm}\\subsection{High Risk}\\label{high-risk}}",  # 2
+    "",
+    "\\hypertarget{reentrancy-in-withdraw}{%",
+    "\\Needspace{6cm}\\subsubsection{Reentrancy in withdraw}\\label{reentrancy}}",  # 5
+    "",
+    "\\textbf{Description:} The balance is updated after the call.",
+    "",
+    "\\begin{minted}[]{solidity}",  # 9
+    'msg.sender.call{value: amount}("");',
+    "balance[msg.sender] = 0;",  # 11
+    "\\end{minted}",
+    "",
+    "\\Needspace{6cm}\\subsubsection{Fees and rewards rounding}",  # 14
+    "",
+    "\\textbf{Description:} Rounds down.",  # 16
+]
+
+
+def make_source_map():
+    source_map = SourceMap(
+        issues=[
+            IssueRange(12, "### Reentrancy in withdraw"),
+            IssueRange(57, "### Fees & rewards rounding"),
+        ]
+    )
+    # Linting replaces '&' in headings, the map must still find the finding
+    report = [line.replace("&", "and") for line in REPORT]
+    source_map.anchor_markdown(report)
+    source_map.anchor_tex(report, TEX)
+    return source_map
+
+
+def test_locate_markdown():
+    source_map = make_source_map()
+
+    assert source_map.locate_markdown(1) is None
+    assert source_map.locate_markdown(6) == Location(12, 1)
+    assert source_map.locate_markdown(15) == Location(57, 1)
+    assert source_map.locate_markdown(18) is None
+    assert str(source_map.locate_markdown(13)) == "issue #57, title"
+
+
+def test_locate_tex():
+    source_map = make_source_map()
+
+    assert source_map.locate_tex(11) == Location(12, 5)
+    assert source_map.locate_tex(16) == Location(57, 0)
+    assert str(source_map.locate_tex(11)) == "issue #12, line 5"
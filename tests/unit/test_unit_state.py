@@ -0,0 +1,111 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from github import Github, UnknownObjectException
+from github.Organization import Organization
+
+from cyaudit import github_client
+from cyaudit.github_client import get_teams
+from cyaudit.state import AuditState
+
+
+def test_update_records_fields_by_full_name(tmp_path):
+    state = AuditState(tmp_path / "state.json")
+    state.update("Cyfrin/audit-vault", id=1, node_id="R_1")
+    state.update("cyfrin/AUDIT-vault", project_id="PVT_1")
+
+    entry = state.get("cyfrin/audit-vault")
+    assert entry["id"] == 1
+    assert entry["node_id"] == "R_1"
+    assert entry["project_id"] == "PVT_1"
+    assert state.get("cyfrin/other") == {}
+
+
+def test_stale_entries_are_ignored(tmp_path):
+    path = tmp_path / "state.json"
+    AuditState(path).update("cyfrin/audit-vault", id=1)
+    data = json.loads(path.read_text())
+    data["cyfrin/audit-vault"]["updated_at"] = "2000-01-01T00:00:00+00:00"
+    path.write_text(json.dumps(data))
+
+    assert AuditState(path).get("cyfrin/audit-vault") == {}
+    lenient = AuditState(path, max_age_days=365 * 100)
+    assert lenient.get("cyfrin/audit-vault")["id"] == 1
+
+
+def test_forget_drops_one_key(tmp_path):
+    state = AuditState(tmp_path / "state.json")
+    state.update("cyfrin/audit-vault", teams={"Auditors": {"id": 1}, "Ops": {"id": 2}})
+    state.forget("cyfrin/audit-vault", "teams", "Auditors")
+
+    assert state.get("cyfrin/audit-vault")["teams"] == {"Ops": {"id": 2}}
+
+
+def test_get_teams_uses_the_team_directory(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        github_client, "AuditState", lambda: AuditState(tmp_path / "state.json")
+    )
+    monkeypatch.setattr(github_client, "_pool_installed", True)
+    AuditState(tmp_path / "state.json").update(
+        "cyfrin",
+        teams={
+            "Auditors": {
+                "id": 7,
+                "slug": "auditors",
+                "name": "Auditors",
+                "checked_at": time.time(),
+            },
+            "Ops": {"id": 8, "slug": "ops", "name": "Ops", "checked_at": 0},
+        },
+    )
+    slugs, listed = [], []
+    teams_by_slug = {
+        "ops": SimpleNamespace(id=9, slug="ops", name="Ops"),
+        "security-researchers": SimpleNamespace(
+            id=10, slug="security-researchers", name="Security Researchers"
+        ),
+    }
+
+    def get_team_by_slug(org, slug):
+        slugs.append(slug)
+        if slug not in teams_by_slug:
+            raise UnknownObjectException(404, {}, {})
+        return teams_by_slug[slug]
+
+    def get_org_teams(org):
+        listed.append(org)
+        return {}
+
+    monkeypatch.setattr(Organization, "get_team_by_slug", get_team_by_slug)
+    monkeypatch.setattr(github_client, "get_org_teams", get_org_teams)
+    org = Github("token", lazy=True).get_organization("cyfrin")
+
+    teams = get_teams(org, ["Auditors"])
+    assert teams["Auditors"].id == 7
+    assert teams["Auditors"].slug == "auditors"
+    assert slugs == [] and listed == []
+
+    teams = get_teams(org, ["Auditors", "Ops", "Security Researchers", "Nobody"])
+    # Ops was looked up too long ago
+    assert teams["Ops"].id == 9
+    assert teams["Security Researchers"].id == 10
+    assert "Nobody" not in teams
+    assert sorted(slugs) == ["nobody", "ops", "security-researchers"]
+    assert len(listed) == 1
+    recorded = AuditState(tmp_path / "state.json").get("cyfrin")["teams"]
+    assert set(recorded) == {"Auditors", "Ops", "Security Researchers"}
+
+
+def test_update_dict_keeps_keys_recorded_concurrently(tmp_path):
+    path = tmp_path / "state.json"
+    names = [f"Team {i}" for i in range(16)]
+
+    def record(name: str) -> None:
+        AuditState(path).update_dict("Cyfrin", "teams", {name: {"slug": name}})
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(record, names))
+
+    assert sorted(AuditState(path).get("cyfrin")["teams"]) == sorted(names)
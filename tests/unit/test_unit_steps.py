@@ -0,0 +1,83 @@
+import threading
+
+import pytest
+
+from cyaudit.journal import Journal
+from cyaudit.steps import DONE, FAILED, SKIPPED, Step, run_steps
+
+
+def test_run_steps_passes_dependency_values():
+    steps = [
+        Step("repo", lambda done: "repo-object"),
+        Step("labels", lambda done: done["repo"] + "/labels", depends_on=["repo"]),
+    ]
+    results = run_steps(steps)
+
+    assert results["labels"].status == DONE
+    assert results["labels"].value == "repo-object/labels"
+
+
+def test_run_steps_runs_independent_steps_concurrently():
+    barrier = threading.Barrier(2, timeout=5)
+    steps = [
+        Step("labels", lambda done: barrier.wait()),
+        Step("branches", lambda done: barrier.wait()),
+    ]
+    results = run_steps(steps)
+
+    assert all(result.status == DONE for result in results.values())
+
+
+def test_run_steps_skips_dependents_of_failed_steps():
+    def fail(done):
+        exit()
+
+    steps = [
+        Step("repo", lambda done: "repo-object"),
+        Step("report-branch", fail, depends_on=["repo"]),
+        Step("report-data", lambda done: None, depends_on=["report-branch"]),
+        Step("ci", lambda done: None, depends_on=["report-data"]),
+        Step("labels", lambda done: None, depends_on=["repo"]),
+    ]
+    results = run_steps(steps)
+
+    assert results["report-branch"].status == FAILED
+    assert isinstance(results["report-branch"].error, SystemExit)
+    assert results["report-data"].status == SKIPPED
+    assert results["ci"].status == SKIPPED
+    assert results["labels"].status == DONE
+
+
+def test_run_steps_rejects_unknown_dependencies():
+    with pytest.raises(ValueError):
+        run_steps([Step("ci", lambda done: None, depends_on=["missing"])])
+
+
+def test_resumed_steps_only_run_when_their_changes_are_gone(tmp_path):
+    journal = Journal.open("org", "audit", root=tmp_path)
+    journal.start(commit_hash="abc")
+    first = run_steps(
+        [
+            Step("repo", lambda done: "repo"),
+            Step("ci", lambda done: 1 / 0, depends_on=["repo"]),
+        ],
+        journal=journal,
+    )
+    assert first["ci"].status == FAILED
+
+    journal = Journal.open("org", "audit", root=tmp_path)
+    journal.check_matches(commit_hash="abc")
+    with pytest.raises(ValueError):
+        journal.check_matches(commit_hash="def")
+
+    ran = []
+    results = run_steps(
+        [
+            Step("repo", lambda done: ran.append("repo"), verify=lambda done: "repo"),
+            Step("ci", lambda done: ran.append("ci"), depends_on=["repo"]),
+        ],
+        journal=journal,
+    )
+    assert ran == ["ci"]
+    assert results["repo"].resumed
+    assert journal.is_done("ci")
@@ -0,0 +1,72 @@
+import tempfile
+
+from cyaudit.utils import validate_report
+from cyaudit.utils.validate_report import (
+    validate_markdown,
+    validate_summary_table,
+    validate_tex,
+)
+
+
+def test_validate_markdown_finds_build_breakers():
+    report = [
+        "### Finding",
+        "![diagram](img/missing.png)",
+        "```notalanguage",
+        "code",
+        "```",
+        "```solidity",
+        "uint256 x;",
+    ]
+    with tempfile.TemporaryDirectory() as working_dir:
+        problems = validate_markdown(report, working_dir)
+
+    messages = [(p.line, p.message) for p in problems]
+    assert (2, "Image not found: img/missing.png") in messages
+    assert (6, "Code block is never closed") in messages
+    # Languages are only checked when pygments, which minted uses, is installed
+    if validate_report.get_lexer_by_name is not None:
+        assert (3, "Unknown code block language 'notalanguage'") in messages
+        assert len(problems) == 3
+    else:
+        assert len(problems) == 2
+
+
+def test_validate_tex_allows_pandoc_output():
+    tex = [
+        "\\hypertarget{fee_calc}{%",
+        "\\Needspace{6cm}\\subsubsection{Fee \\& rounding}\\label{fee_calc}}",
+        "Use \\texttt{fee\\_amount} instead, about 5\\% off \\(a_b\\).",
+        "\\begin{minted}[]{solidity}",
+        "a_b & c % d",
+        "\\end{minted}",
+        "\\begin{longtable}[]{@{}ll@{}}",
+        "A & B \\\\",
+        "\\end{longtable}",
+    ]
+    assert validate_tex(tex) == []
+
+
+def test_validate_tex_finds_unescaped_characters():
+    tex = ["fee_amount & more", "5% of the rest"]
+    messages = [(p.line, p.message) for p in validate_tex(tex)]
+
+    assert messages == [
+        (1, "Unescaped '_' outside code"),
+        (1, "Unescaped '&' outside a table"),
+        (2, "Unescaped '%' comments out the rest of the line"),
+    ]
+
+
+def test_validate_summary_table():
+    summary = [
+        "% __PLACEHOLDER__SUMMARY_OF_FINDINGS_START",
+        "\\hline\\hyperlink{a_b}{[H-1] Ok \\texttt{a\\_b}} & Resolved \\\\",
+        "\\hline\\hyperlink{c}{[H-2] Fees & rewards} & Open \\\\",
+        "% __PLACEHOLDER__SUMMARY_OF_FINDINGS_END",
+    ]
+    problems = validate_summary_table(summary)
+
+    assert [(p.line, p.message) for p in problems] == [
+        (3, "Unescaped '&' in a finding title")
+    ]